@@ -1,7 +1,9 @@
 from django.urls import path, include
 from blog.urls import blog_router
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+from core.graphql.cache import CachedExecutionContext, FieldCacheMiddleware
+from api.views import GraphQLView, graphql_metrics
+from core.graphql.tracing import TracingMiddleware
 from project.schema import AuthenticationMiddleware
 
 urlpatterns = [
@@ -11,6 +13,10 @@ urlpatterns = [
     path('s/', include('stores.urls')),
     path('p/', include('product.urls')),
     path("graphql", csrf_exempt(GraphQLView.as_view(
-        graphiql=True, middleware=[AuthenticationMiddleware()])),
+        graphiql=True,
+        middleware=[
+            AuthenticationMiddleware(), FieldCacheMiddleware(), TracingMiddleware()],
+        execution_context_class=CachedExecutionContext)),
         name="graphql",),
+    path("graphql/metrics", graphql_metrics, name="graphql-metrics"),
 ]
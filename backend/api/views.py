@@ -1,3 +1,340 @@
-from django.shortcuts import render
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseForbidden,
+    HttpResponseNotAllowed,
+)
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView as BaseGraphQLView, HttpError
+from graphql import (
+    ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast,
+    parse, validate_schema,
+)
+from graphql.validation import validate
+from core.graphql.cost import check_query_cost
+from core.graphql.tracing import (
+    Tracer, is_platform_staff, operation_metrics, should_trace)
+from core.utils.utils import get_client_ip
+from project.decorators import authenticate_jwt_request
 
-# Create your views here.
+PERSISTED_QUERY_KEY = "persisted-query:{}"
+
+
+class DocumentCache:
+    """
+    Process-level LRU of parsed and validated GraphQL documents.
+
+    Documents are keyed by the sha256 of the query text, which is also the
+    hash clients send for persisted queries. Only documents that passed
+    validation are kept.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+document_cache = DocumentCache(
+    getattr(settings, "GRAPHQL_DOCUMENT_CACHE_SIZE", 512))
+
+
+class PersistedQueryNotFound(GraphQLError):
+    """Raised when a client sends the hash of a query that is not registered."""
+
+    def __init__(self):
+        super().__init__(
+            "PersistedQueryNotFound",
+            extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+        )
+
+
+def get_query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def get_persisted_queries():
+    return caches[getattr(settings, "PERSISTED_QUERIES_CACHE_ALIAS", "persisted_queries")]
+
+
+class GraphQLView(BaseGraphQLView):
+    """
+    GraphQL view with a document cache and Automatic Persisted Queries.
+
+    Parsing and validating a document is skipped when the same query text
+    was validated before. Clients may send only the sha256 of a query in
+    `extensions.persistedQuery.sha256Hash`; unknown hashes answer with a
+    `PERSISTED_QUERY_NOT_FOUND` error, after which the client resends the
+    hash together with the query so it gets registered, once it is valid
+    and sent by an authenticated user, for `PERSISTED_QUERIES_TIMEOUT`. Queries can be sent
+    with GET; every operation needs an authenticated user, so GET responses
+    are private and only spare authenticated clients the request body.
+    """
+
+    @staticmethod
+    def get_graphql_params(request, data):
+        query, variables, operation_name, id = BaseGraphQLView.get_graphql_params(
+            request, data)
+
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        persisted_query = (extensions or {}).get("persistedQuery")
+        if not persisted_query:
+            return query, variables, operation_name, id
+
+        query_hash = persisted_query.get("sha256Hash")
+        if not isinstance(query_hash, str):
+            raise HttpError(HttpResponseBadRequest("Persisted query hash is missing."))
+        key = PERSISTED_QUERY_KEY.format(query_hash)
+        if query:
+            if get_query_hash(query) != query_hash:
+                raise HttpError(HttpResponseBadRequest(
+                    "Provided sha256 hash does not match query."))
+            # Registered by execute_graphql_request once the query is valid.
+            request._persisted_query_key = key
+            return query, variables, operation_name, id
+
+        query = get_persisted_queries().get(key)
+        if query is None:
+            raise PersistedQueryNotFound()
+        return query, variables, operation_name, id
+
+    def get_document(self, query):
+        """Return the parsed document of `query` and its validation errors."""
+        key = get_query_hash(query)
+        document = document_cache.get(key)
+        if document is not None:
+            return document, []
+
+        document = parse(query)
+        validation_errors = validate(
+            self.schema.graphql_schema,
+            document,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if not validation_errors:
+            document_cache.set(key, document)
+        return document, validation_errors
+
+    def register_persisted_query(self, request, query):
+        """Register a valid query sent with its hash, for authenticated users only."""
+        key = getattr(request, "_persisted_query_key", None)
+        if key is None:
+            return
+        request._persisted_query_key = None
+        user, _ = authenticate_jwt_request(request)
+        if user is not None:
+            get_persisted_queries().set(
+                key, query, getattr(settings, "PERSISTED_QUERIES_TIMEOUT", 7 * 24 * 60 * 60))
+
+    def get_budget_key(self, request):
+        """Return who pays for the operations of the request."""
+        user, _ = authenticate_jwt_request(request)
+        if user is not None:
+            return f"user:{user.pk}"
+        return f"ip:{get_client_ip(request)}"
+
+    def get_response(self, request, data, show_graphiql=False):
+        try:
+            query, variables, operation_name, id = self.get_graphql_params(
+                request, data)
+        except PersistedQueryNotFound as error:
+            return self.json_encode(request, {"errors": [error.formatted]}), 200
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+
+            request_errors = [
+                e for e in execution_result.errors or [] if not getattr(e, "path", None)
+            ]
+            if request_errors:
+                status_code = 400
+                if any(getattr(e, "extensions", None) and e.extensions.get("code") == "THROTTLED"
+                       for e in request_errors):
+                    status_code = 429
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method == "GET" and response.get("Content-Type") == "application/json":
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, validation_errors = self.get_document(query)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+        self.register_persisted_query(request, query)
+
+        extensions = {}
+        if operation_ast is not None:
+            extensions["cost"], cost_error = check_query_cost(
+                schema, document, operation_ast, variables,
+                self.get_budget_key(request))
+            if cost_error is not None:
+                return ExecutionResult(
+                    data=None, errors=[cost_error], extensions=extensions)
+
+        if should_trace(request):
+            if operation_name is None and operation_ast is not None and operation_ast.name:
+                operation_name = operation_ast.name.value
+            tracer = request._graphql_tracer = Tracer(operation_name)
+            with tracer.capture_sql():
+                result = self.execute_document(
+                    request, schema, document, operation_ast, variables, operation_name)
+            operation_metrics.observe(tracer)
+            # Sampled requests only feed the metrics unless sent by staff.
+            if is_platform_staff(authenticate_jwt_request(request)[0]):
+                extensions["tracing"] = tracer.as_extension()
+        else:
+            result = self.execute_document(
+                request, schema, document, operation_ast, variables, operation_name)
+        result.extensions = {**extensions, **(result.extensions or {})}
+        return result
+
+    def execute_document(
+        self, request, schema, document, operation_ast, variables, operation_name
+    ):
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options[
+                    "execution_context_class"
+                ] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+def graphql_metrics(request):
+    """
+    Expose the histograms of traced GraphQL operations to scrapers.
+
+    Scrapers send `GRAPHQL_METRICS_TOKEN` as a bearer token; staff users
+    may read the metrics with their JWT.
+    """
+    token = getattr(settings, "GRAPHQL_METRICS_TOKEN", "")
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    if not (token and constant_time_compare(authorization, f"Bearer {token}")):
+        user, _ = authenticate_jwt_request(request)
+        if not is_platform_staff(user):
+            return HttpResponseForbidden()
+    return HttpResponse(
+        operation_metrics.render(), content_type="text/plain; version=0.0.4")
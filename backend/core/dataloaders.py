@@ -0,0 +1,126 @@
+from collections import defaultdict
+
+
+NOT_CACHED = object()
+
+
+def register_siblings(context, instances):
+    """
+    Remember model instances that are resolved together in one request.
+
+    Loaders use the registered siblings of an instance to batch a relation
+    for the whole page the first time any of them is resolved. Related
+    objects already fetched with `select_related` or `prefetch_related`
+    are registered as well, so their own relations batch page-wide too.
+    """
+    registry = context.__dict__.setdefault("_dataloader_siblings", {})
+    pending = list(instances)
+    while pending:
+        instance = pending.pop()
+        if instance is None or instance.pk is None:
+            continue
+        siblings = registry.setdefault(instance._meta.concrete_model, {})
+        if instance.pk in siblings:
+            continue
+        siblings[instance.pk] = instance
+        pending.extend(
+            related for related in instance._state.fields_cache.values()
+            if related is not None
+        )
+        for related in getattr(instance, "_prefetched_objects_cache", {}).values():
+            pending.extend(related)
+    return instances
+
+
+def get_cached_relation(instance, name):
+    """
+    Return the relation `name` of `instance` if it is already loaded.
+
+    Covers relations fetched with `select_related` or `prefetch_related`;
+    returns `NOT_CACHED` when accessing the relation would hit the database.
+    """
+    prefetched = getattr(instance, "_prefetched_objects_cache", {})
+    if name in prefetched:
+        return list(prefetched[name])
+    if name in instance._state.fields_cache:
+        return instance._state.fields_cache[name]
+    return NOT_CACHED
+
+
+def get_siblings(context, model):
+    """Return the instances of `model` registered on the request so far."""
+    registry = context.__dict__.get("_dataloader_siblings", {})
+    return registry.get(model._meta.concrete_model, {}).values()
+
+
+def group_by(rows, key):
+    """Group `rows` into a dict of lists keyed by `key(row)`."""
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[key(row)].append(row)
+    return grouped
+
+
+class DataLoader:
+    """
+    Request-scoped loader that batches one relation across a page of objects.
+
+    Graphene resolves list items one after another, so a resolver cannot wait
+    for its siblings to queue their keys. Instead, the objects of a page are
+    registered on the request up front (see `register_siblings`), and the
+    first `load()` for any of them fetches the relation for all registered
+    siblings in a single query. Results are cached for the rest of the request.
+
+    Subclasses implement `batch_load` and, when the relation is not keyed by
+    the primary key of the parent, `get_key`. Setting `relation_name` lets
+    the loader reuse a relation that was already fetched with the parent.
+    """
+    default = None
+    relation_name = None
+
+    def __init__(self, context):
+        self.context = context
+        self._cache = {}
+
+    @classmethod
+    def for_context(cls, context):
+        """Return the loader instance bound to the given request."""
+        loaders = context.__dict__.setdefault("_dataloaders", {})
+        if cls not in loaders:
+            loaders[cls] = cls(context)
+        return loaders[cls]
+
+    def get_key(self, instance):
+        return instance.pk
+
+    def batch_load(self, keys):
+        """Return a list of results in the same order as `keys`."""
+        raise NotImplementedError("Subclasses must implement batch_load")
+
+    def get_cached(self, instance):
+        if self.relation_name is None:
+            return NOT_CACHED
+        return get_cached_relation(instance, self.relation_name)
+
+    def load(self, instance):
+        cached = self.get_cached(instance)
+        if cached is not NOT_CACHED:
+            return cached
+
+        key = self.get_key(instance)
+        if key is None:
+            return self.default
+
+        if key not in self._cache:
+            register_siblings(self.context, [instance])
+            keys = [key]
+            for sibling in get_siblings(self.context, type(instance)):
+                if self.get_cached(sibling) is not NOT_CACHED:
+                    continue
+                sibling_key = self.get_key(sibling)
+                if sibling_key is not None and sibling_key not in self._cache:
+                    keys.append(sibling_key)
+            keys = list(dict.fromkeys(keys))
+            self._cache.update(zip(keys, self.batch_load(keys)))
+
+        return self._cache[key]
@@ -1,25 +1,73 @@
 import json
-from typing import Callable
+from typing import Callable, Optional
 
 from django.db.models import JSONField
 from django.db.models.expressions import Expression
+from django.utils.text import Truncator
+
+
+class SanitizedValue(dict):
+    """A value `SanitizedJSONField.pre_save` has already sanitized."""
 
 
 class SanitizedJSONField(JSONField):
     description = "A JSON field that runs a given sanitization method "
     "before saving into the database."
 
-    def __init__(self, *args, sanitizer: Callable[[dict], dict], **kwargs):
+    def __init__(
+        self,
+        *args,
+        sanitizer: Callable[[dict], dict],
+        plaintext_sanitizer: Optional[Callable[[dict], tuple[dict, str]]] = None,
+        plaintext_field: Optional[str] = None,
+        excerpt_field: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        `plaintext_sanitizer` returns the sanitized value along with its
+        plain text. When given, saving a model instance also stores that text
+        in `plaintext_field` and, cut to the field's `max_length`, in
+        `excerpt_field`. Both must be declared after this field.
+        """
         super().__init__(*args, **kwargs)
         self._sanitizer_method = sanitizer
+        self._plaintext_sanitizer_method = plaintext_sanitizer
+        self.plaintext_field = plaintext_field
+        self.excerpt_field = excerpt_field
 
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         kwargs["sanitizer"] = self._sanitizer_method
+        if self._plaintext_sanitizer_method is not None:
+            kwargs["plaintext_sanitizer"] = self._plaintext_sanitizer_method
+        if self.plaintext_field:
+            kwargs["plaintext_field"] = self.plaintext_field
+        if self.excerpt_field:
+            kwargs["excerpt_field"] = self.excerpt_field
         return name, path, args, kwargs
 
+    def pre_save(self, model_instance, add):
+        """Sanitize the value and store its plain text in the same pass."""
+        value = super().pre_save(model_instance, add)
+        if self._plaintext_sanitizer_method is None or isinstance(value, Expression):
+            return value
+        if value is None:
+            text = ""
+        else:
+            value, text = self._plaintext_sanitizer_method(value)
+            if isinstance(value, dict):
+                value = SanitizedValue(value)
+        if self.plaintext_field:
+            setattr(model_instance, self.plaintext_field, text)
+        if self.excerpt_field:
+            max_length = model_instance._meta.get_field(self.excerpt_field).max_length
+            setattr(model_instance, self.excerpt_field, Truncator(text).chars(max_length))
+        return value
+
     def get_db_prep_save(self, value: dict, connection):
         """Sanitize the value for saving using the passed sanitizer."""
         if isinstance(value, Expression):
             return value
+        if isinstance(value, SanitizedValue):
+            return json.dumps(value)
         return json.dumps(self._sanitizer_method(value))
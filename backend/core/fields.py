@@ -1,5 +1,15 @@
+import json
 from json import JSONDecodeError
 import graphene
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from graphene.relay import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+from core.dataloaders import register_siblings
 
 
 class JSONString(graphene.JSONString):
@@ -9,3 +19,218 @@ class JSONString(graphene.JSONString):
             return graphene.JSONString.parse_literal(node)
         except JSONDecodeError:
             return None
+
+
+class CountableConnection(graphene.relay.Connection):
+    """
+    Relay connection exposing the total number of nodes.
+
+    The count is only run when the client selects `totalCount`, so pages
+    that do not ask for it never pay for a `COUNT(*)`.
+    """
+    total_count = graphene.Int(
+        description="Total number of nodes matching the filters.")
+
+    class Meta:
+        abstract = True
+
+    def resolve_total_count(root, info, **kwargs):
+        length = getattr(root, "length", None)
+        if length is not None:
+            return length
+        return root.iterable.count()
+
+
+class FilterConnectionField(DjangoFilterConnectionField):
+    """
+    Filter connection field that registers the nodes of each resolved page
+    on the request, so dataloaders can batch their relations page-wide.
+    """
+
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager,
+                            queryset_resolver, max_limit, enforce_first_or_last,
+                            root, info, **args):
+        resolved = super().connection_resolver(
+            resolver, connection, default_manager, queryset_resolver,
+            max_limit, enforce_first_or_last, root, info, **args)
+        register_siblings(
+            info.context, [edge.node for edge in resolved.edges])
+        return resolved
+
+
+def invalid_cursor_error():
+    return GraphQLError(
+        "Invalid pagination cursor.",
+        extensions={
+            "code": "INVALID_INPUT",
+            "status": 400
+        }
+    )
+
+
+class KeysetConnectionField(FilterConnectionField):
+    """
+    Filter connection field paginated by a keyset instead of an offset.
+
+    Cursors encode the values of the queryset's sort key, and each page is
+    fetched with a `WHERE (sort key) < (cursor)` condition plus `LIMIT n + 1`,
+    so deep pages cost the same as the first one and no `COUNT(*)` is run
+    unless `totalCount` is selected. Querysets without an explicit ordering
+    are sorted by `ordering`; the primary key is always appended as a
+    tie-breaker so the sort key is unique. Only concrete fields of the model
+    itself can be sort keys; related lookups and random ordering are rejected.
+
+    Unlike `FilterConnectionField`, the `offset` argument is rejected: clients
+    of connections switched to this field must page with `after`/`before`.
+    """
+
+    def __init__(self, type_, *args, ordering=("-created_at", "-pk"), **kwargs):
+        self.ordering = ordering
+        super().__init__(type_, *args, **kwargs)
+
+    def get_queryset_resolver(self):
+        resolve_queryset = super().get_queryset_resolver()
+
+        def resolver(connection, iterable, info, args):
+            queryset = resolve_queryset(connection, iterable, info, args)
+            return self.order_queryset(queryset)
+
+        return resolver
+
+    def order_queryset(self, queryset):
+        ordering = [
+            name for name in queryset.query.order_by if isinstance(name, str)
+        ] or list(queryset.model._meta.ordering) or list(self.ordering)
+        if not any(name.lstrip("-") in ("pk", queryset.model._meta.pk.name)
+                   for name in ordering):
+            ordering.append("-pk" if ordering[0].startswith("-") else "pk")
+        return queryset.order_by(*ordering)
+
+    @staticmethod
+    def get_sort_key(queryset):
+        """Return `(field, descending)` pairs of the queryset ordering."""
+        opts = queryset.model._meta
+        sort_key = []
+        for name in queryset.query.order_by:
+            field_name = name.lstrip("-") if isinstance(name, str) else None
+            try:
+                if field_name is None or LOOKUP_SEP in field_name:
+                    raise FieldDoesNotExist
+                field = opts.pk if field_name == "pk" else opts.get_field(field_name)
+                if not field.concrete or field.is_relation and not field.many_to_one:
+                    raise FieldDoesNotExist
+            except FieldDoesNotExist:
+                raise GraphQLError(
+                    f"Ordering by {name} is not supported on this connection.",
+                    extensions={
+                        "code": "INVALID_INPUT",
+                        "status": 400
+                    }
+                )
+            sort_key.append((field, name.startswith("-")))
+        return sort_key
+
+    @staticmethod
+    def encode_cursor(sort_key, instance):
+        values = [field.value_to_string(instance) for field, _ in sort_key]
+        return base64(json.dumps(values))
+
+    @staticmethod
+    def decode_cursor(sort_key, cursor):
+        try:
+            values = json.loads(unbase64(cursor))
+            if not isinstance(values, list) or len(values) != len(sort_key):
+                raise invalid_cursor_error()
+            return [
+                field.to_python(value)
+                for (field, _), value in zip(sort_key, values)
+            ]
+        except (ValueError, ValidationError):
+            raise invalid_cursor_error()
+
+    @staticmethod
+    def keyset_filter(sort_key, values, forward=True):
+        """
+        Build the condition selecting rows after (or before) a cursor.
+
+        For a key `(a, b)` sorted descending this expands to
+        `a < x OR (a = x AND b < y)`.
+        """
+        condition = Q()
+        for index, (field, descending) in enumerate(sort_key):
+            lookup = "lt" if descending == forward else "gt"
+            term = Q(**{f"{field.attname}__{lookup}": values[index]})
+            for position, (previous_field, _) in enumerate(sort_key[:index]):
+                term &= Q(**{previous_field.attname: values[position]})
+            condition |= term
+        return condition
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        if args.get("offset"):
+            raise GraphQLError(
+                "Offset pagination is not supported on this connection, "
+                "use the `after` cursor instead.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+        first, last = args.get("first"), args.get("last")
+        after, before = args.get("after"), args.get("before")
+        if (first is not None and first < 0) or (last is not None and last < 0):
+            raise GraphQLError(
+                "Pagination arguments `first` and `last` must be positive.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+        if max_limit is not None and first is None and last is None:
+            first = max_limit
+
+        queryset = maybe_queryset(iterable)
+        sort_key = cls.get_sort_key(queryset)
+        page = queryset
+        # Make sure the sort key is loaded along with the selected columns,
+        # otherwise every cursor would fetch its deferred values one by one.
+        loaded, defer = page.query.deferred_loading
+        if loaded and not defer:
+            page = page.only(*loaded, *(field.name for field, _ in sort_key))
+        if after:
+            page = page.filter(cls.keyset_filter(
+                sort_key, cls.decode_cursor(sort_key, after)))
+        if before:
+            page = page.filter(cls.keyset_filter(
+                sort_key, cls.decode_cursor(sort_key, before), forward=False))
+
+        has_previous_page, has_next_page = bool(after), bool(before)
+        if first is None and last is not None:
+            rows = list(page.reverse()[:last + 1])
+            has_previous_page = len(rows) > last
+            rows = rows[:last][::-1]
+        else:
+            rows = list(page if first is None else page[:first + 1])
+            if first is not None:
+                has_next_page = len(rows) > first
+                rows = rows[:first]
+            if last is not None and len(rows) > last:
+                has_previous_page = True
+                rows = rows[-last:]
+
+        edges = [
+            connection.Edge(node=row, cursor=cls.encode_cursor(sort_key, row))
+            for row in rows
+        ]
+        resolved = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            ),
+        )
+        resolved.iterable = queryset
+        return resolved
@@ -0,0 +1,93 @@
+"""
+Content-addressed storage of uploaded files.
+
+The upload handlers below hash every uploaded file while Django receives
+it, so saving it under a name derived from its SHA-256 digest does not
+read it again. A file whose name already exists in the storage is not
+written a second time. Files assembled on the local disk are wrapped in
+`LocalFile` so that saving them is a rename.
+"""
+import hashlib
+import os
+from django.core.files.base import File
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler, TemporaryFileUploadHandler)
+
+CONTENT_HASH_LENGTH = 64
+
+
+class HashingUploadHandlerMixin:
+    """Set `content_hash` on the uploaded files to the SHA-256 of their content."""
+
+    def new_file(self, *args, **kwargs):
+        # Set first: an activated memory handler stops the chain by raising.
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.receives_file():
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def receives_file(self):
+        return True
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    def receives_file(self):
+        # Larger files are passed on to the next handler, which hashes them.
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def get_content_hash(file):
+    """Return the SHA-256 of an uploaded file, hashing it if no handler did."""
+    content_hash = getattr(file, "content_hash", None)
+    if content_hash is None:
+        hasher = hashlib.sha256()
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        file.seek(0)
+        content_hash = file.content_hash = hasher.hexdigest()
+    return content_hash
+
+
+def get_content_name(directory, content_hash, file_name):
+    """
+    Return the storage name of a file with the given digest.
+
+    Files are spread over subdirectories named after the first two characters
+    of their digest and keep the extension of their original name.
+    """
+    _, extension = os.path.splitext(file_name)
+    return os.path.join(
+        directory, content_hash[:2], f"{content_hash}{extension.lower()}")
+
+
+def save_content_addressed(storage, directory, file):
+    """Save `file` under its content name unless it is stored already; return the name."""
+    name = get_content_name(directory, get_content_hash(file), file.name)
+    if storage.exists(name):
+        return name
+    return storage.save(name, file)
+
+
+class LocalFile(File):
+    """
+    A file on the local disk, such as an assembled chunked upload.
+
+    Like Django's temporary uploads it exposes `temporary_file_path`, so
+    `FileSystemStorage` moves it into place instead of copying it.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
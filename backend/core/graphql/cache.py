@@ -0,0 +1,167 @@
+import hashlib
+import json
+import time
+from graphql import ExecutionContext, OperationType, print_ast
+
+MISSING = object()
+
+
+class CacheHit(Exception):
+    """Raised by a resolver to answer its root field from the cache."""
+
+    def __init__(self, data):
+        super().__init__("Field served from cache")
+        self.data = data
+
+
+class CachedFieldSlot:
+    """
+    Cache bookkeeping of one root field being resolved.
+
+    Resolvers opt in by calling `read_through`, after their own permission
+    checks, with the namespace the field's data depends on. On a miss the
+    slot remembers where to store the completed result.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.cache = None
+        self.cache_key = None
+        self.lock_key = None
+        self.timeout = None
+
+    def read_through(self, cache, namespace, timeout=None, lock_timeout=5,
+                     poll_interval=0.05):
+        """
+        Raise `CacheHit` if the field is cached under `namespace`.
+
+        Only one worker recomputes a missing entry: it takes a short lock
+        with `cache.add`, while concurrent workers poll for its result for
+        up to `lock_timeout` seconds before computing it themselves.
+        """
+        cache_key = f"{namespace}:{self.key}"
+        data = cache.get(cache_key, MISSING)
+        if data is not MISSING:
+            raise CacheHit(data)
+
+        lock_key = f"{cache_key}:lock"
+        if not cache.add(lock_key, 1, lock_timeout):
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(poll_interval)
+                data = cache.get(cache_key, MISSING)
+                if data is not MISSING:
+                    raise CacheHit(data)
+            lock_key = None
+
+        self.cache = cache
+        self.cache_key = cache_key
+        self.lock_key = lock_key
+        self.timeout = timeout
+
+    @property
+    def active(self):
+        return self.cache is not None
+
+    def save(self, data):
+        self.cache.set(self.cache_key, data, self.timeout)
+
+    def release(self):
+        if self.active and self.lock_key is not None:
+            self.cache.delete(self.lock_key)
+            self.lock_key = None
+
+
+class CachedField:
+    """Result of a root field resolved through `FieldCacheMiddleware`."""
+
+    def __init__(self, value=None, data=MISSING, slot=None):
+        self.value = value
+        self.data = data
+        self.slot = slot
+
+    @property
+    def hit(self):
+        return self.data is not MISSING
+
+
+def get_field_cache_key(info, args):
+    """
+    Hash what the result of a root field depends on.
+
+    That is the field name, its arguments and its selection set, together
+    with the fragments of the document and the variables of the operation,
+    which nested resolvers may read directly (see `inCollection`).
+    """
+    parts = [
+        info.field_name,
+        json.dumps(args, sort_keys=True, default=str),
+        json.dumps(info.variable_values, sort_keys=True, default=str),
+        *(print_ast(node.selection_set) for node in info.field_nodes
+          if node.selection_set is not None),
+        *(print_ast(fragment) for _, fragment in sorted(info.fragments.items())),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def get_field_cache_slot(info):
+    """Return the cache slot of the root field being resolved, if any."""
+    if info.path.prev is not None:
+        return None
+    slots = info.context.__dict__.get("_field_cache_slots", {})
+    return slots.get(info.path.key)
+
+
+class FieldCacheMiddleware:
+    """
+    Graphene middleware that lets root query fields be served from a cache.
+
+    It only prepares a slot per root field; nothing is cached unless the
+    resolver calls `read_through` on it. Must be used together with
+    `CachedExecutionContext`, which stores and replays completed results.
+    """
+
+    def resolve(self, next, root, info, **kwargs):
+        if (info.path.prev is not None
+                or info.operation.operation != OperationType.QUERY):
+            return next(root, info, **kwargs)
+
+        slot = CachedFieldSlot(get_field_cache_key(info, kwargs))
+        slots = info.context.__dict__.setdefault("_field_cache_slots", {})
+        slots[info.path.key] = slot
+        try:
+            value = next(root, info, **kwargs)
+        except CacheHit as hit:
+            return CachedField(data=hit.data)
+        except Exception:
+            slot.release()
+            raise
+        if not slot.active:
+            return value
+        return CachedField(value=value, slot=slot)
+
+
+class CachedExecutionContext(ExecutionContext):
+    """
+    Execution context that completes `CachedField` results.
+
+    Hits are returned as they were serialized; misses are completed as usual
+    and stored, unless completing them raised field errors.
+    """
+
+    def complete_value(self, return_type, field_nodes, info, path, result):
+        if not isinstance(result, CachedField):
+            return super().complete_value(
+                return_type, field_nodes, info, path, result)
+        if result.hit:
+            return result.data
+
+        error_count = len(self.errors)
+        try:
+            completed = super().complete_value(
+                return_type, field_nodes, info, path, result.value)
+            if len(self.errors) == error_count:
+                result.slot.save(completed)
+            return completed
+        finally:
+            result.slot.release()
@@ -0,0 +1,204 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from graphql import (
+    FieldNode, FragmentSpreadNode, GraphQLError, InlineFragmentNode,
+    IntValueNode, StringValueNode, VariableNode, get_named_type,
+    get_nullable_type, is_list_type, is_object_type, is_interface_type,
+)
+from graphql.utilities import get_operation_root_type
+
+BUDGET_KEY = "graphql-cost:{}:{}"
+
+
+class QueryCost:
+    """Static cost and depth of an operation, computed before execution."""
+
+    def __init__(self):
+        self.cost = 0
+        self.depth = 0
+
+    def as_extension(self):
+        return {
+            "requestedQueryCost": self.cost,
+            "maximumQueryCost": settings.GRAPHQL_MAX_QUERY_COST,
+            "depth": self.depth,
+            "maximumDepth": settings.GRAPHQL_MAX_QUERY_DEPTH,
+        }
+
+
+def is_connection_type(type_):
+    return (
+        is_object_type(type_)
+        and "edges" in type_.fields
+        and "pageInfo" in type_.fields
+    )
+
+
+def get_argument_value(field_node, name, variables):
+    for argument in field_node.arguments:
+        if argument.name.value != name:
+            continue
+        value = argument.value
+        if isinstance(value, VariableNode):
+            return variables.get(value.name.value)
+        if isinstance(value, (IntValueNode, StringValueNode)):
+            return value.value
+    return None
+
+
+def get_multiplier(field_type, field_node, parent_type, variables):
+    """
+    Return how many times the selections of a field may be resolved.
+
+    Connections multiply by their `first`/`last` argument, or by the default
+    page size when neither is given; their `edges` do not multiply again.
+    Other list fields multiply by a fixed weight.
+    """
+    named_type = get_named_type(field_type)
+    if is_connection_type(named_type):
+        sizes = []
+        for name in ("first", "last"):
+            try:
+                sizes.append(int(get_argument_value(field_node, name, variables)))
+            except (TypeError, ValueError):
+                pass
+        return max(sizes) if sizes else settings.GRAPHQL_DEFAULT_CONNECTION_SIZE
+    if is_connection_type(parent_type) and field_node.name.value == "edges":
+        return 1
+    if is_list_type(get_nullable_type(field_type)):
+        return settings.GRAPHQL_LIST_FIELD_WEIGHT
+    return 1
+
+
+def _selection_set_cost(result, schema, parent_type, selection_set, fragments,
+                        variables, depth, visited_fragments):
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            cost += _field_cost(
+                result, schema, parent_type, selection, fragments, variables,
+                depth, visited_fragments)
+        elif isinstance(selection, InlineFragmentNode):
+            fragment_type = parent_type
+            if selection.type_condition is not None:
+                fragment_type = schema.get_type(selection.type_condition.name.value)
+            cost += _selection_set_cost(
+                result, schema, fragment_type, selection.selection_set,
+                fragments, variables, depth, visited_fragments)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            fragment = fragments.get(name)
+            if fragment is None or name in visited_fragments:
+                continue
+            cost += _selection_set_cost(
+                result, schema, schema.get_type(fragment.type_condition.name.value),
+                fragment.selection_set, fragments, variables, depth,
+                visited_fragments | {name})
+    return cost
+
+
+def _field_cost(result, schema, parent_type, field_node, fragments, variables,
+                depth, visited_fragments):
+    name = field_node.name.value
+    if name.startswith("__") or not (
+            is_object_type(parent_type) or is_interface_type(parent_type)):
+        return 0
+    field = parent_type.fields.get(name)
+    if field is None or field_node.selection_set is None:
+        return 0
+
+    depth += 1
+    result.depth = max(result.depth, depth)
+    children = _selection_set_cost(
+        result, schema, get_named_type(field.type), field_node.selection_set,
+        fragments, variables, depth, visited_fragments)
+    return 1 + get_multiplier(field.type, field_node, parent_type, variables) * children
+
+
+def calculate_query_cost(schema, document, operation, variables=None):
+    """
+    Compute the static cost and depth of `operation` in `document`.
+
+    Every object field costs 1 plus the cost of its selections, multiplied
+    by the number of items it may return; scalar fields are free.
+    """
+    result = QueryCost()
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if definition.kind == "fragment_definition"
+    }
+    result.cost = _selection_set_cost(
+        result, schema, get_operation_root_type(schema, operation),
+        operation.selection_set, fragments, variables or {}, 0, frozenset())
+    return result
+
+
+def get_budget_cache():
+    """Return the cache holding the budgets, shared by all processes."""
+    return caches[settings.GRAPHQL_COST_BUDGET_CACHE_ALIAS]
+
+
+def consume_cost_budget(key, cost):
+    """
+    Charge `cost` to the budget of `key` for the current window.
+
+    Returns `(remaining, reset_in)`; `remaining` is negative when the charge
+    was refused because the budget is exhausted.
+    """
+    cache = get_budget_cache()
+    window = settings.GRAPHQL_COST_BUDGET_WINDOW
+    now = time.time()
+    window_key = BUDGET_KEY.format(key, int(now // window))
+    cache.add(window_key, 0, window)
+    try:
+        spent = cache.incr(window_key, cost)
+    except ValueError:
+        cache.set(window_key, cost, window)
+        spent = cost
+    reset_in = int(window - now % window)
+    remaining = settings.GRAPHQL_COST_BUDGET - spent
+    if remaining < 0:
+        cache.decr(window_key, cost)
+    return remaining, reset_in
+
+
+def check_query_cost(schema, document, operation, variables, budget_key):
+    """
+    Reject operations that are too deep, too expensive, or over budget.
+
+    The budget is shared by all operations of `budget_key`, which names the
+    caller: the authenticated user, or the client address. Arguments of the
+    operation, such as a store domain, are chosen by the client and never
+    pick the budget. Returns the cost extension of the response together
+    with a `GraphQLError`, or `None` when accepted.
+    """
+    query_cost = calculate_query_cost(schema, document, operation, variables)
+    extension = query_cost.as_extension()
+
+    if query_cost.depth > settings.GRAPHQL_MAX_QUERY_DEPTH:
+        return extension, GraphQLError(
+            f"Query depth {query_cost.depth} exceeds the maximum of "
+            f"{settings.GRAPHQL_MAX_QUERY_DEPTH}.",
+            extensions={"code": "QUERY_TOO_DEEP", "status": 400},
+        )
+    if query_cost.cost > settings.GRAPHQL_MAX_QUERY_COST:
+        return extension, GraphQLError(
+            f"Query cost {query_cost.cost} exceeds the maximum of "
+            f"{settings.GRAPHQL_MAX_QUERY_COST}.",
+            extensions={"code": "QUERY_TOO_COMPLEX", "status": 400},
+        )
+
+    remaining, reset_in = consume_cost_budget(budget_key, query_cost.cost)
+    extension["budget"] = {
+        "limit": settings.GRAPHQL_COST_BUDGET,
+        "remaining": max(remaining, 0),
+        "resetIn": reset_in,
+    }
+    if remaining < 0:
+        return extension, GraphQLError(
+            "Query cost budget exhausted, retry later.",
+            extensions={"code": "THROTTLED", "status": 429, "retryAfter": reset_in},
+        )
+    return extension, None
@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from project.decorators import authenticate_jwt_request
+
+TRACE_HEADER = "HTTP_X_GRAPHQL_TRACE"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Label of the operations past the limit of distinct names, see OperationMetrics
+OTHER_OPERATIONS = "other"
+
+
+def is_platform_staff(user):
+    return user is not None and (user.is_staff or user.is_superuser)
+
+
+def should_trace(request):
+    """
+    Trace a random sample of requests, plus those asking for it with a header.
+
+    The header is only honoured for staff users: the trace exposes SQL
+    timings and resolver paths.
+    """
+    if request.META.get(TRACE_HEADER, "").lower() in ("1", "true", "yes"):
+        user, _ = authenticate_jwt_request(request)
+        if is_platform_staff(user):
+            return True
+    sample_rate = getattr(settings, "GRAPHQL_TRACING_SAMPLE_RATE", 0)
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def get_path_key(path):
+    """Return a resolver path without list indices, e.g. `allProducts.edges.node.seo`."""
+    keys = []
+    while path is not None:
+        if isinstance(path.key, str):
+            keys.append(path.key)
+        path = path.prev
+    return ".".join(reversed(keys))
+
+
+class ResolverStats:
+    __slots__ = ("parent_type", "field_name", "calls", "duration", "sql_count", "sql_time")
+
+    def __init__(self, parent_type, field_name):
+        self.parent_type = parent_type
+        self.field_name = field_name
+        self.calls = 0
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+
+class Tracer:
+    """
+    Timings and SQL accounting of one GraphQL operation.
+
+    Resolvers are aggregated by path with list indices removed, so a path
+    whose `sqlCount` grows with its `calls` points at an N+1 pattern. SQL is
+    attributed to the resolver that started last: graphql-core completes a
+    field (iterating its querysets) right before resolving its children.
+    """
+
+    def __init__(self, operation_name):
+        self.operation_name = operation_name
+        self.resolvers = {}
+        self.current = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def get_stats(self, info):
+        key = get_path_key(info.path)
+        if key not in self.resolvers:
+            self.resolvers[key] = ResolverStats(info.parent_type.name, info.field_name)
+        return self.resolvers[key]
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.sql_count += 1
+            self.sql_time += elapsed
+            if self.current is not None:
+                self.current.sql_count += 1
+                self.current.sql_time += elapsed
+
+    @contextmanager
+    def capture_sql(self):
+        with connection.execute_wrapper(self.record_query):
+            yield
+        self.duration = time.perf_counter() - self.started
+
+    def as_extension(self):
+        return {
+            "operationName": self.operation_name,
+            "duration": round(self.duration * 1000, 3),
+            "sqlCount": self.sql_count,
+            "sqlTime": round(self.sql_time * 1000, 3),
+            "resolvers": [
+                {
+                    "path": path,
+                    "parentType": stats.parent_type,
+                    "fieldName": stats.field_name,
+                    "calls": stats.calls,
+                    "duration": round(stats.duration * 1000, 3),
+                    "sqlCount": stats.sql_count,
+                    "sqlTime": round(stats.sql_time * 1000, 3),
+                }
+                for path, stats in self.resolvers.items()
+            ],
+        }
+
+
+class TracingMiddleware:
+    """
+    Graphene middleware recording per-resolver wall time and SQL.
+
+    It only does work for requests the view started a `Tracer` for (see
+    `should_trace`); other requests pass straight through.
+    """
+
+    def resolve(self, next, root, info, **kwargs):
+        tracer = getattr(info.context, "_graphql_tracer", None)
+        if tracer is None:
+            return next(root, info, **kwargs)
+
+        stats = tracer.get_stats(info)
+        stats.calls += 1
+        tracer.current = stats
+        start = time.perf_counter()
+        try:
+            return next(root, info, **kwargs)
+        finally:
+            stats.duration += time.perf_counter() - start
+
+
+class OperationMetrics:
+    """
+    Process-level histograms of traced operations, keyed by operation name.
+
+    Operation names are chosen by clients, so only the first
+    `GRAPHQL_METRICS_MAX_OPERATIONS` distinct names get their own series;
+    later ones are counted under `other`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = defaultdict(lambda: {
+            "buckets": [0] * len(DURATION_BUCKETS),
+            "count": 0,
+            "sum": 0.0,
+            "sql_count": 0,
+            "sql_time": 0.0,
+        })
+
+    def observe(self, tracer):
+        name = tracer.operation_name or "anonymous"
+        max_operations = getattr(settings, "GRAPHQL_METRICS_MAX_OPERATIONS", 100)
+        with self._lock:
+            if name not in self._operations and len(self._operations) >= max_operations:
+                name = OTHER_OPERATIONS
+            operation = self._operations[name]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if tracer.duration <= bound:
+                    operation["buckets"][index] += 1
+            operation["count"] += 1
+            operation["sum"] += tracer.duration
+            operation["sql_count"] += tracer.sql_count
+            operation["sql_time"] += tracer.sql_time
+
+    def clear(self):
+        with self._lock:
+            self._operations.clear()
+
+    def render(self):
+        """Render the histograms in the Prometheus text format."""
+        with self._lock:
+            operations = [
+                (_label(name), {**values, "buckets": list(values["buckets"])})
+                for name, values in sorted(self._operations.items())
+            ]
+        lines = ["# TYPE graphql_operation_duration_seconds histogram"]
+        for label, values in operations:
+            for bound, count in zip(DURATION_BUCKETS, values["buckets"]):
+                lines.append(
+                    f'graphql_operation_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(
+                f'graphql_operation_duration_seconds_bucket{{{label},le="+Inf"}} {values["count"]}')
+            lines.append(f'graphql_operation_duration_seconds_sum{{{label}}} {values["sum"]}')
+            lines.append(f'graphql_operation_duration_seconds_count{{{label}}} {values["count"]}')
+        lines.append("# TYPE graphql_operation_sql_queries_total counter")
+        for label, values in operations:
+            lines.append(f'graphql_operation_sql_queries_total{{{label}}} {values["sql_count"]}')
+        lines.append("# TYPE graphql_operation_sql_seconds_total counter")
+        for label, values in operations:
+            lines.append(f'graphql_operation_sql_seconds_total{{{label}}} {values["sql_time"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(operation_name):
+    escaped = operation_name.replace("\\", "\\\\").replace('"', '\\"')
+    return f'operation="{escaped}"'
+
+
+operation_metrics = OperationMetrics()
@@ -0,0 +1,60 @@
+import json
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+
+API_HOST = "api.nour.com"
+API_PATH = "/graphql"
+
+
+class Command(BaseCommand):
+    help = "Benchmark a GraphQL operation: per-request latency and SQL query count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("query_file", help="Path to a file containing the GraphQL document.")
+        parser.add_argument("--email", required=True, help="Email of the user to authenticate as.")
+        parser.add_argument("--variables", default="{}", help="JSON encoded operation variables.")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist.")
+
+        with open(options["query_file"]) as query_file:
+            body = json.dumps({
+                "query": query_file.read(),
+                "variables": json.loads(options["variables"]),
+            })
+
+        token = str(RefreshToken.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME=API_HOST)
+
+        for _ in range(options["warmup"]):
+            client.post(API_PATH, body, content_type="application/json")
+
+        timings, query_counts = [], []
+        for _ in range(options["iterations"]):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.post(API_PATH, body, content_type="application/json")
+                timings.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries))
+            if response.status_code != 200 or "errors" in response.json():
+                raise CommandError(f"Operation failed: {response.content.decode()}")
+
+        timings.sort()
+        self.stdout.write(
+            f"iterations: {options['iterations']}\n"
+            f"latency ms: mean {statistics.mean(timings):.2f}, "
+            f"median {statistics.median(timings):.2f}, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f}\n"
+            f"queries per request: {statistics.mean(query_counts):.1f}"
+        )
@@ -0,0 +1,91 @@
+"""
+Helpers of the media serving view, see core.views.serve_media.
+
+Media files are served from `MEDIA_ROOT` after an access check, with a
+strong ETag and Last-Modified so clients revalidate with a 304, and with
+single byte ranges. When `MEDIA_ACCEL_REDIRECT_PREFIX` is set, the file is
+handed over to nginx with `X-Accel-Redirect` and nginx sends the bytes.
+"""
+import os
+import re
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from stores.models import Store
+
+# Directories whose files belong to a store: `<directory>/<store id>/...`.
+STORE_MEDIA_DIRECTORIES = ("product_images",)
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+READ_SIZE = 64 * 1024
+
+
+def get_media_file(path):
+    """
+    Return the absolute path of a media file that may be served, or None.
+
+    Only regular files inside `MEDIA_PUBLIC_DIRECTORIES`, or listed in
+    `MEDIA_PUBLIC_FILES`, are served, never hidden ones, and the files of a
+    store only while the store exists.
+    """
+    parts = path.split("/")
+    if any(not part or part.startswith(".") for part in parts):
+        return None
+    if len(parts) < 2:
+        if path not in settings.MEDIA_PUBLIC_FILES:
+            return None
+    elif parts[0] not in settings.MEDIA_PUBLIC_DIRECTORIES:
+        return None
+    if parts[0] in STORE_MEDIA_DIRECTORIES and parts[1].isdigit() and len(parts) > 2:
+        if not Store.objects.filter(pk=int(parts[1])).exists():
+            return None
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        return None
+    return full_path if os.path.isfile(full_path) else None
+
+
+def get_etag(stat):
+    """Return a strong ETag in the format nginx uses, so both agree."""
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Return the `(start, end)` byte positions, inclusive, of a Range header.
+
+    Returns None when the whole file should be sent: no header, an invalid
+    one, or several ranges. Raises ValueError for a range past the end.
+    """
+    match = RANGE_PATTERN.match((header or "").replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last `end` bytes.
+        length = int(end)
+        if not length:
+            raise ValueError("Empty suffix range.")
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        if start < size:
+            return None
+        raise ValueError("Range starts past the end of the file.")
+    return start, end
+
+
+def read_range(file, start, end):
+    """Yield the bytes from `start` to `end` of an open file, then close it."""
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            data = file.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        file.close()
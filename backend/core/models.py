@@ -1,5 +1,5 @@
-from django.db import models, transaction
-from django.db.models import F, Max
+from django.db import models
+from django.db.models import Case, F, Value, When
 # Create your models here.
 
 
@@ -40,6 +40,16 @@ class ModelWithExternalReference(models.Model):
 
 
 class SortableModel(models.Model):
+    """
+    A model ordered by a sparse `sort_order` within its ordering queryset.
+
+    Positions are spaced `SORT_ORDER_GAP` apart and gaps left by deletes are
+    kept, so appending or deleting an entry writes its own row only and
+    leaves room to place entries between their neighbours.
+    `rebalance_sort_order` respaces a queryset in one UPDATE.
+    """
+    SORT_ORDER_GAP = 1024
+
     sort_order = models.IntegerField(editable=False, db_index=True, null=True)
 
     class Meta:
@@ -50,22 +60,37 @@ class SortableModel(models.Model):
 
     @staticmethod
     def get_max_sort_order(qs):
-        existing_max = qs.aggregate(Max("sort_order"))
-        existing_max = existing_max.get("sort_order__max")
-        return existing_max
+        # Reads the last entry of the `sort_order` index.
+        return (
+            qs.filter(sort_order__isnull=False).order_by("-sort_order")
+            .values_list("sort_order", flat=True).first()
+        )
+
+    @classmethod
+    def get_next_sort_order(cls, qs):
+        existing_max = cls.get_max_sort_order(qs)
+        return 0 if existing_max is None else existing_max + cls.SORT_ORDER_GAP
+
+    @classmethod
+    def set_sort_orders(cls, qs, sort_orders):
+        """
+        Apply `sort_orders`, a mapping of pk to sort order, with one UPDATE.
+        """
+        if not sort_orders:
+            return 0
+        return qs.filter(pk__in=list(sort_orders)).update(sort_order=Case(
+            *[When(pk=pk, then=Value(sort_order)) for pk, sort_order in sort_orders.items()],
+            output_field=models.IntegerField(),
+        ))
+
+    @classmethod
+    def rebalance_sort_order(cls, qs):
+        """Respace the entries of `qs`, keeping their order, with one UPDATE."""
+        pks = qs.order_by(F("sort_order").asc(nulls_last=True), "pk").values_list("pk", flat=True)
+        return cls.set_sort_orders(
+            qs, {pk: index * cls.SORT_ORDER_GAP for index, pk in enumerate(pks)})
 
     def save(self, *args, **kwargs):
-        if self.pk is None:
-            qs = self.get_ordering_queryset()
-            existing_max = self.get_max_sort_order(qs)
-            self.sort_order = 0 if existing_max is None else existing_max + 1
+        if self.pk is None and self.sort_order is None:
+            self.sort_order = self.get_next_sort_order(self.get_ordering_queryset())
         super().save(*args, **kwargs)
-
-    @transaction.atomic
-    def delete(self, *args, **kwargs):
-        if self.sort_order is not None:
-            qs = self.get_ordering_queryset()
-            qs.filter(sort_order__gt=self.sort_order).update(
-                sort_order=F("sort_order") - 1
-            )
-        super().delete(*args, **kwargs)
@@ -0,0 +1,122 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.registry import get_global_registry
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+def get_selections(info, path=()):
+    """
+    Return the merged selection tree of the field being resolved.
+
+    Selections of every field node (and of the fragments they spread) are
+    merged into nested dicts keyed by snake_case field names; `path` then
+    descends into the tree, e.g. `("edges", "node")` for a connection.
+    """
+    tree = {}
+    for field_node in info.field_nodes:
+        _merge_selection_set(tree, field_node.selection_set, info.fragments)
+    for name in path:
+        tree = tree.get(name, {})
+    return tree
+
+
+def _merge_selection_set(tree, selection_set, fragments):
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            if name.startswith("__"):
+                continue
+            subtree = tree.setdefault(to_snake_case(name), {})
+            _merge_selection_set(subtree, selection.selection_set, fragments)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                _merge_selection_set(tree, fragment.selection_set, fragments)
+        elif isinstance(selection, InlineFragmentNode):
+            _merge_selection_set(tree, selection.selection_set, fragments)
+
+
+def get_optimizer_hints(model):
+    """
+    Return the optimizer hints declared on the GraphQL type of `model`.
+
+    Types declare `optimizer_hints` for fields that do not map to a model
+    field, e.g. `{"product_id": {"only": ["id"]}}`. Supported keys are
+    `only`, `select_related` and `prefetch_related`.
+    """
+    node_type = get_global_registry().get_type_for_model(model)
+    return getattr(node_type, "optimizer_hints", {})
+
+
+def optimize_queryset(queryset, info, path=("edges", "node")):
+    """
+    Restrict `queryset` to what the client selected.
+
+    Loads only the selected columns, joins the selected forward relations
+    and prefetches the selected many-valued relations, recursively.
+    """
+    selections = get_selections(info, path)
+    if not selections:
+        return queryset
+    # Querysets built from a related manager (e.g. `store.products`) set the
+    # parent on every row, which needs the foreign key column to be loaded.
+    known_related = [field.attname for field in queryset._known_related_objects]
+    return _optimize(queryset, queryset.model, selections, known_related)
+
+
+def _optimize(queryset, model, selections, extra_only=()):
+    only, select_related, prefetch = _collect(model, selections)
+    only.extend(extra_only)
+    return (
+        queryset.only(*dict.fromkeys(only))
+        .select_related(*dict.fromkeys(select_related))
+        .prefetch_related(*prefetch)
+    )
+
+
+def _collect(model, selections, prefix=""):
+    only = [prefix + model._meta.pk.name]
+    select_related, prefetch = [], []
+
+    hints = get_optimizer_hints(model)
+    for name, subselections in selections.items():
+        hint = hints.get(name)
+        if hint is not None:
+            only.extend(prefix + lookup for lookup in hint.get("only", []))
+            select_related.extend(
+                prefix + lookup for lookup in hint.get("select_related", []))
+            prefetch.extend(
+                prefix + lookup for lookup in hint.get("prefetch_related", []))
+            continue
+
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+
+        if field.many_to_many or field.one_to_many:
+            related_model = field.related_model
+            extra_only = [field.field.name] if field.one_to_many else []
+            prefetch.append(Prefetch(
+                prefix + name,
+                queryset=_optimize(
+                    related_model._default_manager.all(), related_model,
+                    subselections, extra_only),
+            ))
+        elif field.is_relation:
+            if not field.concrete:
+                continue
+            only.append(prefix + name)
+            select_related.append(prefix + name)
+            related_only, related_select, related_prefetch = _collect(
+                field.related_model, subselections, f"{prefix}{name}__")
+            only.extend(related_only)
+            select_related.extend(related_select)
+            prefetch.extend(related_prefetch)
+        else:
+            only.append(prefix + name)
+
+    return only, select_related, prefetch
@@ -0,0 +1,62 @@
+import pytest
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from core.graphql.tests.utils import get_graphql_content
+from core.graphql.tests.fixtures import ApiClient
+
+STORE_QUERY = '''
+query Store($defaultDomain: String!) {
+    store(defaultDomain: $defaultDomain) {
+        name
+        email
+        defaultDomain
+        currencyCode
+        billingAddress { city zip company }
+    }
+}
+'''
+
+
+@pytest.mark.django_db
+def test_authentication_runs_once_per_request(staff_api_client, store, staff_member):
+    """Test that the JWT is authenticated once however many fields are resolved."""
+    variables = {"defaultDomain": store.default_domain}
+    with mock.patch.object(
+        JWTAuthentication, "authenticate", autospec=True,
+        side_effect=JWTAuthentication.authenticate,
+    ) as authenticate:
+        response = staff_api_client.post_graphql(STORE_QUERY, variables)
+
+    content = get_graphql_content(response)
+    assert content["data"]["store"]["defaultDomain"] == store.default_domain
+    assert authenticate.call_count == 1
+
+
+@pytest.mark.django_db
+def test_authentication_loads_user_once(staff_api_client, store, staff_member):
+    """Test that the authenticated user is loaded with a single query."""
+    variables = {"defaultDomain": store.default_domain}
+    with CaptureQueriesContext(connection) as queries:
+        response = staff_api_client.post_graphql(STORE_QUERY, variables)
+
+    get_graphql_content(response)
+    user_queries = [
+        query for query in queries.captured_queries
+        if 'FROM "accounts_user"' in query["sql"]
+    ]
+    assert len(user_queries) == 1
+
+
+@pytest.mark.django_db
+def test_authentication_failure_is_reported(store):
+    """Test that requests without a valid token are still rejected."""
+    client = ApiClient(user=None)
+    client.authenticate = lambda: None
+    response = client.post_graphql(
+        STORE_QUERY, {"defaultDomain": store.default_domain})
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["data"]["store"] is None
+    assert content["errors"][0]["message"].startswith("Authentication failed")
@@ -0,0 +1,54 @@
+import hashlib
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.client import Client
+from core.files import get_content_hash, get_content_name, save_content_addressed
+
+
+def test_get_content_name():
+    """Test that names are sharded by digest and keep the lowercase extension."""
+    content_hash = hashlib.sha256(b"data").hexdigest()
+
+    assert get_content_name("uploads", content_hash, "Photo.JPG") == (
+        f"uploads/{content_hash[:2]}/{content_hash}.jpg")
+
+
+def test_save_content_addressed_writes_a_file_once(media_root):
+    """Test that saving the same content again reuses the stored file."""
+    from django.core.files.storage import default_storage
+
+    first = save_content_addressed(
+        default_storage, "uploads", SimpleUploadedFile("a.txt", b"same"))
+    second = save_content_addressed(
+        default_storage, "uploads", SimpleUploadedFile("b.txt", b"same"))
+
+    assert first == second
+    assert first.endswith(f"{hashlib.sha256(b'same').hexdigest()}.txt")
+    assert len(list(media_root.rglob("*.txt"))) == 1
+
+
+@pytest.mark.parametrize("max_memory_size", [2 ** 20, 16])
+def test_custom_upload_file_hashes_while_streaming(settings, media_root, max_memory_size):
+    """Test that in-memory and temporary uploads are stored under their digest."""
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = max_memory_size
+    content = b"post image " * 100
+    client = Client(SERVER_NAME="core.nour.com")
+
+    urls = {
+        client.post("/upload/", {
+            "upload": SimpleUploadedFile(name, content, content_type="image/png"),
+        }).json()["url"]
+        for name in ("one.png", "two.png")
+    }
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    assert urls == {f"/media/blog/posts/{content_hash[:2]}/{content_hash}.png"}
+    assert (media_root / "blog" / "posts" / content_hash[:2] / f"{content_hash}.png").read_bytes() == content
+
+
+def test_get_content_hash_without_upload_handler():
+    """Test that files not received through the handlers are hashed on demand."""
+    file = SimpleUploadedFile("a.txt", b"content")
+
+    assert get_content_hash(file) == hashlib.sha256(b"content").hexdigest()
+    assert file.read() == b"content"
@@ -0,0 +1,142 @@
+import pytest
+from django.test.client import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.graphql.tests.utils import get_graphql_content
+from core.graphql.tracing import Tracer, operation_metrics
+from product.models import Product, ProductVariant
+
+ALL_PRODUCTS_QUERY = '''
+query TracedProducts($defaultDomain: String!) {
+    allProducts(defaultDomain: $defaultDomain, first: 10) {
+        edges { node { title image { imageId } } }
+    }
+}
+'''
+
+
+@pytest.fixture(autouse=True)
+def clear_operation_metrics():
+    operation_metrics.clear()
+
+
+@pytest.fixture
+def platform_staff(user):
+    user.is_staff = True
+    user.save(update_fields=["is_staff"])
+    return user
+
+
+def get_resolver(tracing, path):
+    return next(
+        resolver for resolver in tracing["resolvers"] if resolver["path"] == path)
+
+
+@pytest.mark.django_db
+def test_tracing_is_opt_in(staff_api_client, store, staff_member):
+    """Test that untraced requests carry no tracing extension."""
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain})
+    content = get_graphql_content(response)
+
+    assert "tracing" not in content["extensions"]
+
+
+@pytest.mark.django_db
+def test_tracing_header_is_ignored_for_non_staff_users(staff_api_client, store, staff_member):
+    """Test that only staff users may ask for the SQL timings of an operation."""
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain},
+        HTTP_X_GRAPHQL_TRACE="1")
+
+    assert "tracing" not in get_graphql_content(response)["extensions"]
+
+
+@pytest.mark.django_db
+def test_tracing_header_reports_resolvers(
+    staff_api_client, platform_staff, store, staff_member
+):
+    """Test that each resolver path reports its calls and SQL."""
+    for index in range(3):
+        product = Product.objects.create(store=store, title=f"Product {index}")
+        product.first_variant = ProductVariant.objects.create(product=product)
+        product.save()
+
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain},
+        HTTP_X_GRAPHQL_TRACE="1")
+    tracing = get_graphql_content(response)["extensions"]["tracing"]
+
+    assert tracing["operationName"] == "TracedProducts"
+    assert tracing["sqlCount"] > 0
+    image = get_resolver(tracing, "allProducts.edges.node.image")
+    assert image["calls"] == 3
+    assert image["sqlCount"] == 1
+    assert image["parentType"] == "ProductNode"
+    all_products = get_resolver(tracing, "allProducts")
+    assert all_products["sqlCount"] >= 1
+    assert sum(resolver["sqlCount"] for resolver in tracing["resolvers"]) <= tracing["sqlCount"]
+
+
+@pytest.mark.django_db
+def test_sampled_requests_are_traced(staff_api_client, store, staff_member, settings):
+    """Test that sampled requests feed the metrics without showing the trace to non-staff."""
+    settings.GRAPHQL_TRACING_SAMPLE_RATE = 1
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain})
+
+    assert "tracing" not in get_graphql_content(response)["extensions"]
+    assert 'operation="TracedProducts"' in operation_metrics.render()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(
+    staff_api_client, platform_staff, store, staff_member, settings
+):
+    """Test that traced operations are exposed as histograms to authorized scrapers."""
+    settings.GRAPHQL_METRICS_TOKEN = "scraper-token"
+    staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain},
+        HTTP_X_GRAPHQL_TRACE="1")
+
+    response = Client(HTTP_AUTHORIZATION="Bearer scraper-token").get(
+        "/graphql/metrics", SERVER_NAME="api.nour.com")
+    metrics = response.content.decode()
+    assert response.status_code == 200
+    assert 'graphql_operation_duration_seconds_count{operation="TracedProducts"} 1' in metrics
+    assert 'graphql_operation_sql_queries_total{operation="TracedProducts"}' in metrics
+
+    token = RefreshToken.for_user(platform_staff).access_token
+    response = Client(HTTP_AUTHORIZATION=f"Bearer {token}").get(
+        "/graphql/metrics", SERVER_NAME="api.nour.com")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_is_not_public(user, settings):
+    """Test that the metrics are hidden from local, anonymous and non-staff clients."""
+    settings.GRAPHQL_METRICS_TOKEN = "scraper-token"
+    token = RefreshToken.for_user(user).access_token
+
+    for client in (Client(), Client(HTTP_AUTHORIZATION="Bearer wrong-token"),
+                   Client(HTTP_AUTHORIZATION=f"Bearer {token}")):
+        response = client.get("/graphql/metrics", SERVER_NAME="api.nour.com")
+        assert response.status_code == 403
+
+    settings.GRAPHQL_METRICS_TOKEN = ""
+    response = Client(HTTP_AUTHORIZATION="Bearer ").get(
+        "/graphql/metrics", SERVER_NAME="api.nour.com")
+    assert response.status_code == 403
+
+
+def test_metrics_operation_names_are_bounded(settings):
+    """Test that names past the limit share the `other` series."""
+    settings.GRAPHQL_METRICS_MAX_OPERATIONS = 2
+    for name in ("First", "Second", "Random1", "Random2", "First"):
+        tracer = Tracer(name)
+        tracer.duration = 0.01
+        operation_metrics.observe(tracer)
+
+    metrics = operation_metrics.render()
+    assert 'graphql_operation_duration_seconds_count{operation="First"} 2' in metrics
+    assert 'graphql_operation_duration_seconds_count{operation="other"} 2' in metrics
+    assert "Random" not in metrics
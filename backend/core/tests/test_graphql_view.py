@@ -0,0 +1,134 @@
+import hashlib
+import json
+import pytest
+from unittest import mock
+from django.test.client import Client
+from api import views
+from core.graphql.tests.utils import get_graphql_content
+
+STORE_QUERY = '''
+query Store($defaultDomain: String!) {
+    store(defaultDomain: $defaultDomain) {
+        name
+    }
+}
+'''
+STORE_QUERY_HASH = hashlib.sha256(STORE_QUERY.encode()).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def clear_document_cache():
+    views.document_cache.clear()
+    views.get_persisted_queries().clear()
+
+
+def persisted_query_extensions(query_hash=STORE_QUERY_HASH):
+    return {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+
+
+def get_graphql(client, **params):
+    params = {
+        name: value if isinstance(value, str) else json.dumps(value)
+        for name, value in params.items()
+    }
+    return client.get(
+        "/graphql", params, SERVER_NAME="api.nour.com",
+        HTTP_ACCEPT="application/json")
+
+
+@pytest.mark.django_db
+def test_documents_are_parsed_once(staff_api_client, store, staff_member):
+    """Test that a repeated query reuses the parsed and validated document."""
+    variables = {"defaultDomain": store.default_domain}
+    with mock.patch.object(views, "parse", wraps=views.parse) as parse:
+        for _ in range(3):
+            response = staff_api_client.post_graphql(STORE_QUERY, variables)
+            content = get_graphql_content(response)
+            assert content["data"]["store"]["name"] == store.name
+
+    assert parse.call_count == 1
+
+
+@pytest.mark.django_db
+def test_invalid_documents_are_not_cached(staff_api_client):
+    """Test that validation errors are reported on every request."""
+    for _ in range(2):
+        response = staff_api_client.post_graphql("{ unknownField }")
+        content = json.loads(response.content)
+        assert "unknownField" in content["errors"][0]["message"]
+
+
+@pytest.mark.django_db
+def test_persisted_query_registration(staff_api_client, store, staff_member):
+    """Test the hash-only, then hash-and-query, then hash-only round trip."""
+    variables = {"defaultDomain": store.default_domain}
+
+    response = get_graphql(
+        staff_api_client, variables=variables,
+        extensions=persisted_query_extensions())
+    content = json.loads(response.content)
+    assert content["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+    response = get_graphql(
+        staff_api_client, query=STORE_QUERY, variables=variables,
+        extensions=persisted_query_extensions())
+    assert get_graphql_content(response)["data"]["store"]["name"] == store.name
+
+    response = get_graphql(
+        staff_api_client, variables=variables,
+        extensions=persisted_query_extensions())
+    assert get_graphql_content(response)["data"]["store"]["name"] == store.name
+    assert "private" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_persisted_query_hash_mismatch(staff_api_client):
+    """Test that a query is not registered under a hash of another text."""
+    response = get_graphql(
+        staff_api_client, query="{ __typename }",
+        extensions=persisted_query_extensions())
+
+    assert response.status_code == 400
+    assert views.get_persisted_queries().get(
+        views.PERSISTED_QUERY_KEY.format(STORE_QUERY_HASH)) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query, authenticated", [
+    ("query Store { unknownField }", True),
+    ("{ __typename }", False),
+])
+def test_persisted_query_is_registered_once_valid(staff_api_client, query, authenticated):
+    """Test that invalid queries and anonymous callers do not register queries."""
+    client = staff_api_client if authenticated else Client()
+    query_hash = hashlib.sha256(query.encode()).hexdigest()
+
+    get_graphql(client, query=query, extensions=persisted_query_extensions(query_hash))
+
+    assert views.get_persisted_queries().get(
+        views.PERSISTED_QUERY_KEY.format(query_hash)) is None
+
+
+@pytest.mark.django_db
+def test_persisted_query_expires(settings, staff_api_client, store, staff_member):
+    """Test that registered queries are kept for PERSISTED_QUERIES_TIMEOUT."""
+    settings.PERSISTED_QUERIES_TIMEOUT = 60
+
+    with mock.patch.object(views.get_persisted_queries(), "set") as cache_set:
+        get_graphql(
+            staff_api_client, query=STORE_QUERY,
+            variables={"defaultDomain": store.default_domain},
+            extensions=persisted_query_extensions())
+
+    cache_set.assert_called_once_with(
+        views.PERSISTED_QUERY_KEY.format(STORE_QUERY_HASH), STORE_QUERY, 60)
+
+
+@pytest.mark.django_db
+def test_anonymous_get_is_not_cacheable():
+    """Test that nginx is told not to cache a GET rejected for its missing user."""
+    response = get_graphql(Client(), query="{ __typename }")
+
+    assert json.loads(response.content)["errors"]
+    assert "private" in response["Cache-Control"]
+    assert "public" not in response["Cache-Control"]
@@ -0,0 +1,149 @@
+import json
+import pytest
+from django.test.client import Client, RequestFactory
+from graphql import get_operation_ast, parse
+from api.views import GraphQLView
+from core.graphql.cost import calculate_query_cost, get_budget_cache
+from core.graphql.tests.utils import get_graphql_content
+from project.schema import schema
+
+ALL_PRODUCTS_QUERY = '''
+query AllProducts($defaultDomain: String!, $first: Int) {
+    allProducts(defaultDomain: $defaultDomain, first: $first) {
+        edges {
+            node {
+                title
+                collections { title }
+            }
+        }
+    }
+}
+'''
+
+
+@pytest.fixture(autouse=True)
+def clear_cost_budgets():
+    get_budget_cache().clear()
+
+
+def get_cost(query, variables=None):
+    document = parse(query)
+    return calculate_query_cost(
+        schema.graphql_schema, document, get_operation_ast(document), variables)
+
+
+def test_connection_cost_is_weighted_by_page_size(settings):
+    """Test that connections multiply by `first` and lists by their weight."""
+    settings.GRAPHQL_LIST_FIELD_WEIGHT = 10
+    query_cost = get_cost(ALL_PRODUCTS_QUERY, {"defaultDomain": "shop", "first": 10})
+
+    # allProducts(1) + 10 * (edges(1) + node(1) + collections(1 + 10 * 0))
+    assert query_cost.cost == 31
+    assert query_cost.depth == 4
+
+
+def test_connection_without_page_size_uses_default(settings):
+    """Test that an unbounded connection is charged the default size."""
+    settings.GRAPHQL_DEFAULT_CONNECTION_SIZE = 50
+    query_cost = get_cost(ALL_PRODUCTS_QUERY, {"defaultDomain": "shop"})
+
+    assert query_cost.cost == 1 + 50 * 3
+
+
+def test_fragments_are_included_in_cost():
+    """Test that selections spread from fragments are charged."""
+    query = '''
+    fragment Item on ProductNode { collections { title } }
+    query { allProducts(defaultDomain: "shop", first: 2) {
+        edges { node { ...Item } }
+    } }
+    '''
+    assert get_cost(query).cost == 1 + 2 * 3
+
+
+@pytest.mark.django_db
+def test_cost_is_reported_in_extensions(staff_api_client, store, staff_member):
+    """Test that accepted operations report their cost and remaining budget."""
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain, "first": 10})
+    content = get_graphql_content(response)
+
+    cost = content["extensions"]["cost"]
+    assert cost["requestedQueryCost"] == 31
+    assert cost["budget"]["remaining"] == cost["budget"]["limit"] - 31
+
+
+@pytest.mark.django_db
+def test_expensive_operation_is_rejected(staff_api_client, store, staff_member):
+    """Test that an operation over the maximum cost is not executed."""
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain, "first": 10000})
+    content = json.loads(response.content)
+
+    assert response.status_code == 400
+    assert "data" not in content
+    assert content["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+    assert content["extensions"]["cost"]["requestedQueryCost"] > 10000
+
+
+@pytest.mark.django_db
+def test_deep_operation_is_rejected(staff_api_client, settings):
+    """Test that an operation nested deeper than the limit is not executed."""
+    settings.GRAPHQL_MAX_QUERY_DEPTH = 3
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": "shop", "first": 1})
+    content = json.loads(response.content)
+
+    assert response.status_code == 400
+    assert content["errors"][0]["extensions"]["code"] == "QUERY_TOO_DEEP"
+
+
+@pytest.mark.django_db
+def test_budget_is_throttled(staff_api_client, store, staff_member, settings):
+    """Test that a user over their budget is throttled until the window resets."""
+    settings.GRAPHQL_COST_BUDGET = 50
+    variables = {"defaultDomain": store.default_domain, "first": 10}
+
+    response = staff_api_client.post_graphql(ALL_PRODUCTS_QUERY, variables)
+    assert response.status_code == 200
+
+    response = staff_api_client.post_graphql(ALL_PRODUCTS_QUERY, variables)
+    content = json.loads(response.content)
+    assert response.status_code == 429
+    assert content["errors"][0]["extensions"]["code"] == "THROTTLED"
+    assert content["extensions"]["cost"]["budget"]["remaining"] == 0
+
+
+@pytest.mark.django_db
+def test_budget_is_charged_to_the_caller(staff_api_client, store, staff_member, settings):
+    """Test that naming a store does not spend, nor dodge, the budget of anyone else."""
+    settings.GRAPHQL_COST_BUDGET = 50
+    anonymous_client = Client(SERVER_NAME="api.nour.com")
+    for domain in (store.default_domain, "random-1", "random-2"):
+        anonymous_client.post(
+            "/graphql", {"query": ALL_PRODUCTS_QUERY,
+                         "variables": {"defaultDomain": domain, "first": 10}},
+            content_type="application/json", HTTP_X_REAL_IP="203.0.113.7")
+
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_QUERY, {"defaultDomain": store.default_domain, "first": 10})
+    assert response.status_code == 200
+
+    response = anonymous_client.post(
+        "/graphql", {"query": ALL_PRODUCTS_QUERY,
+                     "variables": {"defaultDomain": "random-3", "first": 10}},
+        content_type="application/json", HTTP_X_REAL_IP="203.0.113.7")
+    assert response.status_code == 429
+
+
+@pytest.mark.parametrize("remote_addr, real_ip, expected", [
+    ("127.0.0.1", "203.0.113.7", "ip:203.0.113.7"),
+    ("127.0.0.1", None, "ip:127.0.0.1"),
+    ("198.51.100.1", "203.0.113.7", "ip:198.51.100.1"),
+])
+def test_anonymous_budget_key_uses_the_client_address(remote_addr, real_ip, expected):
+    """Test that X-Real-IP is only trusted from the proxy."""
+    headers = {"HTTP_X_REAL_IP": real_ip} if real_ip else {}
+    request = RequestFactory().post("/graphql", REMOTE_ADDR=remote_addr, **headers)
+
+    assert GraphQLView().get_budget_key(request) == expected
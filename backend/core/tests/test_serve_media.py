@@ -0,0 +1,149 @@
+import os
+import pytest
+from django.test.client import Client
+from django.utils.http import http_date
+from core.media import parse_range
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_file(settings, tmp_path, store):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX = ""
+    directory = tmp_path / "product_images" / str(store.pk)
+    directory.mkdir(parents=True)
+    path = directory / "photo.png"
+    path.write_bytes(CONTENT)
+    os.utime(path, (1700000000, 1700000000))
+    return f"product_images/{store.pk}/photo.png"
+
+
+@pytest.fixture
+def client():
+    return Client(SERVER_NAME="core.nour.com")
+
+
+def get_body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_serve_media_with_validators(client, media_file):
+    """Test that files are sent with a strong ETag, Last-Modified and cache headers."""
+    response = client.get(f"/media/{media_file}")
+
+    assert response.status_code == 200
+    assert get_body(response) == CONTENT
+    assert response["Content-Type"] == "image/png"
+    assert response["ETag"] == f'"{1700000000:x}-{len(CONTENT):x}"'
+    assert response["Last-Modified"] == http_date(1700000000)
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["X-Content-Type-Options"] == "nosniff"
+    assert "public" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_serve_media_not_modified(client, media_file):
+    etag = client.get(f"/media/{media_file}")["ETag"]
+
+    assert client.get(
+        f"/media/{media_file}", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(
+        f"/media/{media_file}", HTTP_IF_MODIFIED_SINCE=http_date(1700000000)).status_code == 304
+    response = client.get(f"/media/{media_file}", HTTP_IF_NONE_MATCH='"other"')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_serve_media_byte_ranges(client, media_file):
+    """Test single ranges, suffix ranges, unsatisfiable ranges and If-Range."""
+    response = client.get(f"/media/{media_file}", HTTP_RANGE="bytes=10-19")
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response["Content-Length"] == "10"
+    assert get_body(response) == CONTENT[10:20]
+
+    response = client.get(f"/media/{media_file}", HTTP_RANGE="bytes=-5")
+    assert get_body(response) == CONTENT[-5:]
+
+    response = client.get(f"/media/{media_file}", HTTP_RANGE=f"bytes={len(CONTENT)}-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+    response = client.get(
+        f"/media/{media_file}", HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+    assert response.status_code == 200
+    assert get_body(response) == CONTENT
+
+
+@pytest.mark.django_db
+def test_serve_media_with_accel_redirect(settings, client, media_file):
+    """Test that nginx is asked to send the file in production."""
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+    response = client.get(f"/media/{media_file}")
+
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == f"/protected-media/{media_file}"
+    assert response.content == b""
+    assert response["ETag"]
+    assert response["X-Content-Type-Options"] == "nosniff"
+    assert client.get(
+        f"/media/{media_file}", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db
+def test_serve_media_access_check(settings, client, media_file, store, tmp_path):
+    """Test that hidden files, other directories and deleted stores are not served."""
+    (tmp_path / "exports").mkdir()
+    (tmp_path / "exports" / "catalog.csv").write_text("secret")
+    (tmp_path / "product_images" / ".hidden").write_text("secret")
+
+    for path in ("exports/catalog.csv", "product_images/.hidden",
+                 "product_images/../exports/catalog.csv", f"product_images/{store.pk}"):
+        assert client.get(f"/media/{path}").status_code == 404
+    assert client.post(f"/media/{media_file}").status_code == 405
+
+    store.delete()
+    assert client.get(f"/media/{media_file}").status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", [
+    "logo/shop.png",  # Info.logo
+    "logo.png",  # default of Info.logo
+    "assets/images/blog.jpg",  # default of the blog images
+])
+def test_serve_media_of_model_defaults(client, media_file, tmp_path, path):
+    """Test that the files the models point to outside product images are served."""
+    (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+    (tmp_path / path).write_bytes(CONTENT)
+    (tmp_path / "other.png").write_bytes(CONTENT)
+
+    response = client.get(f"/media/{path}")
+
+    assert response.status_code == 200
+    assert get_body(response) == CONTENT
+    assert client.get("/media/other.png").status_code == 404
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-0", (0, 0)),
+    ("bytes=5-", (5, 99)),
+    ("bytes=90-200", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=0-1,5-6", None),
+    ("bytes=9-3", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
@@ -0,0 +1,86 @@
+"""Encoder of the BlurHash image placeholder format (https://blurha.sh)."""
+import math
+
+BASE83_CHARACTERS = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+# Images are encoded from a copy this size; the placeholder is blurry anyway.
+SAMPLE_SIZE = 32
+
+
+def encode_base83(value, length):
+    return "".join(
+        BASE83_CHARACTERS[value // 83 ** (length - position) % 83]
+        for position in range(1, length + 1)
+    )
+
+
+def srgb_to_linear(value):
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return round(value * 12.92 * 255)
+    return round((1.055 * value ** (1 / 2.4) - 0.055) * 255)
+
+
+def sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode_blurhash(picture, x_components=4, y_components=3):
+    """
+    Return the BlurHash of a Pillow image.
+
+    Uses `x_components` by `y_components` cosine components, between 1 and 9
+    each; the default gives a 28 character string.
+    """
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError("BlurHash components must be between 1 and 9.")
+    picture = picture.convert("RGB")
+    picture.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+    width, height = picture.size
+    pixels = [tuple(srgb_to_linear(channel) for channel in pixel) for pixel in picture.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == j == 0 else 2
+            red = green = blue = 0.0
+            for y in range(height):
+                y_basis = math.cos(math.pi * j * y / height)
+                row = y * width
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * y_basis
+                    pixel = pixels[row + x]
+                    red += basis * pixel[0]
+                    green += basis * pixel[1]
+                    blue += basis * pixel[2]
+            scale = 1 / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+
+    dc, ac = factors[0], factors[1:]
+    blurhash = encode_base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_maximum = max(abs(channel) for factor in ac for channel in factor)
+        quantised_maximum = max(0, min(82, math.floor(actual_maximum * 166 - 0.5)))
+        maximum = (quantised_maximum + 1) / 166
+        blurhash += encode_base83(quantised_maximum, 1)
+    else:
+        maximum = 1
+        blurhash += encode_base83(0, 1)
+
+    red, green, blue = (linear_to_srgb(channel) for channel in dc)
+    blurhash += encode_base83((red << 16) + (green << 8) + blue, 4)
+    for factor in ac:
+        red, green, blue = (
+            max(0, min(18, math.floor(sign_pow(channel / maximum, 0.5) * 9 + 9.5)))
+            for channel in factor
+        )
+        blurhash += encode_base83(red * 19 * 19 + green * 19 + blue, 2)
+    return blurhash
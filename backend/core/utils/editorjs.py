@@ -1,6 +1,6 @@
 import re
 import warnings
-from typing import Literal, Union, overload
+from typing import Literal, Optional, Union, overload
 
 from django.utils.html import strip_tags
 from urllib3.util import parse_url
@@ -62,6 +62,35 @@ def clean_editor_js(definitions, *, to_string=False) -> Union[dict, str, None]:
     return " ".join(plain_text_list) if to_string else definitions
 
 
+def clean_editor_js_with_plaintext(definitions) -> tuple[Optional[dict], str]:
+    """Sanitize EditorJS definitions and extract their plain text in one pass.
+
+    Return the result of `clean_editor_js(definitions)` along with the one of
+    `clean_editor_js(definitions, to_string=True)`, walking the blocks once.
+    """
+    if definitions is None:
+        return definitions, ""
+
+    blocks = definitions.get("blocks")
+
+    if not blocks or not isinstance(blocks, list):
+        return definitions, ""
+
+    plain_text_list: list[str] = []
+
+    for index, block in enumerate(blocks):
+        data = block.get("data")
+        if not data or not isinstance(data, dict):
+            continue
+
+        clean_func = ITEM_TYPE_TO_CLEAN_FUNC_MAP.get(block["type"], clean_other_items)
+        # The text is read before the block is rewritten, as with `to_string`.
+        clean_func(blocks, block, plain_text_list, True, index)
+        clean_func(blocks, block, plain_text_list, False, index)
+
+    return definitions, " ".join(plain_text_list)
+
+
 def clean_list_item(blocks, block, plain_text_list, to_string, index):
     for item_index, item in enumerate(block["data"]["items"]):
         if not item:
@@ -0,0 +1,51 @@
+import pytest
+from PIL import Image as PILImage
+from core.utils.blurhash import encode_base83, encode_blurhash
+
+
+def test_encode_base83():
+    assert encode_base83(0, 2) == "00"
+    assert encode_base83(82, 1) == "~"
+    assert encode_base83(83 * 3 + 1, 2) == "31"
+
+
+def test_encode_blurhash_of_a_plain_color():
+    """Test that a plain image is encoded with its color as the average."""
+    picture = PILImage.new("RGB", (50, 40), (255, 0, 0))
+
+    blurhash = encode_blurhash(picture)
+
+    assert len(blurhash) == 28
+    assert blurhash[0] == encode_base83(3 + 2 * 9, 1)
+    assert blurhash[2:6] == encode_base83(0xFF0000, 4)
+
+
+def test_encode_blurhash_of_a_gradient():
+    """Test the length for other component counts and that AC terms carry detail."""
+    picture = PILImage.linear_gradient("L").convert("RGB")
+
+    assert len(encode_blurhash(picture, 1, 1)) == 6
+    blurhash = encode_blurhash(picture, 3, 4)
+    assert len(blurhash) == 4 + 2 * 12
+    assert blurhash[1] != "0"
+
+
+@pytest.mark.parametrize("components, expected", [
+    ((4, 3), "L.GR[GOLAe-DxeSRb0sqQwjJoLaO"),
+    ((3, 4), "T.GR[GOLAexeSRb0QwjJoLrgjeSh"),
+])
+def test_encode_blurhash_matches_the_reference_encoder(components, expected):
+    """Test against hashes of the reference encoder for an image under the sample size."""
+    picture = PILImage.new("RGB", (8, 6))
+    picture.putdata([
+        ((x * 37 + y * 11) % 256, (x * 5 + y * 71) % 256, (255 - x * 23 - y * 9) % 256)
+        for y in range(6) for x in range(8)
+    ])
+
+    assert encode_blurhash(picture, *components) == expected
+
+
+@pytest.mark.parametrize("components", [(0, 3), (4, 10)])
+def test_encode_blurhash_rejects_invalid_components(components):
+    with pytest.raises(ValueError):
+        encode_blurhash(PILImage.new("RGB", (4, 4)), *components)
@@ -1,4 +1,5 @@
-from ..editorjs import clean_editor_js
+import copy
+from ..editorjs import clean_editor_js, clean_editor_js_with_plaintext
 import pytest
 from django.utils.html import strip_tags
 
@@ -68,3 +69,28 @@ def test_clean_editor_js_no_data():
 
     # then
     assert result == ""
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        {},
+        {"blocks": []},
+        {
+            "blocks": [
+                {"data": {"text": "Hello, <b>world!</b>"}, "type": "paragraph"},
+                {"data": {"items": ["one", "<i>two</i>"]}, "type": "list"},
+                {"data": {"text": '<a href="javascript:alert(1)">x</a>'}, "type": "paragraph"},
+                {"data": {}, "type": "paragraph"},
+            ]
+        },
+    ],
+)
+def test_clean_editor_js_with_plaintext(data):
+    # when
+    result, text = clean_editor_js_with_plaintext(copy.deepcopy(data))
+
+    # then
+    assert result == clean_editor_js(copy.deepcopy(data))
+    assert text == clean_editor_js(copy.deepcopy(data), to_string=True)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from graphql import GraphQLError
 from stores.models import StaffMember, Store
 
@@ -21,3 +22,16 @@ def check_user_store_permission(user, store):
             "You are not authorized to access this store.",
             extensions={"code": "PERMISSION_DENIED", "status": 403}
         )
+
+
+def get_client_ip(request):
+    """
+    Return the address of the client that sent `request`.
+
+    Behind nginx, REMOTE_ADDR is the proxy itself; the X-Real-IP header it
+    sets is only trusted on requests coming from `TRUSTED_PROXY_IPS`.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR")
+    if remote_addr in settings.TRUSTED_PROXY_IPS:
+        return request.META.get("HTTP_X_REAL_IP") or remote_addr
+    return remote_addr
@@ -1,10 +1,19 @@
 from rest_framework import viewsets
 from .models import Info
 from .serializer import InfoSerializer
-from django.http import JsonResponse
+import mimetypes
+import os
+from urllib.parse import quote
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
 from django.core.files.storage import default_storage
-import os
+from .files import save_content_addressed
+from .media import get_etag, get_media_file, parse_range, read_range
 
 class InfoViewSet(viewsets.ModelViewSet):
     queryset = Info.objects.all()
@@ -15,8 +24,66 @@ class InfoViewSet(viewsets.ModelViewSet):
 def custom_upload_file(request):
     if request.method == 'POST' and request.FILES.get('upload'):
         file = request.FILES['upload']
-        subfolder = 'blog/posts/%y/%m/%d'
-        file_name = default_storage.save(os.path.join(subfolder, file.name), file)
+        subfolder = 'blog/posts'
+        file_name = save_content_addressed(default_storage, subfolder, file)
         file_url = default_storage.url(file_name)
         return JsonResponse({'url': file_url})
     return JsonResponse({'error': 'Invalid request'}, status=400)
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file of `MEDIA_ROOT` after checking it may be served.
+
+    Answers conditional requests with 304 and single byte ranges with 206.
+    With `MEDIA_ACCEL_REDIRECT_PREFIX` set, nginx sends the file instead,
+    from the internal location of that prefix.
+    """
+    full_path = get_media_file(path)
+    if full_path is None:
+        raise Http404("Media file not found.")
+    stat = os.stat(full_path)
+    etag = get_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = media_file_response(request, full_path, path, stat, etag, last_modified)
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    # Uploaded files must not be sniffed into HTML or scripts.
+    response["X-Content-Type-Options"] = "nosniff"
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def media_file_response(request, full_path, path, stat, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        # nginx answers range requests of the internal location itself.
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+        return response
+
+    size = stat.st_size
+    if_range = request.headers.get("If-Range")
+    try:
+        byte_range = None
+        if if_range is None or if_range in (etag, last_modified):
+            byte_range = parse_range(request.headers.get("Range"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(open(full_path, "rb"), start, end),
+            status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['store', 'created_at', 'id'], name='customer_store_created_idx'),
+        ),
+    ]
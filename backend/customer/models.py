@@ -57,3 +57,10 @@ class Customer(models.Model):
 
     def __str__(self):
         return self.first_name + " " + self.last_name
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['store', 'created_at', 'id'], name='customer_store_created_idx'
+            ),
+        ]
@@ -1,5 +1,6 @@
 import graphene
-from graphene_django.filter import DjangoFilterConnectionField
+from core.fields import KeysetConnectionField
+from core.optimizer import optimize_queryset
 from .types import CustomerNode
 from graphql import GraphQLError
 from core.utils.utils import get_store_or_error, check_user_store_permission
@@ -7,13 +8,13 @@ from ..models import Customer
 
 
 class Query(graphene.ObjectType):
-    customer_list_admin = DjangoFilterConnectionField(
+    customer_list_admin = KeysetConnectionField(
         CustomerNode, default_domain=graphene.String(required=True))
 
     def resolve_customer_list_admin(self, info, default_domain, **kwargs):
         user = info.context.user
         store = get_store_or_error(default_domain, user)
-        return store.customers.all()
+        return optimize_queryset(store.customers.all(), info)
 
     # customer details
     customer_details = graphene.Field(
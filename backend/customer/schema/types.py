@@ -2,6 +2,7 @@ from ..models import Address, Customer
 import graphene
 from graphene_django import DjangoObjectType
 from django_countries.graphql.types import Country
+from core.fields import CountableConnection
 
 
 class AddressType(DjangoObjectType):
@@ -16,10 +17,15 @@ class AddressType(DjangoObjectType):
 class CustomerNode(DjangoObjectType):
     customer_id = graphene.Int()
     full_name = graphene.String()
+    optimizer_hints = {
+        "customer_id": {"only": ["id"]},
+        "full_name": {"only": ["first_name", "last_name"]},
+    }
 
     class Meta:
         model = Customer
         interfaces = (graphene.relay.Node,)
+        connection_class = CountableConnection
         exclude = ["store",]
         filter_fields = ["updated_at", "created_at",]
 
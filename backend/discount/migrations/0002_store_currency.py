@@ -0,0 +1,48 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def set_store_currency(apps, schema_editor):
+    """Copy the currency code of the store onto vouchers and discounts."""
+    Store = apps.get_model('stores', 'Store')
+    Voucher = apps.get_model('discount', 'Voucher')
+    OrderDiscount = apps.get_model('discount', 'OrderDiscount')
+    OrderLineDiscount = apps.get_model('discount', 'OrderLineDiscount')
+
+    def store_currency(**lookup):
+        return Coalesce(
+            Subquery(Store.objects.filter(**lookup).values('currency_code')[:1]), Value(''))
+
+    Voucher.objects.update(currency=store_currency(vouchers=OuterRef('pk')))
+    OrderDiscount.objects.update(currency=store_currency(orders=OuterRef('order_id')))
+    OrderLineDiscount.objects.update(
+        currency=store_currency(orders__lines=OuterRef('line_id')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discount', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderdiscount',
+            name='currency',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='orderlinediscount',
+            name='currency',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='voucher',
+            name='currency',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.RunPython(set_store_currency, migrations.RunPython.noop),
+    ]
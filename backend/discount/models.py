@@ -40,7 +40,11 @@ class Voucher(models.Model):
         max_digits=settings.DEFAULT_MAX_DIGITS,
         decimal_places=settings.DEFAULT_DECIMAL_PLACES,
     )
-    discount = MoneyField(amount_field="discount_value", currency_field="get_currency")
+    discount = MoneyField(amount_field="discount_value", currency_field="currency")
+    # currency of the store, kept in sync when the store's changes
+    currency = models.CharField(
+        max_length=settings.DEFAULT_CURRENCY_CODE_LENGTH, blank=True, editable=False
+    )
     min_spent_amount = models.DecimalField(
         max_digits=settings.DEFAULT_MAX_DIGITS,
         decimal_places=settings.DEFAULT_DECIMAL_PLACES,
@@ -48,7 +52,7 @@ class Voucher(models.Model):
         null=True,
     )
     min_spent = MoneyField(
-        amount_field="min_spent_amount", currency_field="get_currency"
+        amount_field="min_spent_amount", currency_field="currency"
     )
     # not mandatory fields, usage depends on type
     countries = CountryField(multiple=True, blank=True)
@@ -67,10 +71,15 @@ class Voucher(models.Model):
         code_instance = self.codes.last()
         return code_instance.code if code_instance else None
 
+    def save(self, *args, **kwargs):
+        if not self.currency:
+            # pylint: disable=no-member
+            self.currency = self.store.currency_code
+        return super().save(*args, **kwargs)
+
     @property
     def get_currency(self):
-        # pylint: disable=no-member
-        return self.store.currency_code
+        return self.currency
 
     def get_discount(self):
         if self.discount_value_type == DiscountValueType.FIXED:
@@ -115,7 +124,7 @@ class BaseDiscount(models.Model):
         decimal_places=settings.DEFAULT_DECIMAL_PLACES,
         default=Decimal("0.0"),
     )
-    amount = MoneyField(amount_field="amount_value", currency_field="get_currency")
+    amount = MoneyField(amount_field="amount_value", currency_field="currency")
     name = models.CharField(max_length=255, null=True, blank=True)
     reason = models.TextField(blank=True, null=True)
     voucher = models.ForeignKey(
@@ -124,6 +133,10 @@ class BaseDiscount(models.Model):
     voucher_code = models.CharField(
         max_length=255, null=True, blank=True, db_index=False
     )
+    # currency of the store, kept in sync when the store's changes
+    currency = models.CharField(
+        max_length=settings.DEFAULT_CURRENCY_CODE_LENGTH, blank=True, editable=False
+    )
     historical_currency = models.CharField(max_length=3, blank=True)
     historical_value = models.DecimalField(
         max_digits=settings.DEFAULT_MAX_DIGITS,
@@ -133,6 +146,8 @@ class BaseDiscount(models.Model):
     )
 
     def save(self, *args, **kwargs):
+        if not self.currency:
+            self.currency = self.get_store_currency() or ""
         # handle historical values
         if self.historical_value is not None:
             self.historical_currency = self.get_currency
@@ -143,15 +158,18 @@ class BaseDiscount(models.Model):
     class Meta:
         abstract = True
 
-    @property
-    def get_currency(self):
+    def get_store_currency(self):
         if hasattr(self, "order"):
-            return self.order.store.currency_code
+            return self.order.store.currency_code if self.order_id else None
         elif hasattr(self, "line"):
-            return self.line.order.store.currency_code
+            return self.line.order.store.currency_code if self.line_id else None
         else:
             return None
 
+    @property
+    def get_currency(self):
+        return self.currency or None
+
 
 class OrderDiscount(BaseDiscount):
     order = models.ForeignKey(
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from stores.models import Store
+from .models import OrderDiscount, OrderLineDiscount, Voucher
+
+
+@receiver(post_save, sender=Store)
+def sync_discount_currency(sender, instance, created, **kwargs):
+    if created or not instance.currency_code_changed:
+        return
+    currency = instance.currency_code
+    for queryset in (
+        Voucher.objects.filter(store=instance),
+        OrderDiscount.objects.filter(order__store=instance),
+        OrderLineDiscount.objects.filter(line__order__store=instance),
+    ):
+        queryset.exclude(currency=currency).update(currency=currency)
@@ -0,0 +1,120 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from core.graphql.cache import get_field_cache_slot
+
+CATALOG_VERSION_KEY = "catalog:version:{}"
+
+_batched_invalidations = threading.local()
+
+
+def get_catalog_cache():
+    """
+    Return the cache backend holding catalog reads (see `CACHES`).
+
+    It also holds the catalog versions, so it must be shared by every process
+    for `invalidate_catalog` to reach them all.
+    """
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _new_version():
+    return uuid4().hex
+
+
+def get_catalog_version(store_id):
+    """
+    Return the version token of a store's catalog.
+
+    Like permission versions, a missing token is replaced by a fresh one, so
+    an evicted version can never match entries cached before a bump.
+    """
+    cache = get_catalog_cache()
+    key = CATALOG_VERSION_KEY.format(store_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_catalog_version(store_id):
+    """Invalidate every cached catalog read of a store."""
+    get_catalog_cache().set(
+        CATALOG_VERSION_KEY.format(store_id), _new_version(), None)
+
+
+def invalidate_catalog(store_id):
+    """
+    Bump the catalog version of a store now and once the transaction commits.
+
+    The first bump lets the writer read its own changes; the second discards
+    entries that concurrent requests cached from the not yet committed data.
+    """
+    if store_id is None:
+        return
+    bump_catalog_version(store_id)
+    transaction.on_commit(lambda: bump_catalog_version(store_id))
+
+
+def is_catalog_invalidation_batched(store_id):
+    """Return whether a batch invalidates the catalog of `store_id` when it ends."""
+    return store_id is not None and store_id in getattr(_batched_invalidations, "store_ids", ())
+
+
+def get_batched_store_lookups():
+    """
+    Return a dict in which model signals memoize the store of a parent object
+    while a batch runs, or None when none does.
+    """
+    return getattr(_batched_invalidations, "store_lookups", None)
+
+
+@contextmanager
+def batch_catalog_invalidation(store_id):
+    """
+    Invalidate the catalog of a store once for every change made in the block.
+
+    Model signals skip their own invalidation of that store while the block
+    runs, and look up the store of the instances of a parent object once, so
+    bulk writes that delete or save many catalog objects stay at a constant
+    number of queries. Changes to other stores are invalidated as usual.
+    """
+    store_ids = getattr(_batched_invalidations, "store_ids", None)
+    if not store_ids:
+        store_ids = _batched_invalidations.store_ids = Counter()
+        _batched_invalidations.store_lookups = {}
+    store_ids[store_id] += 1
+    try:
+        yield
+    finally:
+        store_ids[store_id] -= 1
+        if not store_ids[store_id]:
+            del store_ids[store_id]
+        if not store_ids:
+            _batched_invalidations.store_lookups = None
+    invalidate_catalog(store_id)
+
+
+def cache_catalog_read(info, store):
+    """
+    Serve the root field being resolved from the catalog cache of `store`.
+
+    Call it once the permission checks have passed. Raises `CacheHit` when
+    the field is cached for the current catalog version; otherwise the
+    completed result is stored once the field has been resolved. Does
+    nothing outside of a root query field.
+    """
+    slot = get_field_cache_slot(info)
+    if slot is None:
+        return
+    slot.read_through(
+        get_catalog_cache(),
+        f"catalog:{store.pk}:{get_catalog_version(store.pk)}",
+        timeout=getattr(settings, "CATALOG_CACHE_TIMEOUT", 600),
+        lock_timeout=getattr(settings, "CATALOG_CACHE_LOCK_TIMEOUT", 5),
+    )
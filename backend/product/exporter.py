@@ -0,0 +1,121 @@
+"""
+Streaming export of a store's catalog as CSV or JSON Lines.
+
+The export writes one row per variant with the columns read by
+`product.importer`, so an exported file can be imported into another
+store, plus the ids of the product and variant and the variant image URLs.
+"""
+import csv
+import json
+from django.conf import settings
+from django.db.models import Prefetch
+from core.utils.editorjs import clean_editor_js
+from .importer import MAX_IMPORT_OPTIONS
+from .models import OptionValue, ProductVariant
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+FIELD_COLUMNS = [
+    "product_id", "variant_id", "handle", "title", "description", "status",
+    "seo_title", "seo_description", "sku", "price", "compare_at_price", "stock",
+]
+OPTION_COLUMNS = [
+    column
+    for index in range(1, MAX_IMPORT_OPTIONS + 1)
+    for column in (f"option{index}_name", f"option{index}_value")
+]
+CSV_COLUMNS = FIELD_COLUMNS + OPTION_COLUMNS + ["collections", "image_urls"]
+
+
+class Echo:
+    """A file-like object that returns what is written, for `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+def get_export_queryset(store):
+    """
+    Return the variants of `store` with everything a row needs.
+
+    Products and SEO are joined; option values, collections and images are
+    prefetched, which `iterator(chunk_size=...)` does once per chunk.
+    """
+    return (
+        ProductVariant.objects.filter(product__store=store)
+        .select_related("product__seo")
+        .prefetch_related(
+            Prefetch(
+                "selected_options",
+                queryset=OptionValue.objects.select_related("option").order_by("option_id"),
+            ),
+            "product__collections",
+            "images",
+        )
+        .order_by("product_id", "sort_order", "pk")
+    )
+
+
+def get_export_row(variant):
+    product = variant.product
+    seo = product.seo
+    return {
+        "product_id": product.pk,
+        "variant_id": variant.pk,
+        "handle": product.handle,
+        "title": product.title,
+        "description": product.description,
+        "description_plaintext": product.description_plaintext,
+        "status": product.status,
+        "seo_title": seo.title if seo else None,
+        "seo_description": seo.description if seo else None,
+        "sku": variant.sku,
+        "price": variant.price_amount,
+        "compare_at_price": variant.compare_at_price,
+        "stock": variant.stock,
+        "options": {
+            value.option.name: value.name for value in variant.selected_options.all()
+        },
+        "collections": [collection.handle for collection in product.collections.all()],
+        "image_urls": [image.image.url for image in variant.images.all()],
+    }
+
+
+def iter_export_rows(store, chunk_size=None):
+    """Yield the export row of every variant of `store`, one chunk in memory at a time."""
+    chunk_size = chunk_size or settings.PRODUCT_EXPORT_CHUNK_SIZE
+    for variant in get_export_queryset(store).iterator(chunk_size=chunk_size):
+        yield get_export_row(variant)
+
+
+def _csv_value(value):
+    return "" if value is None else value
+
+
+def iter_csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        values = [row[column] for column in FIELD_COLUMNS]
+        # Rows saved before the plain text column exist until the backfill runs.
+        values[FIELD_COLUMNS.index("description")] = (
+            row["description_plaintext"]
+            or clean_editor_js(row["description"], to_string=True))
+        options = list(row["options"].items())[:MAX_IMPORT_OPTIONS]
+        options += [("", "")] * (MAX_IMPORT_OPTIONS - len(options))
+        values += [value for option in options for value in option]
+        values += ["|".join(row["collections"]), "|".join(row["image_urls"])]
+        yield writer.writerow([_csv_value(value) for value in values])
+
+
+def iter_jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def export_products(store, file_format, chunk_size=None):
+    """Yield the lines of the catalog export of `store` in `file_format`."""
+    rows = iter_export_rows(store, chunk_size)
+    if file_format == "csv":
+        return iter_csv_lines(rows)
+    return iter_jsonl_lines(rows)
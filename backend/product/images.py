@@ -0,0 +1,263 @@
+"""
+Resized and WebP derivatives of uploaded product images.
+
+For every size of `PRODUCT_IMAGE_SIZES` smaller than the original, a copy
+resized to that longest edge is saved beside the original in its own format
+and as WebP, e.g. `product_images/shirt_256.jpg` and
+`product_images/shirt_256.webp`. Their names are kept in `Image.derivatives`
+as `{"256": {"original": ..., "webp": ...}}`. `Image.derivatives_status` records
+that an image was processed, even when it is smaller than every size, or
+that Pillow could not read it, so neither is attempted again.
+
+Uploads schedule the work with `schedule_image_derivatives`, which hands it
+to a pool of `PRODUCT_IMAGE_WORKERS` threads once the transaction commits;
+with no workers the derivatives are generated inline. The pool accepts at
+most `PRODUCT_IMAGE_QUEUE_SIZE` pending images and skips the others, which
+the `generate_image_derivatives` command catches up on.
+
+Uploaded files are stored once per store under their SHA-256, and their
+dimensions, size, type, dominant color and BlurHash placeholder are
+recorded on upload, see `save_product_image`.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from core.files import get_content_hash, save_content_addressed
+from PIL import Image as PILImage, ImageOps
+from core.utils.blurhash import encode_blurhash
+from .cache import invalidate_catalog
+from .models import Image
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIRECTORY = "product_images"
+ORIGINAL_FORMAT = "original"
+WEBP_FORMAT = "webp"
+# Formats Pillow can write that derivatives keep; others are saved as PNG.
+SAVE_FORMATS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+WEBP_QUALITY = 80
+IMAGE_METADATA_FIELDS = (
+    "width", "height", "byte_size", "mime_type", "dominant_color", "blurhash")
+# Longest edge of the copy the dominant color and placeholder are taken from.
+METADATA_SAMPLE_SIZE = 64
+# EXIF orientation tag, and its values that rotate the image a quarter turn.
+ORIENTATION_TAG = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending_slots = None
+
+
+def get_image_sizes():
+    return sorted(settings.PRODUCT_IMAGE_SIZES)
+
+
+def get_derivative_size(size):
+    """Return the smallest configured size covering `size`, or None for the original."""
+    if size is None:
+        return None
+    return next((candidate for candidate in get_image_sizes() if candidate >= size), None)
+
+
+def get_derivative_name(image, size, image_format):
+    """Return the stored name of a derivative, or None if it is not ready."""
+    derivative_size = get_derivative_size(size)
+    if derivative_size is None:
+        return None
+    return (image.derivatives or {}).get(str(derivative_size), {}).get(image_format)
+
+
+def get_dominant_color(picture):
+    """Return the most frequent color of a small RGB image as `#rrggbb`."""
+    quantized = picture.quantize(colors=8)
+    _, index = max(quantized.getcolors())
+    palette = quantized.getpalette()
+    return "#{:02x}{:02x}{:02x}".format(*palette[index * 3:index * 3 + 3])
+
+
+def get_image_metadata(file):
+    """
+    Return the values of `IMAGE_METADATA_FIELDS` for an image file.
+
+    Dimensions are the displayed ones, after the EXIF orientation. Raises
+    `OSError` for files Pillow cannot read, truncated ones included, and
+    `DecompressionBombError` for images over `MAX_IMAGE_PIXELS`.
+    """
+    with PILImage.open(file) as picture:
+        image_format = picture.format
+        width, height = picture.size
+        orientation = picture.getexif().get(ORIENTATION_TAG)
+        if orientation in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        # Lets JPEG decode at a fraction of the size.
+        picture.draft("RGB", (METADATA_SAMPLE_SIZE, METADATA_SAMPLE_SIZE))
+        sample = ImageOps.exif_transpose(picture).convert("RGB")
+    file.seek(0)
+    sample.thumbnail((METADATA_SAMPLE_SIZE, METADATA_SAMPLE_SIZE))
+    return {
+        "width": width,
+        "height": height,
+        "byte_size": file.size,
+        "mime_type": PILImage.MIME.get(image_format, ""),
+        "dominant_color": get_dominant_color(sample),
+        "blurhash": encode_blurhash(sample),
+    }
+
+
+def _encode(picture, save_format, **params):
+    buffer = io.BytesIO()
+    picture.save(buffer, format=save_format, **params)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_image_derivatives(image_id):
+    """
+    Generate the missing derivatives of an image and record their names.
+
+    Images of a store sharing a content hash share their file, so they share
+    the derivatives too: ones already made for another of them are reused,
+    derivatives whose content-addressed name is stored already are not
+    written again, and the result is recorded on all of them.
+    Returns the derivatives of the image, or None if it has no file.
+    """
+    image = Image.objects.filter(pk=image_id).only(
+        "pk", "store_id", "image", "content_hash", "derivatives").first()
+    if image is None or not image.image:
+        return None
+
+    if image.content_hash:
+        sharing = Image.objects.filter(store_id=image.store_id, content_hash=image.content_hash)
+    else:
+        sharing = Image.objects.filter(pk=image.pk)
+    derivatives = dict(image.derivatives or {})
+    if not derivatives and image.content_hash:
+        derivatives = dict(sharing.exclude(derivatives={}).values_list(
+            "derivatives", flat=True).order_by("pk").first() or {})
+
+    storage = image.image.storage
+    base, _ = os.path.splitext(image.image.name)
+
+    def save(name, encode):
+        if image.content_hash and storage.exists(name):
+            return name
+        return storage.save(name, encode())
+
+    try:
+        with image.image.open("rb") as file, PILImage.open(file) as original:
+            original_format = original.format
+            extension = SAVE_FORMATS.get(original_format, "png")
+            save_format = original_format if original_format in SAVE_FORMATS else "PNG"
+            original = ImageOps.exif_transpose(original)
+            for size in get_image_sizes():
+                if str(size) in derivatives or size >= max(original.size):
+                    continue
+                picture = original.copy()
+                picture.thumbnail((size, size), PILImage.LANCZOS)
+                if save_format == "JPEG" and picture.mode not in ("RGB", "L"):
+                    picture = picture.convert("RGB")
+                derivatives[str(size)] = {
+                    ORIGINAL_FORMAT: save(
+                        f"{base}_{size}.{extension}", lambda: _encode(picture, save_format)),
+                    WEBP_FORMAT: save(
+                        f"{base}_{size}.webp",
+                        lambda: _encode(picture, "WEBP", quality=WEBP_QUALITY)),
+                }
+    except (OSError, PILImage.DecompressionBombError):
+        # Unreadable files, truncated ones included: UnidentifiedImageError is an
+        # OSError. A missing file may come back, so it stays pending.
+        if image.image.storage.exists(image.image.name):
+            sharing.update(derivatives_status="FAILED")
+        raise
+
+    if sharing.exclude(derivatives=derivatives, derivatives_status="DONE").update(
+            derivatives=derivatives, derivatives_status="DONE"):
+        invalidate_catalog(image.store_id)
+    return derivatives
+
+
+def _generate_logging_errors(image_id):
+    try:
+        generate_image_derivatives(image_id)
+    except Exception:
+        logger.exception("Could not generate the derivatives of image %s", image_id)
+
+
+def _run_in_worker(image_id):
+    close_old_connections()
+    try:
+        _generate_logging_errors(image_id)
+    finally:
+        _pending_slots.release()
+        close_old_connections()
+
+
+def get_executor():
+    global _executor, _pending_slots
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PRODUCT_IMAGE_WORKERS,
+                thread_name_prefix="image-derivatives",
+            )
+            _pending_slots = threading.BoundedSemaphore(settings.PRODUCT_IMAGE_QUEUE_SIZE)
+    return _executor
+
+
+def submit_image_derivatives(image_id):
+    if not settings.PRODUCT_IMAGE_WORKERS:
+        # Runs in the on_commit of the upload request, which must not fail.
+        _generate_logging_errors(image_id)
+        return
+    executor = get_executor()
+    if not _pending_slots.acquire(blocking=False):
+        logger.warning("Image derivative queue is full, skipping image %s", image_id)
+        return
+    executor.submit(_run_in_worker, image_id)
+
+
+def schedule_image_derivatives(image):
+    """Generate the derivatives of `image` off the request, once it is committed."""
+    image_id = image.pk
+    transaction.on_commit(lambda: submit_image_derivatives(image_id))
+
+
+def save_product_image(store, file):
+    """
+    Create an image of `store` for an uploaded file.
+
+    A file the store has uploaded before is not stored again: the new image
+    reuses the file, derivatives and metadata of the existing one. While the
+    derivatives of the existing image are pending, or were skipped, the new
+    image schedules them as well; they are generated once for both.
+    """
+    content_hash = get_content_hash(file)
+    fields = ("image", "derivatives", "derivatives_status", *IMAGE_METADATA_FIELDS)
+    existing = Image.objects.filter(store=store, content_hash=content_hash).exclude(
+        image="").only(*fields).order_by("pk").first()
+    if existing is not None:
+        image = Image.objects.create(
+            store=store, image=existing.image.name, content_hash=content_hash,
+            derivatives=existing.derivatives, derivatives_status=existing.derivatives_status,
+            **{field: getattr(existing, field) for field in IMAGE_METADATA_FIELDS})
+        if existing.derivatives_status == "PENDING":
+            schedule_image_derivatives(image)
+        return image
+
+    try:
+        metadata = get_image_metadata(file)
+    except (OSError, PILImage.DecompressionBombError):
+        logger.warning("Could not read the metadata of uploaded image %s", file.name)
+        file.seek(0)
+        metadata = {}
+    image = Image(store=store, content_hash=content_hash, **metadata)
+    image.image = save_content_addressed(
+        image.image.storage, f"{IMAGE_DIRECTORY}/{store.pk}", file)
+    image.save()
+    schedule_image_derivatives(image)
+    return image
@@ -0,0 +1,486 @@
+"""
+Bulk import of products from CSV or JSON Lines files.
+
+Every row describes one variant. Consecutive rows sharing a `handle` are the
+variants of one product, whose own fields (`title`, `description`, `status`,
+`seo_title`, `seo_description` and `collections`) are read from its first
+row; a row without a handle is a product of its own. Variant fields are
+`sku`, `price`, `compare_at_price` and `stock`.
+
+CSV files name up to three options with `option1_name`/`option1_value`
+columns and separate collection handles with `|`. JSON Lines rows use an
+`options` object (`{"Size": "S"}`), a `collections` list and may pass an
+EditorJS `description`.
+"""
+import csv
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.template.defaultfilters import slugify
+from core.models import SEO
+from .cache import invalidate_catalog
+from .search import schedule_search_update
+from .models import (
+    Collection, OptionValue, Product, ProductOption, ProductVariant, get_option_fingerprint)
+from .utils import MAX_OPTION_NAME_LENGTH, MAX_OPTION_VALUES_COUNT
+
+IMPORT_FORMATS = ("csv", "jsonl")
+MAX_IMPORT_OPTIONS = 3
+SAVE_ATTEMPTS = 3
+PRODUCT_FIELDS = (
+    "handle", "title", "description", "status", "seo_title", "seo_description",
+    "sku", "price", "compare_at_price", "stock",
+)
+
+
+class RowError(Exception):
+    """A row that cannot be imported; the message is reported with its line."""
+
+
+class ImportReport:
+    """Running totals of an import, updated after every chunk."""
+
+    def __init__(self):
+        self.rows = 0
+        self.products = 0
+        self.variants = 0
+        self.chunks = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def add_error(self, line, message):
+        self.errors.append({"row": line, "message": str(message)})
+
+    def as_dict(self):
+        return {
+            "chunks": self.chunks,
+            "rows": self.rows,
+            "products": self.products,
+            "variants": self.variants,
+            "error_count": len(self.errors),
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def get_import_format(file_name, file_format=None):
+    """Return the format of an import file, by default from its extension."""
+    file_format = (file_format or os.path.splitext(file_name or "")[1].lstrip(".")).lower()
+    if file_format == "ndjson":
+        file_format = "jsonl"
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(
+            f"Unsupported import format: {file_format or 'unknown'}. "
+            f"Use one of {', '.join(IMPORT_FORMATS)}.")
+    return file_format
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def read_csv_rows(lines):
+    """Yield `(line, row)` pairs of a CSV file with a header row."""
+    reader = csv.DictReader(lines)
+    for data in reader:
+        row = {name: _text(data.get(name)) for name in PRODUCT_FIELDS}
+        row["options"] = []
+        for index in range(1, MAX_IMPORT_OPTIONS + 1):
+            name = _text(data.get(f"option{index}_name"))
+            value = _text(data.get(f"option{index}_value"))
+            if name or value:
+                row["options"].append((name, value))
+        row["collections"] = [
+            handle.strip() for handle in _text(data.get("collections")).split("|")
+            if handle.strip()
+        ]
+        yield reader.line_num, row
+
+
+def read_jsonl_rows(lines):
+    """Yield `(line, row)` pairs of a JSON Lines file; bad lines yield a `RowError`."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield line_number, RowError("Invalid JSON.")
+            continue
+        if not isinstance(data, dict):
+            yield line_number, RowError("Each line must be a JSON object.")
+            continue
+
+        row = {name: _text(data.get(name)) for name in PRODUCT_FIELDS}
+        if isinstance(data.get("description"), dict):
+            row["description"] = data["description"]
+        options = data.get("options") or {}
+        if not isinstance(options, dict):
+            yield line_number, RowError("Options must be an object of option names to values.")
+            continue
+        row["options"] = [(_text(name), _text(value)) for name, value in options.items()]
+        collections = data.get("collections") or []
+        if isinstance(collections, str):
+            collections = collections.split("|")
+        row["collections"] = [_text(handle) for handle in collections if _text(handle)]
+        yield line_number, row
+
+
+def read_rows(lines, file_format):
+    if file_format == "csv":
+        return read_csv_rows(lines)
+    return read_jsonl_rows(lines)
+
+
+def group_products(rows):
+    """Yield the rows of one product at a time, grouping consecutive handles."""
+    group, handle = [], None
+    for line, row in rows:
+        row_handle = None if isinstance(row, RowError) else row["handle"]
+        if group and not (row_handle and row_handle == handle):
+            yield group
+            group = []
+        group.append((line, row))
+        handle = row_handle
+    if group:
+        yield group
+
+
+def chunk_products(groups, chunk_size):
+    """Yield lists of products holding at least `chunk_size` rows, except the last."""
+    chunk, size = [], 0
+    for group in groups:
+        chunk.append(group)
+        size += len(group)
+        if size >= chunk_size:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def parse_decimal(value, label):
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"{label} must be a number.")
+    if not amount.is_finite():
+        raise RowError(f"{label} must be a number.")
+    if amount < 0:
+        raise RowError(f"{label} cannot be negative.")
+    try:
+        amount = amount.quantize(Decimal(1).scaleb(-settings.DEFAULT_DECIMAL_PLACES))
+    except InvalidOperation:
+        raise RowError(f"{label} is too large.")
+    if len(amount.as_tuple().digits) > settings.DEFAULT_MAX_DIGITS:
+        raise RowError(f"{label} is too large.")
+    return amount
+
+
+def parse_description(value):
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
+    return {"blocks": [{"type": "paragraph", "data": {"text": value}}]}
+
+
+class ProductDraft:
+    """The validated rows of one product, ready to be saved."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.line = rows[0][0]
+        first = rows[0][1]
+        self.title = first["title"]
+        self.base_handle = slugify(first["handle"] or self.title) or Product.default_handle
+        self.description = parse_description(first["description"])
+        self.status = first["status"].upper() or "DRAFT"
+        self.seo_title = first["seo_title"] or self.title
+        self.seo_description = first["seo_description"] or None
+        self.collections = first["collections"]
+        self.option_names = [name for name, _ in first["options"]]
+        self.variants = []
+
+    def clean(self):
+        """Validate the product fields; raise `RowError` on its first line."""
+        if not self.title:
+            raise RowError("Product title cannot be empty.")
+        if len(self.title) > Product._meta.get_field("title").max_length:
+            raise RowError("Product title is too long.")
+        if self.status not in dict(Product.STATUS):
+            raise RowError(f"Invalid status: {self.status}.")
+        if len(self.seo_title) > SEO._meta.get_field("title").max_length:
+            raise RowError("SEO title is too long.")
+        if len(self.option_names) > MAX_IMPORT_OPTIONS:
+            raise RowError(f"Cannot add more than {MAX_IMPORT_OPTIONS} options")
+        for index, name in enumerate(self.option_names):
+            if not name:
+                raise RowError("Option name cannot be empty")
+            if len(name) > MAX_OPTION_NAME_LENGTH:
+                raise RowError(
+                    f"Option name must be less than {MAX_OPTION_NAME_LENGTH} characters")
+            if name in self.option_names[:index]:
+                raise RowError(f"Duplicate option name: {name}")
+
+    def add_variant(self, line, row, seen_skus):
+        """Validate the variant fields of a row and keep them."""
+        names = [name for name, _ in row["options"]]
+        if names != self.option_names:
+            raise RowError(
+                "Options must match the first row of the product: "
+                f"{', '.join(self.option_names) or 'no options'}.")
+        values = tuple(value for _, value in row["options"])
+        for value in values:
+            if not value:
+                raise RowError("Option value name cannot be empty")
+            if len(value) > MAX_OPTION_NAME_LENGTH:
+                raise RowError(
+                    f"Option value name must be less than {MAX_OPTION_NAME_LENGTH} characters")
+        if any(variant["values"] == values for variant in self.variants):
+            raise RowError("A variant with these exact option values already exists")
+
+        sku = row["sku"] or None
+        if sku is not None:
+            if len(sku) > ProductVariant._meta.get_field("sku").max_length:
+                raise RowError("SKU is too long.")
+            if sku in seen_skus or any(variant["sku"] == sku for variant in self.variants):
+                raise RowError(f"Duplicate SKU: {sku}.")
+
+        price = parse_decimal(row["price"] or "0", "Price")
+        compare_at_price = (
+            parse_decimal(row["compare_at_price"], "Compare at price")
+            if row["compare_at_price"] else None
+        )
+        if compare_at_price and compare_at_price < price:
+            raise RowError("Compare at price must be greater than or equal to price.")
+        try:
+            stock = int(row["stock"] or 0)
+        except ValueError:
+            raise RowError("Stock must be a whole number.")
+        if stock < 0:
+            raise RowError("Stock cannot be negative.")
+
+        self.variants.append({
+            "line": line,
+            "sku": sku,
+            "price_amount": price,
+            "compare_at_price": compare_at_price,
+            "stock": stock,
+            "values": values,
+        })
+
+    def get_option_values(self):
+        """Return the distinct values of every option, in the order of the rows."""
+        values = [[] for _ in self.option_names]
+        for variant in self.variants:
+            for index, value in enumerate(variant["values"]):
+                if value not in values[index]:
+                    values[index].append(value)
+        return values
+
+
+def build_drafts(chunk, report, seen_skus):
+    """Validate a chunk of products, recording the errors of the rows that fail."""
+    drafts = []
+    for group in chunk:
+        errors = []
+        for line, row in group:
+            if isinstance(row, RowError):
+                errors.append((line, row))
+        if errors:
+            for line, error in errors:
+                report.add_error(line, error)
+            continue
+
+        draft = ProductDraft(group)
+        try:
+            draft.clean()
+        except RowError as error:
+            report.add_error(draft.line, error)
+            continue
+        for line, row in group:
+            try:
+                draft.add_variant(line, row, seen_skus)
+            except RowError as error:
+                errors.append((line, error))
+        if any(len(values) > MAX_OPTION_VALUES_COUNT for values in draft.get_option_values()):
+            errors.append((draft.line, RowError(
+                f"Maximum {MAX_OPTION_VALUES_COUNT} values are allowed per option")))
+        for line, error in errors:
+            report.add_error(line, error)
+        if not errors:
+            seen_skus.update(variant["sku"] for variant in draft.variants if variant["sku"])
+            drafts.append(draft)
+    return drafts
+
+
+def check_references(store, drafts, report):
+    """Drop drafts whose SKUs exist or whose collections do not, in two queries."""
+    skus = {variant["sku"] for draft in drafts for variant in draft.variants if variant["sku"]}
+    existing_skus = set(
+        ProductVariant.objects.filter(sku__in=skus).values_list("sku", flat=True)
+    ) if skus else set()
+    handles = {handle for draft in drafts for handle in draft.collections}
+    collection_ids = dict(
+        Collection.objects.filter(store=store, handle__in=handles).values_list("handle", "id")
+    ) if handles else {}
+
+    valid = []
+    for draft in drafts:
+        errors = [
+            (variant["line"], f"SKU {variant['sku']} already exists.")
+            for variant in draft.variants if variant["sku"] in existing_skus
+        ]
+        errors += [
+            (draft.line, f"Collection not found: {handle}.")
+            for handle in draft.collections if handle not in collection_ids
+        ]
+        for line, message in errors:
+            report.add_error(line, message)
+        if not errors:
+            draft.collection_ids = [collection_ids[handle] for handle in draft.collections]
+            valid.append(draft)
+    return valid
+
+
+def save_products(store, drafts):
+    """
+    Create the products of `drafts` with a fixed number of queries.
+
+    Handles are allocated up front and every model, including the M2M
+    through rows, is inserted with one `bulk_create`. Bulk operations do
+    not send signals, so the catalog cache of the store is invalidated here.
+    """
+    handles = Product.allocate_unique_handles(store, [draft.base_handle for draft in drafts])
+    with transaction.atomic():
+        seos = SEO.objects.bulk_create([
+            SEO(title=draft.seo_title, description=draft.seo_description)
+            for draft in drafts
+        ])
+        products = Product.objects.bulk_create([
+            Product(
+                store=store,
+                title=draft.title,
+                description=draft.description,
+                handle=handle,
+                seo=seo,
+                status=draft.status,
+            )
+            for draft, handle, seo in zip(drafts, handles, seos)
+        ])
+
+        options = ProductOption.objects.bulk_create([
+            ProductOption(product=product, name=name)
+            for draft, product in zip(drafts, products)
+            for name in draft.option_names
+        ])
+        option_iter = iter(options)
+        value_objects = []
+        value_maps = []
+        for draft in drafts:
+            value_map = {}
+            for names, option in zip(draft.get_option_values(), option_iter):
+                for name in names:
+                    value = OptionValue(option=option, name=name)
+                    value_map[(option.name, name)] = value
+                    value_objects.append(value)
+            value_maps.append(value_map)
+        OptionValue.objects.bulk_create(value_objects)
+
+        # Values are created first so each variant gets its option fingerprint.
+        selected_values = [
+            [
+                [value_map[(name, value)] for name, value in zip(draft.option_names, data["values"])]
+                for data in draft.variants
+            ]
+            for draft, value_map in zip(drafts, value_maps)
+        ]
+        variants = ProductVariant.objects.bulk_create([
+            ProductVariant(
+                product=product,
+                sort_order=index * ProductVariant.SORT_ORDER_GAP,
+                sku=variant["sku"],
+                price_amount=variant["price_amount"],
+                compare_at_price=variant["compare_at_price"],
+                stock=variant["stock"],
+                option_fingerprint=get_option_fingerprint(value.pk for value in values),
+                currency=store.currency_code,
+            )
+            for draft, product, product_values in zip(drafts, products, selected_values)
+            for index, (variant, values) in enumerate(zip(draft.variants, product_values))
+        ])
+        variant_iter = iter(variants)
+        draft_variants = []
+        for draft, product in zip(drafts, products):
+            created = [next(variant_iter) for _ in draft.variants]
+            product.first_variant = created[0]
+            draft_variants.append(created)
+        Product.objects.bulk_update(products, ["first_variant"])
+
+        SelectedOption = ProductVariant.selected_options.through
+        SelectedOption.objects.bulk_create([
+            SelectedOption(productvariant=variant, optionvalue=value)
+            for created, product_values in zip(draft_variants, selected_values)
+            for variant, values in zip(created, product_values)
+            for value in values
+        ])
+        ProductCollection = Product.collections.through
+        ProductCollection.objects.bulk_create([
+            ProductCollection(product=product, collection_id=collection_id)
+            for draft, product in zip(drafts, products)
+            for collection_id in draft.collection_ids
+        ])
+        invalidate_catalog(store.pk)
+        schedule_search_update([product.pk for product in products])
+    return products, variants
+
+
+def import_products(store, lines, file_format, chunk_size=None):
+    """
+    Import products into `store` from the lines of a CSV or JSON Lines file.
+
+    Rows are read lazily and saved in chunks of about `chunk_size` rows, one
+    transaction per chunk, so memory use does not grow with the file and a
+    failing chunk does not undo the chunks before it. Products with an
+    invalid row are skipped and their rows reported in `ImportReport.errors`.
+    Yields the report after every chunk.
+    """
+    chunk_size = chunk_size or settings.PRODUCT_IMPORT_CHUNK_SIZE
+    report = ImportReport()
+    seen_skus = set()
+    chunks = chunk_products(group_products(read_rows(lines, file_format)), chunk_size)
+    try:
+        for chunk in chunks:
+            report.chunks += 1
+            report.rows += sum(len(group) for group in chunk)
+            drafts = check_references(store, build_drafts(chunk, report, seen_skus), report)
+            if drafts:
+                for attempt in range(SAVE_ATTEMPTS):
+                    try:
+                        products, variants = save_products(store, drafts)
+                    except IntegrityError as error:
+                        # A concurrent writer took a handle or SKU: allocate again.
+                        if attempt + 1 == SAVE_ATTEMPTS:
+                            for draft in drafts:
+                                report.add_error(draft.line, f"Could not save the product: {error}")
+                    else:
+                        report.products += len(products)
+                        report.variants += len(variants)
+                        break
+            yield report
+    except (UnicodeDecodeError, csv.Error) as error:
+        report.add_error(None, f"Could not read the file: {error}")
+        yield report
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import Truncator
+from core.utils.editorjs import clean_editor_js_with_plaintext
+from product.models import DESCRIPTION_EXCERPT_LENGTH, Product
+from product.search import schedule_search_update
+
+
+class Command(BaseCommand):
+    help = "Store the plain text and excerpt of product descriptions saved before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Products updated per transaction.")
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Recompute every product, not only those without plain text.")
+
+    def handle(self, *args, **options):
+        products = Product.objects.filter(description__isnull=False)
+        if not options["all"]:
+            products = products.filter(description_plaintext="")
+        products = products.only(
+            "pk", "description", "description_plaintext", "description_excerpt").order_by("pk")
+
+        updated = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination: rows updated to the same text are not re-read.
+            batch = list(products.filter(pk__gt=last_pk)[:options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            changed = []
+            for product in batch:
+                _, text = clean_editor_js_with_plaintext(product.description)
+                excerpt = Truncator(text).chars(DESCRIPTION_EXCERPT_LENGTH)
+                # An empty text is written too, so `--all` clears stale text.
+                if (text, excerpt) != (
+                        product.description_plaintext, product.description_excerpt):
+                    product.description_plaintext = text
+                    product.description_excerpt = excerpt
+                    changed.append(product)
+            with transaction.atomic():
+                Product.objects.bulk_update(
+                    changed, ["description_plaintext", "description_excerpt"])
+                # bulk_update sends no signals.
+                schedule_search_update([product.pk for product in changed])
+            updated += len(changed)
+        self.stdout.write(f"Updated {updated} products.")
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image as PILImage
+from product.cache import invalidate_catalog
+from product.images import IMAGE_METADATA_FIELDS, get_image_metadata
+from product.models import Image
+
+
+class Command(BaseCommand):
+    help = "Record the dimensions, size, type, dominant color and placeholder of stored images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=200, help="Images updated per transaction.")
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Recompute every image, not only those without metadata.")
+
+    def handle(self, *args, **options):
+        images = Image.objects.exclude(image="")
+        if not options["all"]:
+            images = images.filter(width__isnull=True)
+        images = images.only("pk", "store_id", "image").order_by("pk")
+
+        updated = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination: unreadable images are not retried in a loop.
+            batch = list(images.filter(pk__gt=last_pk)[:options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            changed = []
+            for image in batch:
+                try:
+                    with image.image.open("rb") as file:
+                        metadata = get_image_metadata(file)
+                # Missing files, and unreadable ones: UnidentifiedImageError is an
+                # OSError. DecompressionBombError is not, and would stop the command.
+                except (OSError, PILImage.DecompressionBombError) as e:
+                    self.stderr.write(f"Image {image.pk}: {e}")
+                    continue
+                for field, value in metadata.items():
+                    setattr(image, field, value)
+                changed.append(image)
+            with transaction.atomic():
+                Image.objects.bulk_update(changed, IMAGE_METADATA_FIELDS)
+                for store_id in {image.store_id for image in changed}:
+                    invalidate_catalog(store_id)
+            updated += len(changed)
+        self.stdout.write(f"Updated {updated} images.")
@@ -0,0 +1,27 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from product.uploads import delete_upload, get_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete the chunked uploads older than PRODUCT_UPLOAD_EXPIRY and their temporary files."
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for upload in get_expired_uploads().iterator():
+            delete_upload(upload)
+            deleted += 1
+
+        # Files left by uploads whose row is gone, such as a failed deletion.
+        removed = 0
+        directory = settings.PRODUCT_UPLOAD_TEMP_DIR
+        expired_before = time.time() - settings.PRODUCT_UPLOAD_EXPIRY
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if (entry.name.endswith(".part") and entry.is_file()
+                        and entry.stat().st_mtime <= expired_before):
+                    os.remove(entry.path)
+                    removed += 1
+        self.stdout.write(f"Deleted {deleted} expired uploads and {removed} leftover files.")
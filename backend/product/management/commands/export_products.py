@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from product.exporter import EXPORT_FORMATS, export_products
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Export the catalog of a store as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domain", required=True, help="Default domain of the store.")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument(
+            "--output", help="Path of the file to write; standard output by default.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=None,
+            help="Variants read per query (PRODUCT_EXPORT_CHUNK_SIZE by default).")
+
+    def handle(self, *args, **options):
+        try:
+            store = Store.objects.get(default_domain=options["domain"])
+        except Store.DoesNotExist:
+            raise CommandError(f"Store {options['domain']} does not exist.")
+
+        lines = export_products(store, options["format"], chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
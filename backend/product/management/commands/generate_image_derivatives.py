@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from product.images import generate_image_derivatives
+from product.models import Image
+
+
+class Command(BaseCommand):
+    help = "Generate the resized and WebP copies of product images that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Images loaded per query.")
+
+    def handle(self, *args, **options):
+        # Images already processed, or unreadable, are not opened again.
+        images = Image.objects.exclude(image="").filter(
+            derivatives_status="PENDING").order_by("pk")
+
+        generated = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                images.filter(pk__gt=last_pk).values_list("pk", flat=True)[:options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            for image_id in batch:
+                try:
+                    if generate_image_derivatives(image_id):
+                        generated += 1
+                except Exception as e:
+                    self.stderr.write(f"Image {image_id}: {e}")
+        self.stdout.write(f"Generated derivatives of {generated} images.")
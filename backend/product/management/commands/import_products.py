@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from product.importer import IMPORT_FORMATS, ImportReport, get_import_format, import_products
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Import products into a store from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to the CSV or JSON Lines file.")
+        parser.add_argument("--domain", required=True, help="Default domain of the store.")
+        parser.add_argument(
+            "--format", choices=IMPORT_FORMATS,
+            help="File format; guessed from the file extension by default.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=None,
+            help="Rows saved per transaction (PRODUCT_IMPORT_CHUNK_SIZE by default).")
+
+    def handle(self, *args, **options):
+        try:
+            store = Store.objects.get(default_domain=options["domain"])
+        except Store.DoesNotExist:
+            raise CommandError(f"Store {options['domain']} does not exist.")
+        try:
+            file_format = get_import_format(options["file"], options["format"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = ImportReport()
+        reported = 0
+        with open(options["file"], encoding="utf-8-sig", newline="") as import_file:
+            for report in import_products(
+                    store, import_file, file_format, chunk_size=options["chunk_size"]):
+                for error in report.errors[reported:]:
+                    self.stderr.write(f"row {error['row']}: {error['message']}")
+                reported = len(report.errors)
+                self.stdout.write(
+                    f"chunk {report.chunks}: {report.rows} rows, "
+                    f"{report.products} products, {report.variants} variants, "
+                    f"{report.rows_per_second:.0f} rows/s")
+
+        self.stdout.write(
+            f"imported {report.products} products and {report.variants} variants "
+            f"from {report.rows} rows in {report.elapsed:.2f}s "
+            f"({report.rows_per_second:.0f} rows/s), {len(report.errors)} errors")
@@ -0,0 +1,45 @@
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand, CommandError
+from product.models import Product
+from product.search import INDEX_BATCH_SIZE, get_search_backend, update_search_index
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index, for every store or a single one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domain", help="Default domain of the store; every store by default.")
+        parser.add_argument(
+            "--batch-size", type=int, default=INDEX_BATCH_SIZE,
+            help="Products indexed per transaction.")
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        store_id = None
+        if options["domain"]:
+            try:
+                store = Store.objects.get(default_domain=options["domain"])
+            except Store.DoesNotExist:
+                raise CommandError(f"Store {options['domain']} does not exist.")
+            products = products.filter(store=store)
+            store_id = store.pk
+
+        # The index stays in place and searchable: documents are replaced in
+        # batches, then those of deleted products are removed.
+        backend = get_search_backend()
+        with connection.cursor() as cursor:
+            backend.create(cursor)
+            indexed_ids = set(backend.get_product_ids(cursor, store_id))
+
+        batch_size = options["batch_size"]
+        product_ids = list(products.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(product_ids), batch_size):
+            with transaction.atomic():
+                update_search_index(product_ids[start:start + batch_size])
+
+        stale_ids = sorted(indexed_ids.difference(product_ids))
+        for start in range(0, len(stale_ids), batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                backend.remove(cursor, stale_ids[start:start + batch_size])
+        self.stdout.write(f"Indexed {len(product_ids)} products, removed {len(stale_ids)}.")
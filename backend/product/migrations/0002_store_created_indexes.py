@@ -0,0 +1,25 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collection',
+            index=models.Index(fields=['store', 'created_at', 'id'], name='collection_store_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['store', 'created_at', 'id'], name='image_store_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['store', 'created_at', 'id'], name='product_store_created_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+def rehandle_duplicate_collections(apps, schema_editor):
+    """
+    Give every collection sharing a (store, handle) with an older one the
+    next free numbered handle, so the constraint below can be added.
+    """
+    Collection = apps.get_model('product', 'Collection')
+    duplicates = (
+        Collection.objects.exclude(handle=None).order_by()
+        .values('store_id', 'handle').annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        store_collections = Collection.objects.filter(store_id=duplicate['store_id'])
+        taken = set(store_collections.values_list('handle', flat=True))
+        base_handle = duplicate['handle'] or 'collection'
+        num = 1
+        for collection in store_collections.filter(
+                handle=duplicate['handle']).order_by('id')[1:]:
+            while f"{base_handle}-{num}" in taken:
+                num += 1
+            collection.handle = f"{base_handle}-{num}"
+            taken.add(collection.handle)
+            collection.save(update_fields=['handle'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_store_created_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rehandle_duplicate_collections, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='collection',
+            constraint=models.UniqueConstraint(fields=('store', 'handle'), name='unique_collection_store_handle'),
+        ),
+    ]
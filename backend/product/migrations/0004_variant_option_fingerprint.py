@@ -0,0 +1,53 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:37
+
+from collections import defaultdict
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def set_option_fingerprints(apps, schema_editor):
+    """
+    Fingerprint the existing variants by their sorted option value ids.
+
+    Variants repeating the combination of an older variant of the same
+    product keep no fingerprint, so the unique constraint can be added.
+    """
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    SelectedOption = ProductVariant.selected_options.through
+    value_ids = defaultdict(list)
+    for variant_id, value_id in SelectedOption.objects.values_list(
+            'productvariant_id', 'optionvalue_id').iterator(chunk_size=BATCH_SIZE):
+        value_ids[variant_id].append(value_id)
+
+    seen = set()
+    variants = []
+    for variant in ProductVariant.objects.filter(
+            pk__in=list(value_ids)).only('pk', 'product_id').order_by('pk'):
+        fingerprint = '-'.join(str(pk) for pk in sorted(set(value_ids[variant.pk])))
+        if (variant.product_id, fingerprint) in seen:
+            continue
+        seen.add((variant.product_id, fingerprint))
+        variant.option_fingerprint = fingerprint
+        variants.append(variant)
+    ProductVariant.objects.bulk_update(variants, ['option_fingerprint'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_collection_store_handle_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productvariant',
+            name='option_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Sorted ids of the selected option values, see get_option_fingerprint', max_length=255, null=True),
+        ),
+        migrations.RunPython(set_option_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productvariant',
+            constraint=models.UniqueConstraint(fields=('product', 'option_fingerprint'), name='unique_variant_option_fingerprint'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:05
+
+from django.db import migrations
+from django.db.models import F
+
+SORT_ORDER_GAP = 1024
+
+
+def space_sort_orders(apps, schema_editor):
+    """Spread the consecutive sort orders of existing variants apart."""
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    ProductVariant.objects.filter(sort_order__isnull=False).update(
+        sort_order=F('sort_order') * SORT_ORDER_GAP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_variant_option_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(space_sort_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def set_variant_currency(apps, schema_editor):
+    """Copy the currency code of the store onto the variants of its products."""
+    Product = apps.get_model('product', 'Product')
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    ProductVariant.objects.update(currency=Coalesce(
+        Subquery(Product.objects.filter(pk=OuterRef('product_id')).values(
+            'store__currency_code')[:1]),
+        Value(''),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_variant_sort_order_gaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productvariant',
+            name='currency',
+            field=models.CharField(blank=True, editable=False, help_text="Currency code of the store, kept in sync when the store's changes", max_length=3),
+        ),
+        migrations.RunPython(set_variant_currency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create the table of the search backend of this database.
+
+    Existing products are indexed by the `rebuild_search_index` command.
+    """
+    from product.search import get_search_backend
+    with schema_editor.connection.cursor() as cursor:
+        get_search_backend(schema_editor.connection.vendor).create(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    from product.search import get_search_backend
+    with schema_editor.connection.cursor() as cursor:
+        get_search_backend(schema_editor.connection.vendor).drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_variant_currency'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.17 on 2026-10-18 16:02
+
+import core.db.fields
+import core.utils.editorjs
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='description_excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='description_plaintext',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='description',
+            field=core.db.fields.SanitizedJSONField(blank=True, excerpt_field='description_excerpt', null=True, plaintext_field='description_plaintext', plaintext_sanitizer=core.utils.editorjs.clean_editor_js_with_plaintext, sanitizer=core.utils.editorjs.clean_editor_js),
+        ),
+    ]
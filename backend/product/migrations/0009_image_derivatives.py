@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_product_description_plaintext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Stored names of the resized copies, see product.images'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.17 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the file, shared by the images reusing it', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['store', 'content_hash'], name='image_store_content_hash_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.17 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+def mark_generated_derivatives(apps, schema_editor):
+    """Mark the images that have derivatives already as processed."""
+    Image = apps.get_model('product', 'Image')
+    Image.objects.exclude(derivatives={}).update(derivatives_status='DONE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0012_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='derivatives_status',
+            field=models.CharField(choices=[('PENDING', 'PENDING'), ('DONE', 'DONE'), ('FAILED', 'FAILED')], default='PENDING', editable=False, help_text='Whether the derivatives were generated, or the file could not be read', max_length=10),
+        ),
+        migrations.RunPython(mark_generated_derivatives, migrations.RunPython.noop),
+    ]
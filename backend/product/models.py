@@ -1,4 +1,9 @@
-from django.db import models
+from functools import reduce
+from uuid import uuid4
+from operator import or_
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from accounts.models import User
 from stores.models import Store
 from django.template.defaultfilters import slugify
 from django.core.exceptions import ValidationError
@@ -8,16 +13,72 @@ from core.models import ModelWithExternalReference, SortableModel
 from django_prices.models import MoneyField
 from django.conf import settings
 from core.db.fields import SanitizedJSONField
-from core.utils.editorjs import clean_editor_js
+from core.files import CONTENT_HASH_LENGTH
+from core.utils.editorjs import clean_editor_js, clean_editor_js_with_plaintext
 
 
 class Image(models.Model):
+    DERIVATIVES_STATUS = (
+        ('PENDING', 'PENDING'),
+        ('DONE', 'DONE'),
+        ('FAILED', 'FAILED'),
+    )
     store = models.ForeignKey(
         Store, on_delete=models.CASCADE, related_name="product_images")
     image = models.ImageField(upload_to='product_images/')
     alt_text = models.CharField(max_length=255, blank=True, null=True)
+    derivatives = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="Stored names of the resized copies, see product.images")
+    derivatives_status = models.CharField(
+        max_length=10, choices=DERIVATIVES_STATUS, default="PENDING", editable=False,
+        help_text="Whether the derivatives were generated, or the file could not be read")
+    content_hash = models.CharField(
+        max_length=CONTENT_HASH_LENGTH, blank=True, editable=False,
+        help_text="SHA-256 of the file, shared by the images reusing it")
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    byte_size = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    mime_type = models.CharField(max_length=100, blank=True, editable=False)
+    dominant_color = models.CharField(
+        max_length=7, blank=True, editable=False, help_text="Hex color, e.g. #a0b1c2")
+    blurhash = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['store', 'created_at', 'id'], name='image_store_created_idx'
+            ),
+            models.Index(
+                fields=['store', 'content_hash'], name='image_store_content_hash_idx'
+            ),
+        ]
+
+
+class ChunkedUpload(models.Model):
+    """
+    An image upload received in chunks, see product.uploads.
+
+    Received bytes are appended to a temporary file until `offset` reaches
+    `length`; the finished file then becomes `image`.
+    """
+    id = models.UUIDField(primary_key=True, editable=False, unique=True, default=uuid4)
+    store = models.ForeignKey(
+        Store, on_delete=models.CASCADE, related_name="chunked_uploads")
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="chunked_uploads")
+    file_name = models.CharField(max_length=255)
+    length = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    image = models.ForeignKey(
+        Image, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def is_complete(self):
+        return self.offset == self.length
+
 
 class Video(models.Model):
     store = models.ForeignKey(
@@ -43,6 +104,16 @@ class OptionValue(models.Model):
         return f"{self.option.name} - {self.name}"
 
 
+def get_option_fingerprint(option_value_ids):
+    """
+    Return the canonical key of a combination of option values.
+
+    The key is the sorted, dash separated ids of the values, or `None` for
+    a variant without options, so variants without options are not unique.
+    """
+    return "-".join(str(pk) for pk in sorted({int(pk) for pk in option_value_ids})) or None
+
+
 class ProductVariant(SortableModel, ModelWithExternalReference):
     product = models.ForeignKey(
         "Product", on_delete=models.CASCADE, related_name="variants")
@@ -59,7 +130,7 @@ class ProductVariant(SortableModel, ModelWithExternalReference):
     )
 
     price = MoneyField(amount_field="price_amount",
-                       currency_field="get_currency")
+                       currency_field="currency")
     compare_at_price = models.DecimalField(
         max_digits=settings.DEFAULT_MAX_DIGITS,
         decimal_places=settings.DEFAULT_DECIMAL_PLACES,
@@ -69,9 +140,23 @@ class ProductVariant(SortableModel, ModelWithExternalReference):
     selected_options = models.ManyToManyField(
         OptionValue, related_name="variants", blank=True)
     stock = models.PositiveIntegerField(default=0, help_text="Available stock")
+    currency = models.CharField(
+        max_length=settings.DEFAULT_CURRENCY_CODE_LENGTH, blank=True, editable=False,
+        help_text="Currency code of the store, kept in sync when the store's changes")
+    option_fingerprint = models.CharField(
+        max_length=255, null=True, blank=True, editable=False,
+        help_text="Sorted ids of the selected option values, see get_option_fingerprint")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'option_fingerprint'],
+                name='unique_variant_option_fingerprint'
+            ),
+        ]
+
     def clean(self):
         """
         This method is used for validation before saving the model.
@@ -84,6 +169,9 @@ class ProductVariant(SortableModel, ModelWithExternalReference):
 
     def save(self, *args, **kwargs):
         self.clean()
+        if not self.currency:
+            self.currency = Product.objects.filter(pk=self.product_id).values_list(
+                "store__currency_code", flat=True).first() or ""
         super().save(*args, **kwargs)
 
     def get_ordering_queryset(self):
@@ -91,13 +179,104 @@ class ProductVariant(SortableModel, ModelWithExternalReference):
 
     @property
     def get_currency(self):
-        return self.product.store.currency_code
+        return self.currency
 
     def __str__(self):
         return f"{self.product.title} | {self.product.store.name} | {self.price.amount}"
 
 
-class Product(ModelWithExternalReference):
+HANDLE_LOOKUP_BATCH_SIZE = 100
+HANDLE_SAVE_ATTEMPTS = 5
+DESCRIPTION_EXCERPT_LENGTH = 300
+
+
+def get_taken_handles(queryset, base_handles):
+    """
+    Return the handles in `queryset` that start with any of `base_handles`.
+
+    Every handle a base could collide with is read with one `LIKE 'base%'`
+    query (one per `HANDLE_LOOKUP_BATCH_SIZE` bases), so the free suffix is
+    then picked in memory.
+    """
+    bases = sorted(set(base_handles))
+    taken = set()
+    for start in range(0, len(bases), HANDLE_LOOKUP_BATCH_SIZE):
+        lookup = reduce(or_, (
+            Q(handle__startswith=base)
+            for base in bases[start:start + HANDLE_LOOKUP_BATCH_SIZE]
+        ))
+        taken.update(queryset.filter(lookup).values_list("handle", flat=True))
+    return taken
+
+
+def pick_unique_handle(base_handle, taken):
+    unique_handle = base_handle
+    num = 1
+    while unique_handle in taken:
+        unique_handle = f"{base_handle}-{num}"
+        num += 1
+    return unique_handle
+
+
+class UniqueHandleMixin:
+    """
+    Handle allocation for models with a unique `(store, handle)` constraint.
+
+    Saving tries the slugified handle (or title) first and lets the
+    constraint reject a duplicate instead of checking beforehand. Only then
+    are the taken handles read and the next free suffix picked; concurrent
+    saves that pick the same suffix are retried the same way. A title
+    without any character slugify keeps, e.g. a non-Latin one, falls back to
+    `default_handle`.
+    """
+    handle_constraint = None
+    default_handle = None
+
+    def get_base_handle(self):
+        return slugify(self.handle or self.title) or self.default_handle
+
+    def generate_unique_handle(self, base_handle):
+        """ Helper function to generate unique handle. """
+        queryset = type(self)._default_manager.filter(
+            store_id=self.store_id).exclude(pk=self.pk)
+        return pick_unique_handle(base_handle, get_taken_handles(queryset, [base_handle]))
+
+    @classmethod
+    def allocate_unique_handles(cls, store, base_handles):
+        """
+        Return a unique handle in `store` for every base handle, for bulk creates.
+
+        Bases repeated in `base_handles` get increasing suffixes.
+        """
+        taken = get_taken_handles(cls._default_manager.filter(store=store), base_handles)
+        handles = []
+        for base_handle in base_handles:
+            handle = pick_unique_handle(base_handle, taken)
+            taken.add(handle)
+            handles.append(handle)
+        return handles
+
+    def is_handle_conflict(self, error):
+        message = str(error)
+        return (
+            self.handle_constraint in message
+            or f"{self._meta.db_table}.handle" in message
+        )
+
+    def save_with_unique_handle(self, save, *args, **kwargs):
+        base_handle = self.get_base_handle()
+        self.handle = base_handle
+        for attempt in range(HANDLE_SAVE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return save(*args, **kwargs)
+            except IntegrityError as error:
+                if attempt + 1 == HANDLE_SAVE_ATTEMPTS or not self.is_handle_conflict(error):
+                    raise
+                self.handle = self.generate_unique_handle(base_handle)
+
+
+class Product(UniqueHandleMixin, ModelWithExternalReference):
     STATUS = (
         ('ACTIVE', 'ACTIVE'),
         ('DRAFT', 'DRAFT'),
@@ -106,7 +285,13 @@ class Product(ModelWithExternalReference):
         Store, on_delete=models.CASCADE, related_name="products")
     title = models.CharField(max_length=255)
     description = SanitizedJSONField(
-        blank=True, null=True, sanitizer=clean_editor_js)
+        blank=True, null=True, sanitizer=clean_editor_js,
+        plaintext_sanitizer=clean_editor_js_with_plaintext,
+        plaintext_field="description_plaintext", excerpt_field="description_excerpt")
+    # Written from `description` on save, see SanitizedJSONField.
+    description_plaintext = models.TextField(blank=True, default="", editable=False)
+    description_excerpt = models.CharField(
+        max_length=DESCRIPTION_EXCERPT_LENGTH, blank=True, default="", editable=False)
     handle = models.CharField(max_length=255, null=True, blank=True)
     seo = models.OneToOneField(
         SEO, on_delete=models.CASCADE, related_name="product", null=True, blank=True)
@@ -123,29 +308,19 @@ class Product(ModelWithExternalReference):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
-    def generate_unique_handle(self, base_handle):
-        """ Helper function to generate unique handle. """
-        unique_handle = base_handle
-        num = 1
-        while Product.objects.filter(store=self.store, handle=unique_handle).exclude(pk=self.pk).exists():
-            unique_handle = f"{base_handle}-{num}"
-            num += 1
-        return unique_handle
+    handle_constraint = "unique_store_handle"
+    default_handle = "product"
 
     def clean(self):
         """
         This method is used for validation before saving the model.
         """
-        if not self.handle:
-            base_handle = slugify(self.title)
-            self.handle = self.generate_unique_handle(base_handle)
-        else:
-            self.handle = self.generate_unique_handle(slugify(self.handle))
+        self.handle = self.get_base_handle()
 
     def save(self, *args, **kwargs):
         self.clean()
         try:
-            super().save(*args, **kwargs)
+            self.save_with_unique_handle(super().save, *args, **kwargs)
         except ValidationError as e:
             raise ValidationError(f"Error saving product: {e}")
 
@@ -162,9 +337,14 @@ class Product(ModelWithExternalReference):
                 fields=['store', 'handle'], name='unique_store_handle'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['store', 'created_at', 'id'], name='product_store_created_idx'
+            ),
+        ]
 
 
-class Collection(models.Model):
+class Collection(UniqueHandleMixin, models.Model):
     store = models.ForeignKey(
         Store, on_delete=models.CASCADE, related_name="collections")
     title = models.CharField(max_length=255)
@@ -176,28 +356,30 @@ class Collection(models.Model):
         SEO, on_delete=models.CASCADE, related_name="collection", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def generate_unique_handle(self, base_handle):
-        """ Helper function to generate unique handle. """
-        unique_handle = base_handle
-        num = 1
-        while Collection.objects.filter(store=self.store, handle=unique_handle).exclude(pk=self.pk).exists():
-            unique_handle = f"{base_handle}-{num}"
-            num += 1
-        return unique_handle
+    handle_constraint = "unique_collection_store_handle"
+    default_handle = "collection"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['store', 'handle'], name='unique_collection_store_handle'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['store', 'created_at', 'id'], name='collection_store_created_idx'
+            ),
+        ]
 
     def clean(self):
         """
         This method is used for validation before saving the model.
         """
-        if not self.handle:
-            base_handle = slugify(self.title)
-            self.handle = self.generate_unique_handle(base_handle)
-        else:
-            self.handle = self.generate_unique_handle(slugify(self.handle))
+        self.handle = self.get_base_handle()
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        self.save_with_unique_handle(super().save, *args, **kwargs)
 
     def __str__(self):
         return self.title
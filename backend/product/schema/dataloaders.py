@@ -0,0 +1,120 @@
+from django.db.models import Count
+from core.dataloaders import DataLoader, group_by, register_siblings
+from core.models import SEO
+from product.models import Image, OptionValue, Product, ProductOption, ProductVariant
+
+
+class SEOByIdLoader(DataLoader):
+    """Loads the SEO row of products and collections."""
+    relation_name = "seo"
+
+    def get_key(self, instance):
+        return instance.seo_id
+
+    def batch_load(self, keys):
+        seo_map = SEO.objects.in_bulk(keys)
+        return [seo_map.get(key) for key in keys]
+
+
+class ImageByIdLoader(DataLoader):
+    """Loads the representative image of collections."""
+    relation_name = "image"
+
+    def get_key(self, collection):
+        return collection.image_id
+
+    def batch_load(self, keys):
+        image_map = Image.objects.in_bulk(keys)
+        return [image_map.get(key) for key in keys]
+
+
+class FirstVariantByProductLoader(DataLoader):
+    """Loads the first variant of products."""
+    relation_name = "first_variant"
+
+    def get_key(self, product):
+        return product.first_variant_id
+
+    def batch_load(self, keys):
+        variant_map = ProductVariant.objects.in_bulk(keys)
+        register_siblings(self.context, variant_map.values())
+        return [variant_map.get(key) for key in keys]
+
+
+class ImageByProductLoader(DataLoader):
+    """Loads the first image attached to the first variant of products."""
+
+    def get_key(self, product):
+        return product.first_variant_id
+
+    def batch_load(self, keys):
+        through = ProductVariant.images.through.objects.filter(
+            productvariant_id__in=keys).select_related("image").order_by("image_id")
+        images = {}
+        for row in through:
+            images.setdefault(row.productvariant_id, row.image)
+        return [images.get(key) for key in keys]
+
+
+class OptionsByProductIdLoader(DataLoader):
+    """Loads the options of products."""
+    relation_name = "options"
+
+    def batch_load(self, keys):
+        options = ProductOption.objects.filter(
+            product_id__in=keys).order_by("pk")
+        register_siblings(self.context, options)
+        options_map = group_by(options, lambda option: option.product_id)
+        return [options_map.get(key, []) for key in keys]
+
+
+class OptionValuesByOptionIdLoader(DataLoader):
+    """Loads the values of product options."""
+    relation_name = "values"
+
+    def batch_load(self, keys):
+        values = OptionValue.objects.filter(option_id__in=keys).order_by("pk")
+        values_map = group_by(values, lambda value: value.option_id)
+        return [values_map.get(key, []) for key in keys]
+
+
+class CollectionsByProductIdLoader(DataLoader):
+    """Loads the collections that products belong to."""
+    relation_name = "collections"
+
+    def batch_load(self, keys):
+        through = Product.collections.through.objects.filter(
+            product_id__in=keys).select_related("collection").order_by("collection_id")
+        collections_map = group_by(through, lambda row: row.product_id)
+        register_siblings(self.context, [row.collection for row in through])
+        return [
+            [row.collection for row in collections_map.get(key, [])]
+            for key in keys
+        ]
+
+
+class ProductsCountByCollectionIdLoader(DataLoader):
+    """Loads the number of products in collections."""
+
+    def batch_load(self, keys):
+        counts = dict(
+            Product.collections.through.objects.filter(collection_id__in=keys)
+            .values("collection_id")
+            .annotate(count=Count("id"))
+            .values_list("collection_id", "count")
+        )
+        return [counts.get(key, 0) for key in keys]
+
+
+class SelectedOptionsByVariantIdLoader(DataLoader):
+    """Loads the option values selected by product variants."""
+    relation_name = "selected_options"
+
+    def batch_load(self, keys):
+        through = ProductVariant.selected_options.through.objects.filter(
+            productvariant_id__in=keys).select_related("optionvalue").order_by("optionvalue_id")
+        values_map = group_by(through, lambda row: row.productvariant_id)
+        return [
+            [row.optionvalue for row in values_map.get(key, [])]
+            for key in keys
+        ]
@@ -79,6 +79,30 @@ class ProductVariantInput(graphene.InputObjectType):
     option_values = graphene.List(graphene.ID)
 
 
+class AdjustmentMode(graphene.Enum):
+    """
+    How a bulk adjustment changes a numeric value.
+    """
+    SET = "SET"
+    ADD = "ADD"
+    SUBTRACT = "SUBTRACT"
+    PERCENTAGE = "PERCENTAGE"
+
+
+class VariantAdjustmentInput(graphene.InputObjectType):
+    """
+    Input type for adjusting the price or stock of many variants at once.
+    
+    Attributes:
+        mode (AdjustmentMode): Set the value, add or subtract a fixed amount, or
+            apply a signed percentage (e.g. -10 for a 10% discount).
+        value (graphene.Decimal): Amount of the adjustment. Stock adjustments
+            must use whole numbers except for percentages.
+    """
+    mode = AdjustmentMode(required=True)
+    value = graphene.Decimal(required=True)
+
+
 class ImageInput(graphene.InputObjectType):
     """
     Input type for image fields.
@@ -9,6 +9,8 @@ from .mutations import (
     CreateProduct,
     CreateProductVariant,
     PerformActionOnVariants,
+    GenerateVariants,
+    ReorderVariants,
     RemoveImagesProduct,
     UpdateProduct,
     UpdateProductVariant,
@@ -25,6 +27,8 @@ class Mutation(graphene.ObjectType):
     create_product_variant = CreateProductVariant.Field()
     update_product_variant = UpdateProductVariant.Field()
     perform_action_on_variants = PerformActionOnVariants.Field()
+    generate_variants = GenerateVariants.Field()
+    reorder_variants = ReorderVariants.Field()
     add_images_product = AddImagesProduct.Field()
     remove_images_product = RemoveImagesProduct.Field()
     create_collection = CreateCollection.Field()
@@ -7,6 +7,8 @@ from .product.remove_images_product import RemoveImagesProduct
 from .product_variant.create_product_variant import CreateProductVariant
 from .product_variant.update_product_variant import UpdateProductVariant
 from .product_variant.perform_action_on_variants import PerformActionOnVariants
+from .product_variant.generate_variants import GenerateVariants
+from .product_variant.reorder_variants import ReorderVariants
 # collection
 from .collection.create_collection import CreateCollection
 from .collection.update_collection import UpdateCollection
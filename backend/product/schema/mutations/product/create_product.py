@@ -110,6 +110,7 @@ class CreateProduct(BaseMutation):
                 compare_at_price=Decimal(
                     str(compare_at_price)) if compare_at_price is not None else None,
                 stock=stock,
+                currency=store.currency_code,
             )
 
             first_variant.save()
@@ -98,7 +98,8 @@ class CreateProductVariant(BaseMutation):
                 product=product,
                 price_amount=variant_inputs.price,
                 stock=variant_inputs.stock,
-                compare_at_price=variant_inputs.compare_at_price
+                compare_at_price=variant_inputs.compare_at_price,
+                currency=store.currency_code
             )
             variant.save()
 
@@ -0,0 +1,132 @@
+import graphene
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from product.models import Product, ProductVariant
+from product.utils import generate_variants
+from stores.enums import StorePermissions
+from ...types import ProductVariantNode
+from ...inputs import ProductVariantInput
+from graphql import GraphQLError
+from core.mutations import BaseMutation
+
+
+class GenerateVariants(BaseMutation):
+    """
+    GraphQL mutation for generating the variants of every option combination.
+
+    Creates a variant for each combination of the product's option values
+    that does not have one yet, in bulk. Existing variants are left as they are.
+    Performs authentication and authorization checks.
+
+    Attributes:
+        product_variants (graphene.List): The newly created product variants.
+
+    Arguments:
+        product_id (graphene.ID): ID of the product to generate variants for.
+        variant_inputs (ProductVariantInput): Price, compare at price and stock
+            of the new variants; option values are ignored.
+        default_domain (str): Domain of the store the product belongs to.
+    """
+    product_variants = graphene.List(ProductVariantNode)
+
+    class Arguments:
+        product_id = graphene.ID(required=True)
+        variant_inputs = ProductVariantInput()
+        default_domain = graphene.String(required=True)
+
+    @classmethod
+    def mutate(cls, root, info, product_id, default_domain, variant_inputs=None):
+        """
+        Mutation method to generate the missing variants of a product.
+
+        Args:
+            root: Root resolver.
+            info (GraphQLResolveInfo): GraphQL resolver information.
+            product_id (int): Unique identifier of the product.
+            variant_inputs (ProductVariantInput): Defaults for the new variants.
+            default_domain (str): Domain of the store.
+
+        Returns:
+            GenerateVariants: A mutation result containing the created variants.
+
+        Raises:
+            GraphQLError: If authentication fails, the input is invalid or
+                store-related checks do not pass.
+        """
+        user = cls.check_authentication(info)
+        store = cls.get_store(default_domain)
+        staff_member = cls.get_staff_member(user, store)
+        cls.check_permission(staff_member, StorePermissions.PRODUCTS_UPDATE)
+
+        try:
+            product = Product.objects.select_related("store").get(pk=product_id, store=store)
+        except Product.DoesNotExist:
+            raise GraphQLError(
+                f"Product with ID {product_id} not found in the store.",
+                extensions={
+                    "code": "PRODUCT_NOT_FOUND",
+                    "status": 404
+                }
+            )
+
+        price = compare_at_price = stock = None
+        if variant_inputs is not None:
+            price = variant_inputs.price
+            compare_at_price = variant_inputs.compare_at_price
+            stock = variant_inputs.stock
+        if price is not None and price < 0:
+            raise GraphQLError(
+                "Price cannot be negative.",
+                extensions={
+                    "code": "INVALID_PRICE",
+                    "status": 400
+                }
+            )
+        if compare_at_price is not None and compare_at_price < 0:
+            raise GraphQLError(
+                "Compare at price cannot be negative.",
+                extensions={
+                    "code": "INVALID_PRICE",
+                    "status": 400
+                }
+            )
+        try:
+            ProductVariant(price_amount=price, compare_at_price=compare_at_price).clean()
+        except ValidationError as e:
+            raise GraphQLError(
+                e.messages[0],
+                extensions={
+                    "code": "INVALID_PRICE",
+                    "status": 400
+                }
+            )
+        if stock is not None and stock < 0:
+            raise GraphQLError(
+                "Stock cannot be negative.",
+                extensions={
+                    "code": "INVALID_STOCK",
+                    "status": 400
+                }
+            )
+
+        try:
+            variants = generate_variants(product, price, compare_at_price, stock or 0)
+        except ValidationError as e:
+            raise GraphQLError(
+                e.messages[0],
+                extensions={
+                    "code": "OPTION_VALUE_ERROR",
+                    "status": 400
+                }
+            )
+        except IntegrityError:
+            # Another request created one of the combinations meanwhile.
+            raise GraphQLError(
+                "The variants were changed while generating, please try again.",
+                extensions={
+                    "code": "CONFLICT",
+                    "status": 409
+                }
+            )
+
+        return GenerateVariants(product_variants=variants)
@@ -1,8 +1,21 @@
 import graphene
+from decimal import ROUND_CEILING, Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from product.cache import invalidate_catalog
 from product.models import ProductVariant
+from product.utils import get_adjusted_value
 from stores.enums import StorePermissions
 from graphql import GraphQLError
 from core.mutations import BaseMutation
+from ...inputs import AdjustmentMode, VariantAdjustmentInput
+
+MAX_REPORTED_VARIANTS = 10
+# Largest value of a PositiveIntegerField on every supported database
+MAX_STOCK = 2147483647
+
 
 class VariantActions(graphene.Enum):
     """
@@ -10,25 +23,29 @@ class VariantActions(graphene.Enum):
     """
     DELETE = "DELETE"
     UPDATE_PRICE = "UPDATE_PRICE"
-
+    UPDATE_STOCK = "UPDATE_STOCK"
 
 
 class PerformActionOnVariants(BaseMutation):
     """
     GraphQL mutation for performing actions on product variants.
-    
-    Handles actions such as deleting variants.
+
+    Handles deleting variants and adjusting their price or stock. Price and
+    stock adjustments run as one set-based UPDATE, with the price and
+    compare-at price rules checked in the same statement.
     Performs authentication and authorization checks.
-    
+
     Attributes:
         success (graphene.Boolean): Whether the action was successful.
         message (graphene.String): A message describing the result of the action.
         errors (graphene.List): A list of error messages if the action failed.
-    
+
     Arguments:
         action (VariantActions): The action to perform.
         variant_ids (graphene.List): IDs of the variants to perform the action on.
         default_domain (graphene.String): The domain of the store.
+        adjustment (VariantAdjustmentInput): Price or stock adjustment, required
+            by UPDATE_PRICE and UPDATE_STOCK.
     """
     success = graphene.Boolean()
     message = graphene.String()
@@ -38,22 +55,24 @@ class PerformActionOnVariants(BaseMutation):
         action = VariantActions(required=True)
         variant_ids = graphene.List(graphene.ID, required=True)
         default_domain = graphene.String(required=True)
+        adjustment = VariantAdjustmentInput()
 
     @classmethod
-    def mutate(cls, root, info, action, variant_ids, default_domain):
+    def mutate(cls, root, info, action, variant_ids, default_domain, adjustment=None):
         """
         Mutation method to perform an action on product variants.
-        
+
         Args:
             root: Root resolver.
             info (GraphQLResolveInfo): GraphQL resolver information.
             action (VariantActions): The action to perform.
             variant_ids (list): IDs of the variants to perform the action on.
             default_domain (str): Domain of the store.
-        
+            adjustment (VariantAdjustmentInput): Price or stock adjustment.
+
         Returns:
             PerformActionOnVariants: A mutation result containing the outcome of the action.
-        
+
         Raises:
             GraphQLError: If authentication fails or store-related checks do not pass.
         """
@@ -70,10 +89,11 @@ class PerformActionOnVariants(BaseMutation):
         cls.check_permission(staff_member, StorePermissions.PRODUCTS_UPDATE)
 
         # Check variant existence in a single query
-        variants = ProductVariant.objects.filter(id__in=variant_ids)
+        variants = ProductVariant.objects.filter(id__in=variant_ids, product__store=store)
 
         # Verify all requested variants exist
-        if variants.count() != len(variant_ids):
+        variant_count = variants.count()
+        if variant_count != len(variant_ids):
             raise GraphQLError(
                 "Product variant not found.",
                 extensions={
@@ -86,7 +106,147 @@ class PerformActionOnVariants(BaseMutation):
             variants.delete()
             return PerformActionOnVariants(success=True, message="Product variants deleted successfully.")
 
-        # Handle other actions if needed
-        # ...
+        if action == VariantActions.UPDATE_PRICE:
+            return cls.adjust_variants(
+                store, variants, variant_count, adjustment, "price_amount",
+                settings.DEFAULT_DECIMAL_PLACES, "Price",
+                "Product variant prices updated successfully.")
+
+        if action == VariantActions.UPDATE_STOCK:
+            return cls.adjust_variants(
+                store, variants, variant_count, adjustment, "stock", None, "Stock",
+                "Product variant stock updated successfully.")
+
+        return PerformActionOnVariants(success=False, message="Action not performed.")
 
-        return PerformActionOnVariants(success=False, message="Action not performed.")
\ No newline at end of file
+    @classmethod
+    def get_max_value(cls, decimal_places):
+        """
+        Return the smallest value the adjusted field can no longer store.
+        """
+        if decimal_places is None:
+            return MAX_STOCK + 1
+        return Decimal(10) ** (settings.DEFAULT_MAX_DIGITS - decimal_places)
+
+    @classmethod
+    def clean_adjustment(cls, adjustment, decimal_places):
+        """
+        Validate an adjustment and return its mode and value.
+        """
+        if adjustment is None:
+            raise GraphQLError(
+                "An adjustment is required for this action.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+        mode = getattr(adjustment.mode, "value", adjustment.mode)
+        value = Decimal(adjustment.value)
+        message = None
+        if not value.is_finite():
+            message = "Adjustment value must be a number."
+        elif mode == AdjustmentMode.PERCENTAGE.value:
+            if value < -100:
+                message = "Percentage cannot be lower than -100."
+        elif value < 0:
+            message = "Adjustment value cannot be negative."
+        elif value >= cls.get_max_value(decimal_places):
+            message = "Adjustment value is too large."
+        elif decimal_places is None:
+            if value != value.to_integral_value():
+                message = "Stock adjustments must be whole numbers."
+            value = int(value)
+        else:
+            value = value.quantize(Decimal(1).scaleb(-decimal_places))
+
+        if message:
+            raise GraphQLError(
+                message,
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+        return mode, value
+
+    @classmethod
+    def get_too_large_filter(cls, field_name, mode, value, decimal_places):
+        """
+        Return the variants the adjustment would take past the field's digits.
+
+        The bound is compared with the current value, so the database never
+        computes a result it cannot represent.
+        """
+        max_value = cls.get_max_value(decimal_places)
+        if mode == AdjustmentMode.ADD.value:
+            return Q(**{f"{field_name}__gte": max_value - value})
+        if mode == AdjustmentMode.PERCENTAGE.value and value > 0:
+            # Results are rounded, so half a unit below the maximum overflows.
+            half_unit = Decimal("0.5").scaleb(-(decimal_places or 0))
+            bound = (max_value - half_unit) / (1 + value / 100)
+            if decimal_places is None:
+                bound = int(bound.to_integral_value(ROUND_CEILING))
+            return Q(**{f"{field_name}__gte": bound})
+        return None
+
+    @classmethod
+    def adjust_variants(cls, store, variants, variant_count, adjustment, field_name,
+                        decimal_places, label, success_message):
+        """
+        Apply an adjustment to all variants with a single UPDATE.
+
+        Variants the adjustment would leave negative, take past the digits of
+        the field, or price above their compare-at price are excluded by the
+        UPDATE itself; when any are, the statement is rolled back and those
+        variants are reported instead. Relative adjustments skip variants
+        without a value.
+        """
+        mode, value = cls.clean_adjustment(adjustment, decimal_places)
+        new_value = get_adjusted_value(field_name, mode, value, decimal_places)
+        if mode != AdjustmentMode.SET.value and ProductVariant._meta.get_field(field_name).null:
+            variants = variants.exclude(**{f"{field_name}__isnull": True})
+            variant_count = variants.count()
+
+        rules = []
+        if mode == AdjustmentMode.SUBTRACT.value:
+            rules.append((Q(**{f"{field_name}__lt": value}), f"{label} cannot be negative."))
+        too_large = cls.get_too_large_filter(field_name, mode, value, decimal_places)
+        if too_large is not None:
+            rules.append((too_large, f"{label} is too large."))
+        if field_name == "price_amount":
+            rules.append((
+                Q(compare_at_price__gt=0, compare_at_price__lt=new_value),
+                "Compare at price must be greater than or equal to price."))
+        invalid = Q()
+        for condition, _ in rules:
+            invalid |= condition
+
+        with transaction.atomic():
+            updated = variants.alias(new_value=new_value).exclude(invalid).update(**{
+                field_name: new_value,
+                "updated_at": timezone.now(),
+            })
+            if updated == variant_count:
+                invalidate_catalog(store.pk)
+                return PerformActionOnVariants(success=True, message=success_message)
+            transaction.set_rollback(True)
+
+        rejected = {}
+        for condition, error in rules:
+            rejected_ids = (
+                variants.alias(new_value=new_value).filter(condition)
+                .order_by("pk").values_list("pk", flat=True)[:MAX_REPORTED_VARIANTS]
+            )
+            for pk in rejected_ids:
+                rejected.setdefault(pk, error)
+        errors = [
+            f"Variant {pk}: {rejected[pk]}"
+            for pk in sorted(rejected)[:MAX_REPORTED_VARIANTS]
+        ]
+        return PerformActionOnVariants(
+            success=False,
+            message=f"{label} was not updated: the adjustment is invalid for "
+                    f"{variant_count - updated} variants.",
+            errors=errors,
+        )
@@ -0,0 +1,113 @@
+import graphene
+from django.db import transaction
+from product.cache import invalidate_catalog
+from product.models import Product, ProductVariant
+from stores.enums import StorePermissions
+from graphql import GraphQLError
+from core.mutations import BaseMutation
+
+
+class ReorderVariants(BaseMutation):
+    """
+    GraphQL mutation for reordering the variants of a product.
+
+    The listed variants are put in the given order within the positions they
+    already occupy, so other variants keep their place. The new order is
+    written with a single UPDATE.
+    Performs authentication and authorization checks.
+
+    Attributes:
+        success (graphene.Boolean): Whether the variants were reordered.
+
+    Arguments:
+        product_id (graphene.ID): ID of the product the variants belong to.
+        variant_ids (graphene.List): IDs of the variants in their new order.
+        default_domain (str): Domain of the store the product belongs to.
+    """
+    success = graphene.Boolean()
+
+    class Arguments:
+        product_id = graphene.ID(required=True)
+        variant_ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+        default_domain = graphene.String(required=True)
+
+    @classmethod
+    def mutate(cls, root, info, product_id, variant_ids, default_domain):
+        """
+        Mutation method to reorder the variants of a product.
+
+        Args:
+            root: Root resolver.
+            info (GraphQLResolveInfo): GraphQL resolver information.
+            product_id (int): Unique identifier of the product.
+            variant_ids (list): IDs of the variants in their new order.
+            default_domain (str): Domain of the store.
+
+        Returns:
+            ReorderVariants: A mutation result telling whether the variants were reordered.
+
+        Raises:
+            GraphQLError: If authentication fails, a variant is not found or
+                store-related checks do not pass.
+        """
+        user = cls.check_authentication(info)
+        store = cls.get_store(default_domain)
+        staff_member = cls.get_staff_member(user, store)
+        cls.check_permission(staff_member, StorePermissions.PRODUCTS_UPDATE)
+
+        # graphene.ID accepts any string; the lookups below need integers.
+        try:
+            product_id = int(product_id)
+            variant_ids = [int(variant_id) for variant_id in variant_ids]
+        except ValueError:
+            raise GraphQLError(
+                "Product and variant IDs must be integers.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+
+        try:
+            product = Product.objects.get(pk=product_id, store=store)
+        except Product.DoesNotExist:
+            raise GraphQLError(
+                f"Product with ID {product_id} not found in the store.",
+                extensions={
+                    "code": "PRODUCT_NOT_FOUND",
+                    "status": 404
+                }
+            )
+
+        if len(set(variant_ids)) != len(variant_ids):
+            raise GraphQLError(
+                "Each variant can only be listed once.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+
+        with transaction.atomic():
+            variants = product.variants.select_for_update().filter(pk__in=variant_ids)
+            positions = dict(variants.values_list("pk", "sort_order"))
+            if len(positions) != len(variant_ids):
+                raise GraphQLError(
+                    "Product variant not found.",
+                    extensions={
+                        "code": "NOT_FOUND",
+                        "status": 404
+                    }
+                )
+            slots = sorted(positions.values(), key=lambda slot: (slot is None, slot))
+            if None in slots or len(set(slots)) != len(slots):
+                # Variants without a position of their own are respaced first.
+                ProductVariant.rebalance_sort_order(product.variants.all())
+                positions = dict(variants.values_list("pk", "sort_order"))
+                slots = sorted(positions.values())
+
+            ProductVariant.set_sort_orders(product.variants.all(), {
+                variant_id: slot for variant_id, slot in zip(variant_ids, slots)
+            })
+        invalidate_catalog(store.pk)
+        return ReorderVariants(success=True)
@@ -2,7 +2,11 @@ import django_filters
 import graphene
 from graphql import GraphQLError
 from product.models import Collection, Image, Product
-from graphene_django.filter import DjangoFilterConnectionField
+from core.fields import FilterConnectionField, KeysetConnectionField
+from core.graphql.cache import CacheHit
+from core.optimizer import optimize_queryset
+from product.cache import cache_catalog_read
+from product.search import search_product_ids
 from stores.models import Store, StaffMember
 from stores.enums import StorePermissions
 from .types import ProductNode, ImageNode, CollectionNode, ProductVariantNode
@@ -53,6 +57,7 @@ class Query(graphene.ObjectType):
     Queries include:
     - all_products: Retrieve all products for a store
     - product: Retrieve a specific product by ID
+    - search_products: Full-text search of the products of a store
     - all_media_images: Retrieve all media images for a store
     - get_images_product: Retrieve images for a specific product
     - product_details_variants: Retrieve variants for a specific product
@@ -63,30 +68,37 @@ class Query(graphene.ObjectType):
     - collections_find: Find collections for a store
     """
     # Product-related queries
-    all_products = DjangoFilterConnectionField(
+    all_products = KeysetConnectionField(
         ProductNode, default_domain=graphene.String(required=True))
     product = graphene.Field(ProductNode, id=graphene.ID(required=True))
+    search_products = graphene.List(
+        graphene.NonNull(ProductNode),
+        default_domain=graphene.String(required=True),
+        query=graphene.String(required=True),
+        limit=graphene.Int(),
+        description="Products of the store matching a full-text query, best match first.",
+    )
     
     # Image-related queries
-    all_media_images = DjangoFilterConnectionField(
+    all_media_images = KeysetConnectionField(
         ImageNode, default_domain=graphene.String(required=True))
-    get_images_product = DjangoFilterConnectionField(
+    get_images_product = FilterConnectionField(
         ImageNode, product_id=graphene.ID(required=True))
     
     # Product Variant queries
-    product_details_variants = DjangoFilterConnectionField(
+    product_details_variants = FilterConnectionField(
         ProductVariantNode, product_id=graphene.ID(required=True))
     
     # Collection-related queries
-    all_collections = DjangoFilterConnectionField(
+    all_collections = KeysetConnectionField(
         CollectionNode, default_domain=graphene.String(required=True))
     collection_by_id = graphene.Field(
         CollectionNode, id=graphene.ID(required=True))
-    product_resource_collection = DjangoFilterConnectionField(
+    product_resource_collection = FilterConnectionField(
         ProductNode, collection_id=graphene.ID(required=True))
-    products_by_collection = DjangoFilterConnectionField(
+    products_by_collection = FilterConnectionField(
         ProductNode, collection_id=graphene.ID(required=True))
-    collections_find = DjangoFilterConnectionField(
+    collections_find = FilterConnectionField(
         CollectionNode, default_domain=graphene.String(required=True))
 
     def resolve_all_products(self, info, default_domain, **kwargs):
@@ -113,9 +125,10 @@ class Query(graphene.ObjectType):
             
             # Check if user has permission to view products
             if staff_member.has_permission(StorePermissions.PRODUCTS_VIEW):
+                cache_catalog_read(info, store)
                 filtered_products = ProductFilter(
                     data=kwargs, queryset=store.products.all()).qs
-                return filtered_products
+                return optimize_queryset(filtered_products, info)
             else:
                 raise GraphQLError(
                     "You do not have permission to view products.",
@@ -142,6 +155,64 @@ class Query(graphene.ObjectType):
             # Handle GraphQL-specific errors
             raise gql_error
 
+    def resolve_search_products(self, info, default_domain, query, limit=None):
+        """
+        Resolve query to search the products of a store.
+
+        Args:
+            info (GraphQLResolveInfo): GraphQL resolver information.
+            default_domain (str): Domain of the store to search.
+            query (str): Words to look for; the last one may be a prefix.
+            limit (int): Maximum number of products, at most MAX_SEARCH_RESULTS.
+
+        Returns:
+            List of Product instances ranked by relevance.
+
+        Raises:
+            GraphQLError: If user is not authenticated or lacks permissions,
+                or if the limit is below 1.
+        """
+        try:
+            user = info.context.user
+            store = Store.objects.get(default_domain=default_domain)
+            staff_member = StaffMember.objects.get(user=user, store=store)
+        except StaffMember.DoesNotExist:
+            raise GraphQLError(
+                "You are not a staff member of this store.",
+                extensions={
+                    "code": "NOT_AUTHORIZED",
+                    "status": 401
+                }
+            )
+        except Store.DoesNotExist:
+            raise GraphQLError("Store not found.",
+                               extensions={
+                                   "code": "NOT_FOUND",
+                                   "status": 404
+                               })
+        if not staff_member.has_permission(StorePermissions.PRODUCTS_VIEW):
+            raise GraphQLError(
+                "You do not have permission to view products.",
+                extensions={
+                    "code": "PERMISSION_DENIED",
+                    "status": 403
+                }
+            )
+        if limit is not None and limit < 1:
+            raise GraphQLError(
+                "The limit must be at least 1.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+
+        cache_catalog_read(info, store)
+        product_ids = search_product_ids(store, query, limit)
+        products = optimize_queryset(store.products.filter(pk__in=product_ids), info, path=())
+        products = {product.pk: product for product in products}
+        return [products[pk] for pk in product_ids if pk in products]
+
     def resolve_product(self, info, id, **kwargs):
         """
         Resolve query to retrieve a specific product by its ID.
@@ -165,6 +236,7 @@ class Query(graphene.ObjectType):
             
             # Check for products view permission
             if staff_member.has_permission(StorePermissions.PRODUCTS_VIEW):
+                cache_catalog_read(info, store)
                 return product
             else:
                 raise GraphQLError(
@@ -191,6 +263,8 @@ class Query(graphene.ObjectType):
         except GraphQLError as gql_error:
             # Handle GraphQL-specific errors
             raise gql_error
+        except CacheHit:
+            raise
         except Exception as e:
             raise GraphQLError(f"Authentication failed: {str(e)}",
                                extensions={
@@ -229,8 +303,10 @@ class Query(graphene.ObjectType):
                     }
                 )
             
-            # Exclude the first variant and order by created_at in descending order
-            variants = product.variants.all().order_by('-created_at')
+            cache_catalog_read(info, store)
+
+            # Exclude the first variant and order by the variants' sort order
+            variants = product.variants.all().order_by('sort_order', 'pk')
             if product.first_variant:
                 variants = variants.exclude(id=product.first_variant.id)
             
@@ -252,6 +328,8 @@ class Query(graphene.ObjectType):
                                    "code": "NOT_FOUND",
                                    "status": 404
                                })
+        except CacheHit:
+            raise
         except Exception as e:
             raise GraphQLError(f"Authentication failed: {str(e)}",
                                extensions={
@@ -289,6 +367,8 @@ class Query(graphene.ObjectType):
                     }
                 )
             
+            cache_catalog_read(info, store)
+
             # Retrieve images for the store, ordered by creation time
             images = Image.objects.filter(store=store).order_by('-created_at')
             return images
@@ -342,6 +422,8 @@ class Query(graphene.ObjectType):
                     }
                 )
             
+            cache_catalog_read(info, store)
+
             # Retrieve images for the product, ordered by creation time
             images = product.first_variant.images.all().order_by('-created_at')
             return images
@@ -394,9 +476,11 @@ class Query(graphene.ObjectType):
                     }
                 )
             
+            cache_catalog_read(info, store)
+
             # Retrieve collections for the store, ordered by creation time
             collections = Collection.objects.filter(store=store).order_by('-created_at')
-            return collections
+            return optimize_queryset(collections, info)
         
         except GraphQLError as gql_error:
             # Handle GraphQL-specific errors
@@ -447,6 +531,8 @@ class Query(graphene.ObjectType):
                     }
                 )
             
+            cache_catalog_read(info, store)
+
             # Return the collection
             return collection
         
@@ -499,9 +585,11 @@ class Query(graphene.ObjectType):
                     }
                 )
             
+            cache_catalog_read(info, store)
+
             # Retrieve products for the collection, ordered by creation time
             products = collection.products.all().order_by('-created_at')
-            return products
+            return optimize_queryset(products, info)
         
         except GraphQLError as gql_error:
             # Handle GraphQL-specific errors
@@ -541,6 +629,7 @@ class Query(graphene.ObjectType):
             collection = Collection.objects.get(pk=collection_id)
             store = collection.store
             if StaffMember.objects.filter(user=user, store=store).exists():
+                cache_catalog_read(info, store)
                 return ProductFilter(data=kwargs, queryset=store.products.all().order_by('-created_at')).qs
             else:
                 raise GraphQLError(
@@ -556,6 +645,8 @@ class Query(graphene.ObjectType):
                                    "code": "NOT_FOUND",
                                    "status": 404
                                })
+        except CacheHit:
+            raise
         except Exception as e:
             raise GraphQLError(f"Authentication failed: {str(e)}",
                                extensions={
@@ -595,6 +686,8 @@ class Query(graphene.ObjectType):
                     }
                 )
             
+            cache_catalog_read(info, store)
+
             # Apply collection filter for the store
             filter_collections = CollectionFilter(
                 data=kwargs, queryset=store.collections.all()).qs
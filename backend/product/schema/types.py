@@ -3,7 +3,20 @@ from graphene_django import DjangoObjectType
 from core.models import SEO
 from product.models import Collection, Image, OptionValue, Product, ProductOption, ProductVariant
 from core.schema.types.money import Money
-from core.fields import JSONString
+from core.fields import CountableConnection, JSONString
+from product.images import ORIGINAL_FORMAT, WEBP_FORMAT, get_derivative_name
+from product.utils import get_variant_by_option_values
+from .dataloaders import (
+    CollectionsByProductIdLoader,
+    FirstVariantByProductLoader,
+    ImageByIdLoader,
+    ImageByProductLoader,
+    OptionValuesByOptionIdLoader,
+    OptionsByProductIdLoader,
+    ProductsCountByCollectionIdLoader,
+    SEOByIdLoader,
+    SelectedOptionsByVariantIdLoader,
+)
 
 
 class OptionValueType(DjangoObjectType):
@@ -48,9 +61,9 @@ class ProductOptionType(DjangoObjectType):
             info: GraphQL resolver info.
         
         Returns:
-            QuerySet of OptionValue instances related to this ProductOption.
+            List of OptionValue instances related to this ProductOption.
         """
-        return self.values.all()
+        return OptionValuesByOptionIdLoader.for_context(info.context).load(self)
 
 
 class SEOType(DjangoObjectType):
@@ -85,11 +98,15 @@ class ProductVariantNode(DjangoObjectType):
     selected_options = graphene.List(OptionValueType)
     pricing = graphene.Field(
         Money, description="Price of the product variant.")
+    optimizer_hints = {
+        "variant_id": {"only": ["id"]},
+        "pricing": {"only": ["price_amount", "currency"]},
+    }
 
     class Meta:
         model = ProductVariant
         interfaces = (graphene.relay.Node,)
-        exclude = ("price",)
+        exclude = ("price", "currency", "option_fingerprint")
         filter_fields = ["created_at",]
 
     def resolve_variant_id(self, info):
@@ -112,9 +129,9 @@ class ProductVariantNode(DjangoObjectType):
             info: GraphQL resolver info.
         
         Returns:
-            QuerySet of OptionValue instances selected for this variant.
+            List of OptionValue instances selected for this variant.
         """
-        return self.selected_options.all()
+        return SelectedOptionsByVariantIdLoader.for_context(info.context).load(self)
 
     def resolve_pricing(self, info):
         """
@@ -127,26 +144,44 @@ class ProductVariantNode(DjangoObjectType):
             Money: Pricing information for the variant.
         """
         if self.price_amount is not None:
-            return Money(amount=float(self.price_amount), currency=self.get_currency)
+            return Money(amount=float(self.price_amount), currency=self.currency)
         return None
 
 
+class ImageFormat(graphene.Enum):
+    """
+    File format of an image derivative.
+    """
+    ORIGINAL = ORIGINAL_FORMAT
+    WEBP = WEBP_FORMAT
+
+
 class ImageNode(DjangoObjectType):
     """
     GraphQL node type representing an image.
     
     Converts the Image Django model to a GraphQL node type.
-    Provides information about images associated with products or collections.
+    Provides information about images associated with products or collections,
+    including their dimensions, size, type, dominant color and BlurHash
+    placeholder, recorded on upload.
     
     Attributes:
         image_id (graphene.Int): Unique identifier for the image.
+        url (graphene.String): URL of the image resized to at least `size`
+            pixels on its longest edge, in the requested format.
     """
     image_id = graphene.Int()
+    url = graphene.String(size=graphene.Int(), format=ImageFormat())
+    optimizer_hints = {
+        "image_id": {"only": ["id"]},
+        "url": {"only": ["image", "derivatives"]},
+    }
 
     class Meta:
         model = Image
         interfaces = (graphene.relay.Node, )
-        exclude = ('store',)
+        connection_class = CountableConnection
+        exclude = ('store', 'derivatives')
         filter_fields = ["created_at",]
 
     def resolve_image_id(self, info):
@@ -161,6 +196,28 @@ class ImageNode(DjangoObjectType):
         """
         return self.id
 
+    def resolve_url(self, info, size=None, format=ImageFormat.ORIGINAL):
+        """
+        Resolves the URL of the closest derivative of the image.
+        
+        Falls back to the original while the derivatives are being generated
+        or when `size` is larger than every configured size.
+        
+        Args:
+            info: GraphQL resolver info.
+            size (int): Minimum length of the longest edge, in pixels.
+            format (ImageFormat): Format of the derivative.
+        
+        Returns:
+            str: The URL of the image, or None if it has no file.
+        """
+        if not self.image:
+            return None
+        name = get_derivative_name(self, size, format.value)
+        if name is None:
+            return self.image.url
+        return self.image.storage.url(name)
+
 
 class CollectionNode(DjangoObjectType):
     """
@@ -179,11 +236,13 @@ class CollectionNode(DjangoObjectType):
     seo = graphene.Field(SEOType)
     image = graphene.Field(ImageNode)
     products_count = graphene.Int()
+    optimizer_hints = {"collection_id": {"only": ["id"]}}
 
     class Meta:
         model = Collection
         filter_fields = {"title": ["exact", "istartswith", "icontains"]}
         interfaces = (graphene.relay.Node,)
+        connection_class = CountableConnection
         exclude = ('store',)
 
     def resolve_collection_id(self, info):
@@ -198,6 +257,30 @@ class CollectionNode(DjangoObjectType):
         """
         return self.id
 
+    def resolve_seo(self, info):
+        """
+        Resolves the SEO metadata for the collection.
+        
+        Args:
+            info: GraphQL resolver info.
+        
+        Returns:
+            SEO: The SEO metadata of the collection.
+        """
+        return SEOByIdLoader.for_context(info.context).load(self)
+
+    def resolve_image(self, info):
+        """
+        Resolves the representative image for the collection.
+        
+        Args:
+            info: GraphQL resolver info.
+        
+        Returns:
+            Image: The image of the collection.
+        """
+        return ImageByIdLoader.for_context(info.context).load(self)
+
     def resolve_products_count(self, info):
         """
         Calculates and returns the total number of products in the collection.
@@ -208,7 +291,7 @@ class CollectionNode(DjangoObjectType):
         Returns:
             int: The count of products in the collection.
         """
-        return self.products.count()
+        return ProductsCountByCollectionIdLoader.for_context(info.context).load(self)
 
 
 class ProductNode(DjangoObjectType):
@@ -227,6 +310,7 @@ class ProductNode(DjangoObjectType):
         options (graphene.List): Product options.
         collections (graphene.List): Collections the product belongs to.
         description (JSONString): Detailed product description.
+        variant_by_options (graphene.Field): Variant with the given option values.
     """
     in_collection = graphene.Boolean()
     product_id = graphene.Int()
@@ -236,12 +320,23 @@ class ProductNode(DjangoObjectType):
     options = graphene.List(ProductOptionType)
     collections = graphene.List(CollectionNode)
     description = JSONString(description="Description of the product.")
+    variant_by_options = graphene.Field(
+        ProductVariantNode,
+        option_value_ids=graphene.List(graphene.NonNull(graphene.ID), required=True),
+        description="Variant with exactly the given option values.",
+    )
+    optimizer_hints = {
+        "product_id": {"only": ["id"]},
+        "image": {"only": ["first_variant"]},
+        "variant_by_options": {"only": ["id"]},
+    }
 
     class Meta:
         model = Product
         filter_fields = {"status": ['exact'], "title": [
                     'exact', 'icontains', 'istartswith']}
         interfaces = (graphene.relay.Node, )
+        connection_class = CountableConnection
         exclude = ('store',)
 
     def resolve_options(self, info):
@@ -252,9 +347,9 @@ class ProductNode(DjangoObjectType):
             info: GraphQL resolver info.
         
         Returns:
-            QuerySet of ProductOption instances for this product.
+            List of ProductOption instances for this product.
         """
-        return self.options.all()
+        return OptionsByProductIdLoader.for_context(info.context).load(self)
 
     def resolve_product_id(self, info):
         """
@@ -268,6 +363,30 @@ class ProductNode(DjangoObjectType):
         """
         return self.id
 
+    def resolve_seo(self, info):
+        """
+        Resolves the SEO metadata for the product.
+        
+        Args:
+            info: GraphQL resolver info.
+        
+        Returns:
+            SEO: The SEO metadata of the product.
+        """
+        return SEOByIdLoader.for_context(info.context).load(self)
+
+    def resolve_first_variant(self, info):
+        """
+        Resolves the first variant of the product.
+        
+        Args:
+            info: GraphQL resolver info.
+        
+        Returns:
+            ProductVariant: The first variant of the product.
+        """
+        return FirstVariantByProductLoader.for_context(info.context).load(self)
+
     def resolve_image(self, info):
         """
         Resolves the primary image for the product.
@@ -278,10 +397,7 @@ class ProductNode(DjangoObjectType):
         Returns:
             Image: The primary image of the product.
         """
-        try:
-            return self.first_variant.images.first()
-        except AttributeError:
-            return None
+        return ImageByProductLoader.for_context(info.context).load(self)
 
     def resolve_in_collection(self, info):
         """
@@ -296,7 +412,8 @@ class ProductNode(DjangoObjectType):
         collection_id = info.variable_values.get("collectionId")
         if not collection_id:
             return False
-        return self.collections.filter(pk=collection_id).exists()
+        collections = CollectionsByProductIdLoader.for_context(info.context).load(self)
+        return any(str(collection.pk) == str(collection_id) for collection in collections)
 
     def resolve_collections(self, info):
         """
@@ -306,6 +423,22 @@ class ProductNode(DjangoObjectType):
             info: GraphQL resolver info.
         
         Returns:
-            QuerySet of Collection instances this product is part of.
+            List of Collection instances this product is part of.
+        """
+        return CollectionsByProductIdLoader.for_context(info.context).load(self)
+
+    def resolve_variant_by_options(self, info, option_value_ids):
         """
-        return self.collections.all()
+        Resolves the variant of the product with exactly the given option values.
+        
+        Args:
+            info: GraphQL resolver info.
+            option_value_ids (list): IDs of the option values, e.g. Red and XL.
+        
+        Returns:
+            ProductVariant: The matching variant, or None.
+        """
+        try:
+            return get_variant_by_option_values(self, option_value_ids)
+        except ValueError:
+            return None
@@ -0,0 +1,258 @@
+"""
+Full-text search over the products of a store.
+
+Every product has one search document made of its title, handle, SKUs,
+option values and stored plain-text description. Documents are kept in a
+database specific index: an FTS5 table on SQLite and a weighted tsvector
+column with a GIN index on PostgreSQL. The backend follows the database vendor unless
+`PRODUCT_SEARCH_BACKEND` names another `SearchBackend` subclass.
+
+Model signals schedule the changed products with `schedule_search_update`,
+and their documents are rebuilt once when the transaction commits. Bulk
+writers, which send no signals, schedule their products themselves.
+"""
+import re
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from core.utils.editorjs import clean_editor_js
+from .models import OptionValue, Product, ProductVariant
+
+SEARCH_TABLE = "product_search_index"
+SEARCH_FIELDS = ("title", "handle", "skus", "options", "description")
+MAX_QUERY_TERMS = 10
+MAX_SEARCH_RESULTS = 100
+INDEX_BATCH_SIZE = 500
+
+_pending_updates = threading.local()
+
+
+def get_search_terms(query):
+    """Split a user query into at most `MAX_QUERY_TERMS` lowercase words."""
+    return re.findall(r"\w+", (query or "").lower())[:MAX_QUERY_TERMS]
+
+
+def get_search_documents(product_ids):
+    """
+    Return `{product_id: (store_id, fields)}` for the existing products.
+
+    `fields` maps every name of `SEARCH_FIELDS` to its text. Runs three
+    queries, whatever the number of products. Descriptions saved before
+    their plain text was stored are converted here, like in the exporter.
+    """
+    skus = defaultdict(list)
+    for product_id, sku in ProductVariant.objects.filter(
+            product_id__in=product_ids, sku__isnull=False).values_list("product_id", "sku"):
+        skus[product_id].append(sku)
+    options = defaultdict(list)
+    for product_id, name in OptionValue.objects.filter(
+            option__product_id__in=product_ids).values_list("option__product_id", "name"):
+        options[product_id].append(name)
+
+    documents = {}
+    for product in Product.objects.filter(pk__in=product_ids).only(
+            "pk", "store_id", "title", "handle", "description", "description_plaintext"):
+        documents[product.pk] = (product.store_id, {
+            "title": product.title or "",
+            "handle": product.handle or "",
+            "skus": " ".join(skus[product.pk]),
+            "options": " ".join(options[product.pk]),
+            "description": (
+                product.description_plaintext
+                or clean_editor_js(product.description, to_string=True)),
+        })
+    return documents
+
+
+class SearchBackend:
+    """Stores search documents and ranks products against a query."""
+    # Column of the index holding the product id.
+    id_column = "product_id"
+
+    def create(self, cursor):
+        raise NotImplementedError
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def get_product_ids(self, cursor, store_id=None):
+        """Return the ids of the indexed products, of a single store if given."""
+        query = f"SELECT {self.id_column} FROM {SEARCH_TABLE}"
+        params = []
+        if store_id is not None:
+            query += " WHERE store_id = %s"
+            params.append(store_id)
+        cursor.execute(query, params)
+        return [row[0] for row in cursor.fetchall()]
+
+    def remove(self, cursor, product_ids):
+        raise NotImplementedError
+
+    def update(self, cursor, documents):
+        raise NotImplementedError
+
+    def search(self, cursor, store_id, terms, limit):
+        """Return the ids of the best matching products of a store, best first."""
+        raise NotImplementedError
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 table keyed by product id, ranked with weighted BM25."""
+    id_column = "rowid"
+    # Weights of `store_id` and of each of `SEARCH_FIELDS`.
+    weights = (0.0, 10.0, 5.0, 8.0, 3.0, 1.0)
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"store_id UNINDEXED, {', '.join(SEARCH_FIELDS)}, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def remove(self, cursor, product_ids):
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", list(product_ids))
+
+    def update(self, cursor, documents):
+        self.remove(cursor, list(documents))
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, store_id, {', '.join(SEARCH_FIELDS)}) "
+            f"VALUES (%s, %s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+            [
+                [product_id, store_id, *[fields[name] for name in SEARCH_FIELDS]]
+                for product_id, (store_id, fields) in documents.items()
+            ],
+        )
+
+    def search(self, cursor, store_id, terms, limit):
+        # Terms only hold word characters, so quoting them is enough.
+        match = " ".join(f'"{term}"*' for term in terms)
+        cursor.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"AND store_id = %s ORDER BY bm25({SEARCH_TABLE}, "
+            f"{', '.join(str(weight) for weight in self.weights)}), rowid LIMIT %s",
+            [match, store_id, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Weighted tsvector per product with a GIN index, ranked with ts_rank."""
+    config = "simple"
+    weights = {"title": "A", "handle": "B", "skus": "A", "options": "B", "description": "C"}
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "product_id bigint PRIMARY KEY, store_id bigint NOT NULL, "
+            "document tsvector NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx "
+            f"ON {SEARCH_TABLE} USING GIN (document)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_store_idx ON {SEARCH_TABLE} (store_id)")
+
+    def remove(self, cursor, product_ids):
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE product_id = ANY(%s)", [list(product_ids)])
+
+    def update(self, cursor, documents):
+        document = " || ".join(
+            f"setweight(to_tsvector('{self.config}', %s), '{self.weights[name]}')"
+            for name in SEARCH_FIELDS
+        )
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (product_id, store_id, document) "
+            f"VALUES (%s, %s, {document}) ON CONFLICT (product_id) DO UPDATE "
+            "SET store_id = EXCLUDED.store_id, document = EXCLUDED.document",
+            [
+                [product_id, store_id, *[fields[name] for name in SEARCH_FIELDS]]
+                for product_id, (store_id, fields) in documents.items()
+            ],
+        )
+
+    def search(self, cursor, store_id, terms, limit):
+        query = " & ".join(f"{term}:*" for term in terms)
+        cursor.execute(
+            f"SELECT product_id FROM {SEARCH_TABLE}, to_tsquery('{self.config}', %s) query "
+            "WHERE store_id = %s AND document @@ query "
+            "ORDER BY ts_rank(document, query) DESC, product_id LIMIT %s",
+            [query, store_id, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+SEARCH_BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    backend_path = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    vendor = vendor or connection.vendor
+    if vendor not in SEARCH_BACKENDS:
+        raise ImproperlyConfigured(
+            f"No product search backend for {vendor}, set PRODUCT_SEARCH_BACKEND.")
+    return SEARCH_BACKENDS[vendor]()
+
+
+def update_search_index(product_ids):
+    """
+    Rebuild the search documents of `product_ids`, in batches.
+
+    Products that no longer exist are removed from the index.
+    """
+    product_ids = list(product_ids)
+    backend = get_search_backend()
+    with connection.cursor() as cursor:
+        for start in range(0, len(product_ids), INDEX_BATCH_SIZE):
+            batch = product_ids[start:start + INDEX_BATCH_SIZE]
+            documents = get_search_documents(batch)
+            missing = [product_id for product_id in batch if product_id not in documents]
+            if missing:
+                backend.remove(cursor, missing)
+            if documents:
+                backend.update(cursor, documents)
+
+
+def _flush_search_updates():
+    product_ids = getattr(_pending_updates, "product_ids", None)
+    if not product_ids:
+        return
+    _pending_updates.product_ids = set()
+    update_search_index(sorted(product_ids))
+
+
+def schedule_search_update(product_ids):
+    """
+    Rebuild the search documents of `product_ids` when the transaction commits.
+
+    Products scheduled several times in a transaction are indexed once.
+    """
+    pending = getattr(_pending_updates, "product_ids", None)
+    if pending is None:
+        pending = _pending_updates.product_ids = set()
+    pending.update(product_id for product_id in product_ids if product_id is not None)
+    # A callback discarded by a rolled back savepoint leaves its products to
+    # the next flush, which reads their current state anyway.
+    transaction.on_commit(_flush_search_updates)
+
+
+def search_product_ids(store, query, limit=None):
+    """Return the ids of the products of `store` matching `query`, best match first."""
+    terms = get_search_terms(query)
+    if not terms:
+        return []
+    # A negative LIMIT means no limit on SQLite and is an error on PostgreSQL.
+    limit = MAX_SEARCH_RESULTS if limit is None else max(1, min(limit, MAX_SEARCH_RESULTS))
+    with connection.cursor() as cursor:
+        return get_search_backend().search(cursor, store.pk, terms, limit)
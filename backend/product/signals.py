@@ -1,6 +1,13 @@
-from django.db.models.signals import post_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from .models import Product, Collection
+from core.models import SEO
+from stores.models import Store
+from .cache import (
+    get_batched_store_lookups, invalidate_catalog, is_catalog_invalidation_batched)
+from .search import schedule_search_update
+from .utils import refresh_option_fingerprints
+from .models import (
+    Collection, Image, OptionValue, Product, ProductOption, ProductVariant)
 
 
 @receiver(post_delete, sender=Product)
@@ -13,3 +20,132 @@ def delete_seo_related_to_product(sender, instance, **kwargs):
 def delete_seo_related_to_collection(sender, instance, **kwargs):
     if instance.seo:
         instance.seo.delete()
+
+
+def get_catalog_store_id(instance):
+    """Return the id of the store whose catalog `instance` belongs to."""
+    if isinstance(instance, (Product, Collection, Image)):
+        return instance.store_id
+    if isinstance(instance, (ProductVariant, ProductOption)):
+        key = ("product", instance.product_id)
+        products = Product.objects.filter(pk=instance.product_id)
+    elif isinstance(instance, OptionValue):
+        key = ("option", instance.option_id)
+        products = Product.objects.filter(options=instance.option_id)
+    elif isinstance(instance, SEO):
+        return (
+            Product.objects.filter(seo=instance).values_list("store_id", flat=True).first()
+            or Collection.objects.filter(seo=instance).values_list("store_id", flat=True).first()
+        )
+    else:
+        return None
+    lookups = get_batched_store_lookups()
+    if lookups is not None and key in lookups:
+        return lookups[key]
+    store_id = products.values_list("store_id", flat=True).first()
+    if lookups is not None:
+        lookups[key] = store_id
+    return store_id
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_save, sender=Collection)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=ProductOption)
+@receiver(post_save, sender=OptionValue)
+@receiver(post_save, sender=SEO)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_delete, sender=Collection)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=ProductOption)
+@receiver(post_delete, sender=OptionValue)
+@receiver(post_delete, sender=SEO)
+def invalidate_catalog_on_change(sender, instance, **kwargs):
+    store_id = get_catalog_store_id(instance)
+    if not is_catalog_invalidation_batched(store_id):
+        invalidate_catalog(store_id)
+
+
+@receiver(m2m_changed, sender=Product.collections.through)
+@receiver(m2m_changed, sender=ProductVariant.images.through)
+@receiver(m2m_changed, sender=ProductVariant.selected_options.through)
+def invalidate_catalog_on_relation_change(sender, instance, action, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    store_id = get_catalog_store_id(instance)
+    if not is_catalog_invalidation_batched(store_id):
+        invalidate_catalog(store_id)
+
+
+@receiver(m2m_changed, sender=ProductVariant.selected_options.through)
+def update_option_fingerprint(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # The cleared variants are not passed along with `post_clear`.
+        instance._cleared_variant_ids = list(instance.variants.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        fingerprints = refresh_option_fingerprints([instance.pk])
+        instance.option_fingerprint = fingerprints.get(instance.pk)
+    elif action == "post_clear":
+        refresh_option_fingerprints(getattr(instance, "_cleared_variant_ids", []))
+    else:
+        refresh_option_fingerprints(pk_set or [])
+
+
+@receiver(pre_delete, sender=OptionValue)
+def remember_option_value_product(sender, instance, **kwargs):
+    if is_catalog_invalidation_batched(get_catalog_store_id(instance)):
+        # Batched writers refresh the fingerprints themselves.
+        return
+    # Deleting a value cascades to its SelectedOption rows without m2m_changed.
+    instance._refresh_product_id = ProductVariant.objects.filter(
+        selected_options=instance).values_list("product_id", flat=True).first()
+
+
+@receiver(post_delete, sender=OptionValue)
+def update_option_fingerprint_on_value_delete(sender, instance, **kwargs):
+    product_id = getattr(instance, "_refresh_product_id", None)
+    if product_id is None:
+        return
+    # All variants of the product are refreshed together: the values deleted
+    # with this one are gone as well, and variants left with the same values
+    # keep the fingerprint on the oldest only.
+    refresh_option_fingerprints(
+        ProductVariant.objects.filter(product_id=product_id).values_list("pk", flat=True),
+        drop_duplicates=True)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_product_search_document(sender, instance, **kwargs):
+    schedule_search_update([instance.pk])
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def update_variant_search_document(sender, instance, **kwargs):
+    schedule_search_update([instance.product_id])
+
+
+@receiver(post_save, sender=OptionValue)
+@receiver(post_delete, sender=OptionValue)
+def update_option_value_search_document(sender, instance, **kwargs):
+    if is_catalog_invalidation_batched(get_catalog_store_id(instance)):
+        # Batched writers schedule their products themselves.
+        return
+    schedule_search_update(ProductOption.objects.filter(
+        pk=instance.option_id).values_list("product_id", flat=True))
+
+
+@receiver(post_save, sender=Store)
+def sync_variant_currency(sender, instance, created, **kwargs):
+    if created or not instance.currency_code_changed:
+        return
+    updated = ProductVariant.objects.filter(product__store=instance).exclude(
+        currency=instance.currency_code).update(currency=instance.currency_code)
+    if updated:
+        invalidate_catalog(instance.pk)
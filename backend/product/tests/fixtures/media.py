@@ -1,4 +1,8 @@
+import io
+import os
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image as PILImage
 from product.models import Image, Video
 
 
@@ -16,3 +20,32 @@ def product_video(db, store):
         store=store,
         youtube_url="https://youtube.com/watch?v=test"
     )
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Store media files in a temporary directory and process images inline."""
+    settings.MEDIA_ROOT = tmp_path
+    settings.PRODUCT_IMAGE_WORKERS = 0
+    return tmp_path
+
+
+@pytest.fixture
+def image_file_factory():
+    """
+    Return a function building an uploaded image file.
+
+    The format follows the extension of `name`. The image is a plain
+    `color` of `size`, unless a Pillow `picture` is given; other keyword
+    arguments are passed to `picture.save`.
+    """
+    def create_image_file(
+        name="picture.png", size=(60, 30), color=(0, 0, 255), picture=None, **params
+    ):
+        image_format = PILImage.registered_extensions()[os.path.splitext(name)[1].lower()]
+        picture = picture or PILImage.new("RGB", size, color)
+        buffer = io.BytesIO()
+        picture.save(buffer, format=image_format, **params)
+        return SimpleUploadedFile(
+            name, buffer.getvalue(), content_type=PILImage.MIME[image_format])
+    return create_image_file
@@ -1,8 +1,16 @@
 import pytest
 from ...models import Product, ProductVariant, ProductOption, OptionValue
+from ...cache import get_catalog_cache
 from decimal import Decimal
 
 
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    # Ids are reused once a test's transaction is rolled back, so entries
+    # cached by one test must not be visible to the next.
+    get_catalog_cache().clear()
+
+
 @pytest.fixture
 def product(db, store, seo):
     product = Product.objects.create(
@@ -0,0 +1,191 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.graphql.tests.utils import get_graphql_content
+from core.utils.constants import StorePermissionErrors
+from ...models import OptionValue, ProductOption, ProductVariant
+from ...utils import add_values_to_variant, generate_variants
+
+
+GENERATE_VARIANTS_MUTATION = """
+mutation GenerateVariants(
+    $productId: ID!
+    $variantInputs: ProductVariantInput
+    $defaultDomain: String!
+) {
+    generateVariants(
+        productId: $productId
+        variantInputs: $variantInputs
+        defaultDomain: $defaultDomain
+    ) {
+        productVariants {
+            variantId
+            stock
+            selectedOptions {
+                name
+            }
+        }
+    }
+}
+"""
+
+
+def create_options(product, values_per_option):
+    values = {}
+    for name, value_names in values_per_option.items():
+        option = ProductOption.objects.create(product=product, name=name)
+        for value_name in value_names:
+            values[value_name] = OptionValue.objects.create(option=option, name=value_name)
+    return values
+
+
+@pytest.mark.django_db
+def test_generate_variants_creates_all_combinations(staff_api_client, staff_member, product):
+    """Test that a variant is created for every combination of option values."""
+    create_options(product, {"Color": ["Red", "Blue"], "Size": ["S", "M", "L"]})
+
+    response = staff_api_client.post_graphql(GENERATE_VARIANTS_MUTATION, {
+        "productId": product.pk,
+        "variantInputs": {"price": 15, "stock": 3},
+        "defaultDomain": product.store.default_domain,
+    })
+    content = get_graphql_content(response)
+
+    created = content["data"]["generateVariants"]["productVariants"]
+    assert len(created) == 6
+    assert {
+        tuple(sorted(value["name"] for value in variant["selectedOptions"]))
+        for variant in created
+    } == {
+        tuple(sorted((color, size)))
+        for color in ("Red", "Blue") for size in ("S", "M", "L")
+    }
+    variants = ProductVariant.objects.filter(pk__in=[variant["variantId"] for variant in created])
+    assert {variant.price_amount for variant in variants} == {Decimal(15)}
+    assert {variant.stock for variant in variants} == {3}
+    assert all(variant.option_fingerprint for variant in variants)
+    first_sort_order = product.first_variant.sort_order
+    assert sorted(variant.sort_order for variant in variants) == list(
+        range(first_sort_order + 1024, first_sort_order + 7 * 1024, 1024))
+
+
+@pytest.mark.django_db
+def test_generate_variants_skips_existing_combinations(staff_api_client, staff_member, product):
+    """Test that combinations that already have a variant are skipped."""
+    values = create_options(product, {"Color": ["Red", "Blue"], "Size": ["S", "M"]})
+    add_values_to_variant(product.first_variant, [values["Red"].pk, values["M"].pk])
+
+    response = staff_api_client.post_graphql(GENERATE_VARIANTS_MUTATION, {
+        "productId": product.pk,
+        "defaultDomain": product.store.default_domain,
+    })
+    content = get_graphql_content(response)
+
+    assert len(content["data"]["generateVariants"]["productVariants"]) == 3
+    assert product.variants.count() == 4
+
+    response = staff_api_client.post_graphql(GENERATE_VARIANTS_MUTATION, {
+        "productId": product.pk,
+        "defaultDomain": product.store.default_domain,
+    })
+    content = get_graphql_content(response)
+
+    assert content["data"]["generateVariants"]["productVariants"] == []
+    assert product.variants.count() == 4
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("values_per_option", [
+    {"Color": ["Red"], "Size": ["S"]},
+    {"Color": ["Red", "Blue", "Green"], "Size": ["S", "M", "L", "XL"], "Fit": ["Slim", "Wide"]},
+])
+def test_generate_variants_query_count(
+    staff_api_client, staff_member, product, values_per_option
+):
+    """Test that the number of queries does not depend on the number of combinations."""
+    create_options(product, values_per_option)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = staff_api_client.post_graphql(
+            GENERATE_VARIANTS_MUTATION.replace(
+                "selectedOptions {\n                name\n            }", ""),
+            {"productId": product.pk, "defaultDomain": product.store.default_domain},
+        )
+    content = get_graphql_content(response)
+
+    assert content["data"]["generateVariants"]["productVariants"]
+    writes = [query for query in queries if query["sql"].startswith("INSERT")]
+    assert len(writes) == 2
+    assert len(queries) <= 15
+
+
+@pytest.mark.django_db
+def test_generate_variants_too_many_options(staff_api_client, staff_member, product):
+    """Test that products with more options than a variant can hold are rejected."""
+    create_options(product, {name: ["A"] for name in ("One", "Two", "Three", "Four")})
+
+    response = staff_api_client.post_graphql(GENERATE_VARIANTS_MUTATION, {
+        "productId": product.pk,
+        "defaultDomain": product.store.default_domain,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["message"] == "Cannot add more than 3 options"
+    assert content["errors"][0]["extensions"]["code"] == "OPTION_VALUE_ERROR"
+    assert product.variants.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("variant_inputs, message", [
+    ({"price": 20, "compareAtPrice": 10},
+     "Compare at price must be greater than or equal to price."),
+    ({"price": 20, "compareAtPrice": -5}, "Compare at price cannot be negative."),
+])
+def test_generate_variants_validates_prices(
+    staff_api_client, staff_member, product, variant_inputs, message
+):
+    """Test that the prices shared by the bulk created variants follow the variant rules."""
+    create_options(product, {"Color": ["Red", "Blue"]})
+
+    response = staff_api_client.post_graphql(GENERATE_VARIANTS_MUTATION, {
+        "productId": product.pk,
+        "variantInputs": variant_inputs,
+        "defaultDomain": product.store.default_domain,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["message"] == message
+    assert content["errors"][0]["extensions"]["code"] == "INVALID_PRICE"
+    assert product.variants.count() == 1
+
+
+@pytest.mark.django_db
+def test_generate_variants_sets_first_variant(staff_member, product):
+    """Test that a product without variants gets its first generated variant."""
+    create_options(product, {"Color": ["Red", "Blue"]})
+    product.first_variant.delete()
+    product.refresh_from_db()
+    assert product.first_variant is None
+
+    variants = generate_variants(product)
+
+    product.refresh_from_db()
+    assert product.first_variant == variants[0]
+
+
+@pytest.mark.django_db
+def test_generate_variants_without_permission(
+    staff_api_client, staff_member_with_no_permissions, product
+):
+    """Test that staff without the update permission cannot generate variants."""
+    create_options(product, {"Color": ["Red", "Blue"]})
+
+    response = staff_api_client.post_graphql(GENERATE_VARIANTS_MUTATION, {
+        "productId": product.pk,
+        "defaultDomain": product.store.default_domain,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["message"] == StorePermissionErrors.PERMISSION_DENIED["message"]
+    assert product.variants.count() == 1
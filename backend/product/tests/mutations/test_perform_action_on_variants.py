@@ -1,5 +1,8 @@
 import pytest
-from product.models import ProductVariant
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from product.models import Product, ProductVariant
 from stores.models import StorePermission
 from stores.enums import StorePermissions
 from core.graphql.tests.utils import get_graphql_content
@@ -95,3 +98,187 @@ def test_perform_action_on_variants_not_found(staff_api_client, store, staff_mem
     assert 'errors' in content
     assert content['errors'][0]['message'] == "Product variant not found."
     assert content['errors'][0]['extensions']['code'] == "NOT_FOUND"
+
+
+PERFORM_ADJUSTMENT_MUTATION = '''
+    mutation PerformActionOnVariants(
+        $action: VariantActions!, $variantIds: [ID!]!, $defaultDomain: String!,
+        $adjustment: VariantAdjustmentInput
+    ) {
+        performActionOnVariants(
+            action: $action, variantIds: $variantIds, defaultDomain: $defaultDomain,
+            adjustment: $adjustment
+        ) {
+            success
+            message
+            errors
+        }
+    }
+'''
+
+
+def adjust_variants(client, store, variants, action, mode, value):
+    variables = {
+        "action": action,
+        "variantIds": [str(variant.id) for variant in variants],
+        "defaultDomain": store.default_domain,
+        "adjustment": {"mode": mode, "value": str(value)},
+    }
+    response = client.post_graphql(PERFORM_ADJUSTMENT_MUTATION, variables)
+    return get_graphql_content(response, ignore_errors=True)
+
+
+@pytest.fixture
+def priced_variants(product):
+    return [
+        ProductVariant.objects.create(product=product, price_amount=Decimal(price), stock=stock)
+        for price, stock in (("10.00", 5), ("19.99", 0), ("3.333", 8))
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mode, value, expected", [
+    ("SET", "12.5", ["12.5", "12.5", "12.5"]),
+    ("ADD", "1.25", ["11.25", "21.24", "4.583"]),
+    ("SUBTRACT", "0.5", ["9.5", "19.49", "2.833"]),
+    ("PERCENTAGE", "-15", ["8.5", "16.992", "2.833"]),
+])
+def test_update_price_in_one_statement(
+    staff_api_client, store, staff_member, priced_variants, mode, value, expected
+):
+    """Test that every price mode is applied with a single UPDATE."""
+    with CaptureQueriesContext(connection) as queries:
+        content = adjust_variants(
+            staff_api_client, store, priced_variants, "UPDATE_PRICE", mode, value)
+
+    data = content["data"]["performActionOnVariants"]
+    assert data["success"] is True
+    assert data["message"] == "Product variant prices updated successfully."
+    assert len([query for query in queries if query["sql"].startswith("UPDATE")]) == 1
+    prices = [
+        ProductVariant.objects.get(pk=variant.pk).price_amount for variant in priced_variants]
+    assert prices == [Decimal(price) for price in expected]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mode, value, expected", [
+    ("SET", "7", [7, 7, 7]),
+    ("ADD", "3", [8, 3, 11]),
+    ("PERCENTAGE", "50", [8, 0, 12]),
+])
+def test_update_stock(staff_api_client, store, staff_member, priced_variants, mode, value, expected):
+    """Test that stock adjustments round to whole units."""
+    content = adjust_variants(
+        staff_api_client, store, priced_variants, "UPDATE_STOCK", mode, value)
+
+    assert content["data"]["performActionOnVariants"]["success"] is True
+    stocks = [ProductVariant.objects.get(pk=variant.pk).stock for variant in priced_variants]
+    assert stocks == expected
+
+
+@pytest.mark.django_db
+def test_update_price_keeps_compare_at_invariant(
+    staff_api_client, store, staff_member, priced_variants
+):
+    """Test that no variant is repriced when one would exceed its compare-at price."""
+    limited = priced_variants[0]
+    limited.compare_at_price = Decimal("11.00")
+    limited.save()
+
+    content = adjust_variants(
+        staff_api_client, store, priced_variants, "UPDATE_PRICE", "ADD", "2")
+
+    data = content["data"]["performActionOnVariants"]
+    assert data["success"] is False
+    assert data["errors"] == [
+        f"Variant {limited.pk}: Compare at price must be greater than or equal to price."]
+    prices = [
+        ProductVariant.objects.get(pk=variant.pk).price_amount for variant in priced_variants]
+    assert prices == [Decimal("10"), Decimal("19.99"), Decimal("3.333")]
+
+
+@pytest.mark.django_db
+def test_update_stock_cannot_go_negative(staff_api_client, store, staff_member, priced_variants):
+    """Test that subtracting more than the stock is rejected."""
+    content = adjust_variants(
+        staff_api_client, store, priced_variants, "UPDATE_STOCK", "SUBTRACT", "1")
+
+    data = content["data"]["performActionOnVariants"]
+    assert data["success"] is False
+    assert data["errors"] == [f"Variant {priced_variants[1].pk}: Stock cannot be negative."]
+    assert ProductVariant.objects.get(pk=priced_variants[0].pk).stock == 5
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("action, mode, value, message", [
+    ("UPDATE_PRICE", "ADD", "999999995", "Price is too large."),
+    ("UPDATE_PRICE", "PERCENTAGE", "10000000000", "Price is too large."),
+    ("UPDATE_STOCK", "PERCENTAGE", "50000000000", "Stock is too large."),
+])
+def test_adjustment_cannot_overflow(
+    staff_api_client, store, staff_member, priced_variants, action, mode, value, message
+):
+    """Test that results past the digits of the field are reported, not written."""
+    content = adjust_variants(
+        staff_api_client, store, priced_variants, action, mode, value)
+
+    data = content["data"]["performActionOnVariants"]
+    assert data["success"] is False
+    assert f"Variant {priced_variants[0].pk}: {message}" in data["errors"]
+    variant = ProductVariant.objects.get(pk=priced_variants[0].pk)
+    assert (variant.price_amount, variant.stock) == (Decimal("10"), 5)
+
+
+@pytest.mark.django_db
+def test_relative_price_adjustment_skips_variants_without_price(
+    staff_api_client, store, staff_member, priced_variants, product
+):
+    """Test that a variant without a price keeps it instead of being priced at 0."""
+    unpriced = ProductVariant.objects.create(product=product, price_amount=None)
+
+    content = adjust_variants(
+        staff_api_client, store, priced_variants + [unpriced], "UPDATE_PRICE",
+        "PERCENTAGE", "10")
+
+    assert content["data"]["performActionOnVariants"]["success"] is True
+    assert ProductVariant.objects.get(pk=unpriced.pk).price_amount is None
+    assert ProductVariant.objects.get(pk=priced_variants[0].pk).price_amount == Decimal("11")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("action, adjustment, message", [
+    ("UPDATE_PRICE", None, "An adjustment is required for this action."),
+    ("UPDATE_PRICE", {"mode": "ADD", "value": "-1"}, "Adjustment value cannot be negative."),
+    ("UPDATE_PRICE", {"mode": "SET", "value": "1000000000"}, "Adjustment value is too large."),
+    ("UPDATE_STOCK", {"mode": "ADD", "value": "1.5"}, "Stock adjustments must be whole numbers."),
+])
+def test_invalid_adjustment(
+    staff_api_client, store, staff_member, priced_variants, action, adjustment, message
+):
+    """Test that invalid adjustments are rejected before any update."""
+    variables = {
+        "action": action,
+        "variantIds": [str(variant.id) for variant in priced_variants],
+        "defaultDomain": store.default_domain,
+        "adjustment": adjustment,
+    }
+    response = staff_api_client.post_graphql(PERFORM_ADJUSTMENT_MUTATION, variables)
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["message"] == message
+    assert content["errors"][0]["extensions"]["code"] == "INVALID_INPUT"
+
+
+@pytest.mark.django_db
+def test_variants_of_another_store_are_not_found(
+    staff_api_client, store, staff_member, another_store
+):
+    """Test that variant ids are scoped to the store of the mutation."""
+    other_product = Product.objects.create(store=another_store, title="Other")
+    other_variant = ProductVariant.objects.create(product=other_product, price_amount=1)
+
+    content = adjust_variants(
+        staff_api_client, store, [other_variant], "UPDATE_PRICE", "SET", "5")
+
+    assert content["errors"][0]["extensions"]["code"] == "NOT_FOUND"
+    assert ProductVariant.objects.get(pk=other_variant.pk).price_amount == 1
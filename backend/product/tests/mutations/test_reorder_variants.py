@@ -0,0 +1,161 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.graphql.tests.utils import get_graphql_content
+from core.utils.constants import StorePermissionErrors
+from ...models import Product, ProductVariant
+
+
+REORDER_VARIANTS_MUTATION = """
+mutation ReorderVariants(
+    $productId: ID!
+    $variantIds: [ID!]!
+    $defaultDomain: String!
+) {
+    reorderVariants(
+        productId: $productId
+        variantIds: $variantIds
+        defaultDomain: $defaultDomain
+    ) {
+        success
+    }
+}
+"""
+
+
+def get_order(product):
+    return list(product.variants.order_by("sort_order", "pk").values_list("sku", flat=True))
+
+
+@pytest.fixture
+def sorted_product(product):
+    for sku in ("A", "B", "C", "D"):
+        ProductVariant.objects.create(product=product, sku=sku)
+    return product
+
+
+@pytest.mark.django_db
+def test_variants_are_appended_with_gaps(product):
+    """Test that new variants are spaced apart and deletes leave the others alone."""
+    first = product.first_variant
+    second = ProductVariant.objects.create(product=product)
+    third = ProductVariant.objects.create(product=product)
+
+    assert second.sort_order == first.sort_order + ProductVariant.SORT_ORDER_GAP
+    assert third.sort_order == second.sort_order + ProductVariant.SORT_ORDER_GAP
+
+    with CaptureQueriesContext(connection) as queries:
+        second.delete()
+    third.refresh_from_db()
+    assert third.sort_order == first.sort_order + 2 * ProductVariant.SORT_ORDER_GAP
+    assert not [query for query in queries if "sort_order" in query["sql"]]
+
+
+@pytest.mark.django_db
+def test_reorder_all_variants(staff_api_client, staff_member, sorted_product):
+    """Test that listing every variant applies the new order in one UPDATE."""
+    variants = {variant.sku: variant.pk for variant in sorted_product.variants.all()}
+    new_order = ["D", "123", "B", "A", "C"]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = staff_api_client.post_graphql(REORDER_VARIANTS_MUTATION, {
+            "productId": sorted_product.pk,
+            "variantIds": [variants[sku] for sku in new_order],
+            "defaultDomain": sorted_product.store.default_domain,
+        })
+    content = get_graphql_content(response)
+
+    assert content["data"]["reorderVariants"]["success"] is True
+    assert get_order(sorted_product) == new_order
+    assert len([query for query in queries if query["sql"].startswith("UPDATE")]) == 1
+
+
+@pytest.mark.django_db
+def test_reorder_some_variants(staff_api_client, staff_member, sorted_product):
+    """Test that listed variants swap positions and the others keep theirs."""
+    variants = {variant.sku: variant.pk for variant in sorted_product.variants.all()}
+
+    response = staff_api_client.post_graphql(REORDER_VARIANTS_MUTATION, {
+        "productId": sorted_product.pk,
+        "variantIds": [variants["D"], variants["A"]],
+        "defaultDomain": sorted_product.store.default_domain,
+    })
+    content = get_graphql_content(response)
+
+    assert content["data"]["reorderVariants"]["success"] is True
+    assert get_order(sorted_product) == ["123", "D", "B", "C", "A"]
+
+
+@pytest.mark.django_db
+def test_reorder_rebalances_unsorted_variants(staff_api_client, staff_member, sorted_product):
+    """Test that variants sharing a position are respaced before reordering."""
+    sorted_product.variants.filter(sku__in=["A", "B"]).update(sort_order=None)
+    variants = {variant.sku: variant.pk for variant in sorted_product.variants.all()}
+
+    response = staff_api_client.post_graphql(REORDER_VARIANTS_MUTATION, {
+        "productId": sorted_product.pk,
+        "variantIds": [variants["B"], variants["A"]],
+        "defaultDomain": sorted_product.store.default_domain,
+    })
+    content = get_graphql_content(response)
+
+    assert content["data"]["reorderVariants"]["success"] is True
+    assert get_order(sorted_product) == ["123", "C", "D", "B", "A"]
+    sort_orders = list(sorted_product.variants.values_list("sort_order", flat=True))
+    assert len(set(sort_orders)) == len(sort_orders)
+
+
+@pytest.mark.django_db
+def test_reorder_variants_of_another_product(
+    staff_api_client, staff_member, sorted_product, store
+):
+    """Test that variants of other products cannot be reordered."""
+    other = Product.objects.create(store=store, title="Other")
+    other_variant = ProductVariant.objects.create(product=other)
+    before = get_order(sorted_product)
+
+    response = staff_api_client.post_graphql(REORDER_VARIANTS_MUTATION, {
+        "productId": sorted_product.pk,
+        "variantIds": [other_variant.pk, sorted_product.first_variant.pk],
+        "defaultDomain": sorted_product.store.default_domain,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["extensions"]["code"] == "NOT_FOUND"
+    assert get_order(sorted_product) == before
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("product_id, variant_id", [("abc", None), (None, "abc")])
+def test_reorder_variants_with_invalid_ids(
+    staff_api_client, staff_member, sorted_product, product_id, variant_id
+):
+    """Test that IDs which are not integers are rejected with a GraphQL error."""
+    before = get_order(sorted_product)
+
+    response = staff_api_client.post_graphql(REORDER_VARIANTS_MUTATION, {
+        "productId": product_id or sorted_product.pk,
+        "variantIds": [variant_id or sorted_product.first_variant.pk],
+        "defaultDomain": sorted_product.store.default_domain,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["extensions"]["code"] == "INVALID_INPUT"
+    assert get_order(sorted_product) == before
+
+
+@pytest.mark.django_db
+def test_reorder_variants_without_permission(
+    staff_api_client, staff_member_with_no_permissions, sorted_product
+):
+    """Test that staff without the update permission cannot reorder variants."""
+    variant_ids = list(sorted_product.variants.values_list("pk", flat=True))
+
+    response = staff_api_client.post_graphql(REORDER_VARIANTS_MUTATION, {
+        "productId": sorted_product.pk,
+        "variantIds": variant_ids[::-1],
+        "defaultDomain": sorted_product.store.default_domain,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["message"] == StorePermissionErrors.PERMISSION_DENIED["message"]
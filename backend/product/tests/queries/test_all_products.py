@@ -1,5 +1,10 @@
 import pytest
+from django.db import connection
+from graphql import GraphQLError
+from django.test.utils import CaptureQueriesContext
+from core.fields import KeysetConnectionField
 from core.graphql.tests.utils import get_graphql_content
+from product.models import Product
 from stores.models import StorePermission
 from stores.enums import StorePermissions
 
@@ -165,3 +170,147 @@ def test_all_products_filter_by_status(
     # Ensure draft product is not in the results
     product_ids = {str(product['node']['productId']) for product in products}
     assert str(draft_product.id) not in product_ids
+
+
+ALL_PRODUCTS_WITH_FRAGMENT_QUERY = '''
+fragment ProductListItem on ProductNode {
+    productId
+    title
+    seo { title }
+    firstVariant { ... on ProductVariantNode { stock pricing { amount } } }
+}
+query AllProducts($defaultDomain: String!) {
+    allProducts(defaultDomain: $defaultDomain) {
+        edges {
+            node {
+                ...ProductListItem
+            }
+        }
+    }
+}
+'''
+
+
+@pytest.mark.django_db
+def test_all_products_fetches_only_selected_columns(
+    staff_api_client,
+    staff_member,
+    store,
+    product,
+):
+    """Test that the listing skips unselected columns and joins selected relations."""
+    variables = {"defaultDomain": store.default_domain}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = staff_api_client.post_graphql(
+            ALL_PRODUCTS_WITH_FRAGMENT_QUERY, variables)
+    content = get_graphql_content(response)
+
+    node = content['data']['allProducts']['edges'][0]['node']
+    assert node['seo']['title'] == product.seo.title
+    assert node['firstVariant']['stock'] == product.first_variant.stock
+
+    product_queries = [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT "product_product"."id"')
+    ]
+    listing_query = product_queries[0]
+    assert '"product_product"."description"' not in listing_query
+    assert 'JOIN "core_seo"' in listing_query
+    assert 'JOIN "product_productvariant"' in listing_query
+    # No deferred column is fetched back one row at a time.
+    assert not any(
+        'WHERE "product_product"."id" = ' in sql for sql in product_queries)
+
+
+ALL_PRODUCTS_PAGE_QUERY = '''
+query AllProducts(
+    $defaultDomain: String!, $first: Int, $after: String, $last: Int, $before: String
+) {
+    allProducts(
+        defaultDomain: $defaultDomain, first: $first, after: $after,
+        last: $last, before: $before
+    ) {
+        edges { node { productId } }
+        pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+    }
+}
+'''
+
+
+def fetch_products_page(client, store, **variables):
+    variables["defaultDomain"] = store.default_domain
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post_graphql(ALL_PRODUCTS_PAGE_QUERY, variables)
+    content = get_graphql_content(response)
+    return content['data']['allProducts'], queries
+
+
+@pytest.mark.django_db
+def test_all_products_keyset_pagination(staff_api_client, staff_member, store):
+    """Test that cursors walk the products newest first, forwards and backwards."""
+    products = [
+        Product.objects.create(store=store, title=f"Product {index}")
+        for index in range(5)
+    ]
+    expected_ids = [product.id for product in reversed(products)]
+
+    seen_ids, after = [], None
+    while True:
+        page, queries = fetch_products_page(
+            staff_api_client, store, first=2, after=after)
+        seen_ids.extend(edge['node']['productId'] for edge in page['edges'])
+        assert not any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        assert page['pageInfo']['hasPreviousPage'] is (after is not None)
+        if not page['pageInfo']['hasNextPage']:
+            break
+        after = page['pageInfo']['endCursor']
+    assert seen_ids == expected_ids
+
+    page, _ = fetch_products_page(
+        staff_api_client, store, last=2, before=page['pageInfo']['startCursor'])
+    assert [edge['node']['productId'] for edge in page['edges']] == expected_ids[2:4]
+    assert page['pageInfo']['hasPreviousPage'] is True
+    assert page['pageInfo']['hasNextPage'] is True
+
+
+@pytest.mark.django_db
+def test_all_products_total_count_only_when_requested(
+    staff_api_client, staff_member, store, product
+):
+    """Test that totalCount is counted with the filters applied."""
+    query = '''
+    query AllProducts($defaultDomain: String!) {
+        allProducts(defaultDomain: $defaultDomain, first: 1, status: DRAFT) {
+            totalCount
+        }
+    }
+    '''
+    Product.objects.create(store=store, title="Draft", status="DRAFT")
+    Product.objects.create(store=store, title="Active", status="ACTIVE")
+    response = staff_api_client.post_graphql(
+        query, {"defaultDomain": store.default_domain})
+    content = get_graphql_content(response)
+
+    assert content['data']['allProducts']['totalCount'] == store.products.filter(
+        status="DRAFT").count()
+
+
+@pytest.mark.django_db
+def test_all_products_invalid_cursor(staff_api_client, staff_member, store, product):
+    """Test that a malformed cursor is rejected."""
+    response = staff_api_client.post_graphql(
+        ALL_PRODUCTS_PAGE_QUERY,
+        {"defaultDomain": store.default_domain, "first": 1, "after": "garbage"})
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content['errors'][0]['message'] == "Invalid pagination cursor."
+    assert content['errors'][0]['extensions']['code'] == "INVALID_INPUT"
+
+
+@pytest.mark.parametrize("ordering", ["store__name", "?", "collections", "-variants"])
+def test_keyset_rejects_unsupported_ordering(ordering):
+    """Test that orderings that cannot be sort keys raise a GraphQL error."""
+    queryset = Product.objects.order_by(ordering, "pk")
+    with pytest.raises(GraphQLError, match="not supported"):
+        KeysetConnectionField.get_sort_key(queryset)
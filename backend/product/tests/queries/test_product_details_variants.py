@@ -2,6 +2,8 @@ import pytest
 from core.graphql.tests.utils import get_graphql_content
 from stores.models import StorePermission
 from stores.enums import StorePermissions
+from product.cache import invalidate_catalog
+from product.models import ProductVariant
 
 PRODUCT_DETAILS_VARIANTS_QUERY = '''
 query ProductDetailsVariants($productId: ID!) {
@@ -85,16 +87,16 @@ def test_product_details_variants_success(
     # Check the number of variants (excluding first variant)
     assert len(variants) == 2
     
-    # Check variant details (sorted by created_at in descending order)
-    assert variants[0]['node']['sku'] == 'VARIANT3'
-    assert variants[1]['node']['sku'] == 'VARIANT2'
+    # Check variant details (sorted by sort order)
+    assert variants[0]['node']['sku'] == 'VARIANT2'
+    assert variants[1]['node']['sku'] == 'VARIANT3'
     assert 'pricing' in variants[0]['node'], "Pricing field is missing in the first variant"
     assert variants[0]['node']['pricing'] is not None, "Pricing data is missing in the first variant"
     assert 'amount' in variants[0]['node']['pricing'], "Amount field is missing in the pricing"
-    assert float(variants[0]['node']['pricing']['amount']) == 39.99
-    assert float(variants[1]['node']['pricing']['amount']) == 29.99
-    assert variants[0]['node']['stock'] == 20
-    assert variants[1]['node']['stock'] == 15
+    assert float(variants[0]['node']['pricing']['amount']) == 29.99
+    assert float(variants[1]['node']['pricing']['amount']) == 39.99
+    assert variants[0]['node']['stock'] == 15
+    assert variants[1]['node']['stock'] == 20
 
 
 @pytest.mark.django_db
@@ -167,7 +169,7 @@ def test_product_details_variants_order(
     store,
     product
 ):
-    """Test that product variants are returned in descending order of creation."""
+    """Test that product variants are returned in their sort order."""
     # Add PRODUCTS_VIEW permission
     store_permission = StorePermission.objects.get(
         codename=StorePermissions.PRODUCTS_VIEW.codename
@@ -220,10 +222,20 @@ def test_product_details_variants_order(
     # Verify query response
     variants = content['data']['productDetailsVariants']['edges']
         
-    # Check that variants are in descending order and first_variant is excluded
+    # Check that variants are in sort order and first_variant is excluded
     assert len(variants) == 2
-    variant_dates = [variant['node']['createdAt'] for variant in variants]
-    assert variant_dates == sorted(variant_dates, reverse=True)
+    assert [variant['node']['sku'] for variant in variants] == ['VARIANT1', 'VARIANT2']
+
+    # A reordered variant moves ahead of the others
+    ProductVariant.set_sort_orders(product.variants.all(), {variant2.pk: -1})
+    invalidate_catalog(store.pk)
+    response = staff_api_client.post_graphql(
+        PRODUCT_DETAILS_VARIANTS_QUERY,
+        variables
+    )
+    content = get_graphql_content(response)
+    variants = content['data']['productDetailsVariants']['edges']
+    assert [variant['node']['sku'] for variant in variants] == ['VARIANT2', 'VARIANT1']
 
     # Verify specific variant details with more flexibility
     variant_skus = [variant['node']['sku'] for variant in variants]
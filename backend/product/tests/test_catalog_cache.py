@@ -0,0 +1,153 @@
+import threading
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.graphql.cache import CacheHit, CachedFieldSlot
+from core.graphql.tests.fixtures import ApiClient
+from core.graphql.tests.utils import get_graphql_content
+from product.cache import batch_catalog_invalidation, get_catalog_cache, get_catalog_version
+from product.models import Collection, OptionValue, Product, ProductOption
+from stores.models import StaffMember
+
+PRODUCT_QUERY = '''
+query GetProduct($id: ID!) {
+    product(id: $id) {
+        productId
+        title
+        seo { title }
+        options { name values { name } }
+        firstVariant { stock }
+    }
+}
+'''
+
+
+def fetch_product(client, product):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post_graphql(PRODUCT_QUERY, {"id": str(product.id)})
+    return get_graphql_content(response, ignore_errors=True), len(queries)
+
+
+@pytest.mark.django_db
+def test_product_read_is_served_from_cache(staff_api_client, staff_member, product):
+    """Test that a repeated read only runs the permission checks."""
+    first_content, first_queries = fetch_product(staff_api_client, product)
+    second_content, second_queries = fetch_product(staff_api_client, product)
+
+    assert second_content["data"] == first_content["data"]
+    assert second_queries < first_queries
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("change", ["product", "variant", "option_value", "seo"])
+def test_catalog_changes_invalidate_cached_reads(
+    staff_api_client, staff_member, product, change
+):
+    """Test that saving any catalog model of the store bumps its version."""
+    fetch_product(staff_api_client, product)
+
+    if change == "product":
+        product.title = "Renamed"
+        product.save()
+    elif change == "variant":
+        product.first_variant.stock = 99
+        product.first_variant.save()
+    elif change == "option_value":
+        option = ProductOption.objects.create(product=product, name="Size")
+        OptionValue.objects.create(option=option, name="Large")
+    else:
+        product.seo.title = "New SEO title"
+        product.seo.save()
+
+    content, _ = fetch_product(staff_api_client, product)
+    product.refresh_from_db()
+    node = content["data"]["product"]
+    assert node["title"] == product.title
+    assert node["seo"]["title"] == product.seo.title
+    assert node["firstVariant"]["stock"] == product.first_variant.stock
+    assert node["options"] == [
+        {"name": option.name, "values": [{"name": value.name} for value in option.values.all()]}
+        for option in product.options.all()
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_only_defers_its_own_store(store, another_store, product):
+    """Test that changes to other stores are still invalidated during a batch."""
+    other_product = Product.objects.create(store=another_store, title="Other")
+    other_option = ProductOption.objects.create(product=other_product, name="Size")
+    own_version = get_catalog_version(store.pk)
+    other_version = get_catalog_version(another_store.pk)
+
+    with batch_catalog_invalidation(store.pk):
+        OptionValue.objects.create(
+            option=ProductOption.objects.create(product=product, name="Size"), name="Large")
+        assert get_catalog_version(store.pk) == own_version
+        OptionValue.objects.create(option=other_option, name="Large")
+        assert get_catalog_version(another_store.pk) != other_version
+
+    assert get_catalog_version(store.pk) != own_version
+
+
+@pytest.mark.django_db
+def test_cached_read_still_checks_permissions(staff_api_client, staff_member, store, product):
+    """Test that a cached read is not served to a staff member without access."""
+    fetch_product(staff_api_client, product)
+
+    other_user = get_user_model().objects.create_user(
+        email="other@example.com", password="password")
+    StaffMember.objects.create(user=other_user, store=store, is_store_owner=False)
+    content, _ = fetch_product(ApiClient(user=other_user), product)
+
+    assert content["data"]["product"] is None
+    assert content["errors"][0]["extensions"]["code"] == "PERMISSION_DENIED"
+
+
+def test_concurrent_misses_wait_for_the_first_worker():
+    """Test that only one worker recomputes a missing entry."""
+    cache = get_catalog_cache()
+    first = CachedFieldSlot("key")
+    first.read_through(cache, "namespace")
+
+    def finish_first():
+        first.save({"product": None})
+        first.release()
+
+    timer = threading.Timer(0.1, finish_first)
+    timer.start()
+    with pytest.raises(CacheHit) as hit:
+        CachedFieldSlot("key").read_through(cache, "namespace", lock_timeout=2)
+    timer.join()
+
+    assert hit.value.data == {"product": None}
+
+
+PRODUCTS_IN_COLLECTION_QUERY = '''
+query ProductsInCollection($defaultDomain: String!, $collectionId: ID!) {
+    allProducts(defaultDomain: $defaultDomain) {
+        edges { node { productId inCollection } }
+    }
+    productResourceCollection(collectionId: $collectionId) {
+        edges { node { productId } }
+    }
+}
+'''
+
+
+@pytest.mark.django_db
+def test_cached_read_depends_on_operation_variables(
+    staff_api_client, staff_member, store, product, collection
+):
+    """Test that fields reading variables directly are cached per variable value."""
+    other = Collection.objects.create(store=store, title="Other")
+    product.collections.add(collection)
+
+    for collection_id, expected in ((collection.pk, True), (other.pk, False)):
+        response = staff_api_client.post_graphql(PRODUCTS_IN_COLLECTION_QUERY, {
+            "defaultDomain": store.default_domain,
+            "collectionId": str(collection_id),
+        })
+        content = get_graphql_content(response)
+        nodes = [edge["node"] for edge in content["data"]["allProducts"]["edges"]]
+        assert nodes == [{"productId": product.pk, "inCollection": expected}]
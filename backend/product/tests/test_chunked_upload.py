@@ -0,0 +1,218 @@
+import base64
+import hashlib
+import io
+import os
+from datetime import timedelta
+import pytest
+from django.core.files import locks
+from django.core.management import call_command
+from django.http import UnreadablePostError
+from django.test.client import Client
+from PIL import Image as PILImage
+from rest_framework_simplejwt.tokens import RefreshToken
+from product.models import ChunkedUpload, Image
+from product.uploads import UploadError, append_chunk, create_upload, get_upload_path
+from stores.models import StaffMember
+
+
+def encode(value):
+    return base64.b64encode(value.encode() if isinstance(value, str) else value).decode()
+
+
+class InterruptedStream(io.BytesIO):
+    """A request body whose connection drops after its content."""
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise UnreadablePostError("Connection reset")
+        return data
+
+
+@pytest.fixture
+def upload_settings(settings, media_root, tmp_path_factory):
+    settings.PRODUCT_UPLOAD_TEMP_DIR = str(tmp_path_factory.mktemp("uploads"))
+    return settings
+
+
+@pytest.fixture
+def content(image_file_factory):
+    # Noise, so that the file spans several chunks.
+    return image_file_factory(picture=PILImage.effect_noise((120, 80), 64)).read()
+
+
+@pytest.fixture
+def upload_client(user):
+    token = RefreshToken.for_user(user).access_token
+    return Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+
+
+def start_upload(client, store, length, file_name="photo.png"):
+    return client.post(
+        "/p/uploads/",
+        HTTP_UPLOAD_LENGTH=str(length),
+        HTTP_UPLOAD_METADATA=f"filename {encode(file_name)},domain {encode(store.default_domain)}",
+    )
+
+
+def send_chunk(client, location, offset, data, **headers):
+    return client.generic(
+        "PATCH", location, data, content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset), **headers)
+
+
+@pytest.mark.django_db
+def test_chunked_upload_resumes_from_the_offset(
+    upload_settings, upload_client, content, store, staff_member
+):
+    """Test that an upload can be resumed and ends as a deduplicated image."""
+    response = start_upload(upload_client, store, len(content))
+    assert response.status_code == 201
+    assert response["Tus-Resumable"] == "1.0.0"
+    location = response["Location"]
+    assert location.startswith("http://api.nour.com/p/uploads/")
+
+    response = send_chunk(upload_client, location, 0, content[:1000])
+    assert response.status_code == 204
+    assert response["Upload-Offset"] == "1000"
+
+    # The client lost track of the offset: it asks, then resumes.
+    response = upload_client.head(location)
+    assert response["Upload-Offset"] == "1000"
+    assert response["Upload-Length"] == str(len(content))
+    response = send_chunk(upload_client, location, 0, content[:1000])
+    assert response.status_code == 409
+
+    response = send_chunk(upload_client, location, 1000, content[1000:])
+    assert response.status_code == 200
+    image = Image.objects.get(pk=response.json()["id"])
+    content_hash = hashlib.sha256(content).hexdigest()
+    assert image.content_hash == content_hash
+    assert image.image.name.endswith(f"{content_hash}.png")
+    assert image.image.read() == content
+    assert (image.width, image.height) == (120, 80)
+    assert os.listdir(upload_settings.PRODUCT_UPLOAD_TEMP_DIR) == []
+
+    # A retried final chunk gets the same image.
+    response = send_chunk(upload_client, location, 1000, content[1000:])
+    assert response.json()["id"] == str(image.pk)
+
+
+@pytest.mark.django_db
+def test_chunk_checksum_is_verified(
+    upload_settings, upload_client, content, store, staff_member
+):
+    """Test that a chunk not matching its checksum is discarded."""
+    location = start_upload(upload_client, store, len(content))["Location"]
+
+    response = send_chunk(
+        upload_client, location, 0, content[:500],
+        HTTP_UPLOAD_CHECKSUM=f"sha256 {encode(hashlib.sha256(b'other').digest())}")
+    assert response.status_code == 460
+    assert response["Upload-Offset"] == "0"
+
+    response = send_chunk(
+        upload_client, location, 0, content,
+        HTTP_UPLOAD_CHECKSUM=f"sha1 {encode(hashlib.sha1(content).digest())}")
+    assert response.status_code == 200
+    assert Image.objects.get().content_hash == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.django_db
+def test_interrupted_chunk_keeps_received_bytes(upload_settings, store, user):
+    """Test that the bytes received before a dropped connection are kept."""
+    upload = create_upload(store, user, "photo.png", 10)
+
+    with pytest.raises(UploadError):
+        append_chunk(upload, InterruptedStream(b"abcd"), 0)
+
+    upload.refresh_from_db()
+    assert upload.offset == 4
+    append_chunk(upload, io.BytesIO(b"efghij"), 4)
+    with open(get_upload_path(upload), "rb") as file:
+        assert file.read() == b"abcdefghij"
+
+    with pytest.raises(UploadError) as error:
+        append_chunk(upload, io.BytesIO(b"k"), 10)
+    assert error.value.status == 413
+
+
+@pytest.mark.django_db
+def test_chunked_upload_rejects_invalid_requests(
+    upload_settings, upload_client, store, staff_member
+):
+    upload_settings.PRODUCT_UPLOAD_MAX_SIZE = 100
+    assert start_upload(upload_client, store, 101).status_code == 413
+    assert upload_client.post(
+        "/p/uploads/", HTTP_UPLOAD_LENGTH="10",
+        HTTP_UPLOAD_METADATA=f"domain {encode(store.default_domain)}",
+    ).status_code == 400
+
+    location = start_upload(upload_client, store, 10)["Location"]
+    response = upload_client.generic(
+        "PATCH", location, b"abc", content_type="application/octet-stream",
+        HTTP_UPLOAD_OFFSET="0")
+    assert response.status_code == 415
+
+    response = upload_client.delete(location)
+    assert response.status_code == 204
+    assert not ChunkedUpload.objects.exists()
+    assert upload_client.head(location).status_code == 404
+
+
+@pytest.mark.django_db
+def test_chunked_upload_requires_staff_member(
+    upload_settings, upload_client, user, store, another_store, staff_member
+):
+    """Test that uploads need a staff member of the store, like image_upload."""
+    assert start_upload(upload_client, another_store, 10).status_code == 403
+
+    location = start_upload(upload_client, store, 10)["Location"]
+    StaffMember.objects.filter(pk=staff_member.pk).update(store=another_store)
+    assert send_chunk(upload_client, location, 0, b"abc").status_code == 403
+
+
+@pytest.mark.django_db
+def test_concurrent_chunks_do_not_overwrite_each_other(upload_settings, store, user):
+    """Test that a chunk is refused while another one is written or once it moved the offset."""
+    upload = create_upload(store, user, "photo.png", 10)
+    stale = ChunkedUpload.objects.get(pk=upload.pk)
+
+    with open(get_upload_path(upload), "r+b") as file:
+        locks.lock(file, locks.LOCK_EX)
+        with pytest.raises(UploadError) as error:
+            append_chunk(upload, io.BytesIO(b"abcd"), 0)
+        assert error.value.status == 423
+
+    append_chunk(upload, io.BytesIO(b"abcd"), 0)
+    with pytest.raises(UploadError) as error:
+        append_chunk(stale, io.BytesIO(b"wxyz"), 0)
+    assert error.value.status == 409
+    with open(get_upload_path(upload), "rb") as file:
+        assert file.read() == b"abcd"
+
+
+@pytest.mark.django_db
+def test_expired_uploads_are_deleted(upload_settings, upload_client, store, staff_member):
+    """Test that uploads past PRODUCT_UPLOAD_EXPIRY are refused, then cleaned up."""
+    location = start_upload(upload_client, store, 10)["Location"]
+    assert upload_client.head(location)["Upload-Expires"]
+    fresh = start_upload(upload_client, store, 10)["Location"]
+    upload = ChunkedUpload.objects.get(pk=location.rstrip("/").rsplit("/", 1)[1])
+    ChunkedUpload.objects.filter(pk=upload.pk).update(
+        created_at=upload.created_at - timedelta(seconds=upload_settings.PRODUCT_UPLOAD_EXPIRY))
+
+    assert upload_client.head(location).status_code == 410
+    assert send_chunk(upload_client, location, 0, b"abc").status_code == 410
+
+    leftover = os.path.join(upload_settings.PRODUCT_UPLOAD_TEMP_DIR, "gone.part")
+    open(leftover, "wb").close()
+    os.utime(leftover, (0, 0))
+    out = io.StringIO()
+    call_command("delete_expired_uploads", stdout=out)
+
+    assert "Deleted 1 expired uploads and 1 leftover files." in out.getvalue()
+    assert not ChunkedUpload.objects.filter(pk=upload.pk).exists()
+    assert not os.path.exists(get_upload_path(upload))
+    assert not os.path.exists(leftover)
+    assert send_chunk(upload_client, fresh, 0, b"abc").status_code == 204
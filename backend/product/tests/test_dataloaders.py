@@ -0,0 +1,99 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from core.models import SEO
+from product.models import Collection, Image, OptionValue, Product, ProductOption, ProductVariant
+from project.schema import schema
+
+PRODUCT_RESOURCE_COLLECTION_QUERY = '''
+query ProductResourceCollection($collectionId: ID!) {
+    productResourceCollection(collectionId: $collectionId) {
+        edges {
+            node {
+                productId
+                inCollection
+                seo { title }
+                image { imageId }
+                options { name values { name } }
+                collections { title productsCount seo { title } }
+                firstVariant {
+                    selectedOptions { name }
+                    pricing { amount currency }
+                }
+            }
+        }
+    }
+}
+'''
+
+
+def create_products(store, count):
+    collection = Collection.objects.create(store=store, title="Featured")
+    image = Image.objects.create(store=store, alt_text="Image")
+    for index in range(count):
+        product = Product.objects.create(
+            store=store, title=f"Product {index}",
+            seo=SEO.objects.create(title=f"Product {index}"))
+        variant = ProductVariant.objects.create(
+            product=product, price_amount=Decimal(10), stock=1)
+        variant.images.add(image)
+        option = ProductOption.objects.create(product=product, name="Size")
+        value = OptionValue.objects.create(option=option, name="Small")
+        OptionValue.objects.create(option=option, name="Large")
+        variant.selected_options.add(value)
+        product.first_variant = variant
+        product.save()
+        product.collections.add(collection)
+    return collection
+
+
+def execute_product_resource_collection(user, collection):
+    request = RequestFactory().post("/graphql")
+    request.user = user
+    with CaptureQueriesContext(connection) as queries:
+        result = schema.execute(
+            PRODUCT_RESOURCE_COLLECTION_QUERY,
+            variable_values={"collectionId": str(collection.id)},
+            context_value=request,
+        )
+    assert result.errors is None, result.errors
+    return result.data, len(queries)
+
+
+@pytest.mark.django_db
+def test_product_resource_collection_query_count_is_constant(user, store, staff_member):
+    """Test that nested product relations are batched regardless of page size."""
+    collection = create_products(store, 2)
+    _, small_page_queries = execute_product_resource_collection(user, collection)
+
+    create_products(store, 8)
+    data, large_page_queries = execute_product_resource_collection(user, collection)
+
+    assert len(data["productResourceCollection"]["edges"]) == 10
+    assert large_page_queries == small_page_queries
+
+
+@pytest.mark.django_db
+def test_product_resource_collection_batched_values(user, store, staff_member):
+    """Test that batched relations resolve to the same values as direct access."""
+    collection = create_products(store, 3)
+    data, _ = execute_product_resource_collection(user, collection)
+
+    for edge in data["productResourceCollection"]["edges"]:
+        node = edge["node"]
+        product = Product.objects.get(pk=node["productId"])
+        assert node["inCollection"] is True
+        assert node["seo"]["title"] == product.seo.title
+        assert node["image"]["imageId"] == product.first_variant.images.first().id
+        assert node["options"] == [
+            {"name": "Size", "values": [{"name": "Small"}, {"name": "Large"}]}
+        ]
+        assert node["collections"] == [
+            {"title": "Featured", "productsCount": 3, "seo": None}
+        ]
+        assert node["firstVariant"]["selectedOptions"] == [{"name": "Small"}]
+        assert node["firstVariant"]["pricing"] == {
+            "amount": 10.0, "currency": store.currency_code
+        }
@@ -0,0 +1,86 @@
+import io
+import pytest
+from django.core.management import call_command
+from product.importer import import_products
+from product.models import DESCRIPTION_EXCERPT_LENGTH, Product
+
+
+def description(*texts):
+    return {"blocks": [{"type": "paragraph", "data": {"text": text}} for text in texts]}
+
+
+@pytest.mark.django_db
+def test_save_stores_plaintext_and_excerpt(store):
+    """Test that saving a description stores its text and a capped excerpt."""
+    long_text = "word " * 100
+    product = Product.objects.create(
+        store=store, title="Lamp", description=description("A <b>bright</b> lamp", long_text))
+    product.refresh_from_db()
+
+    assert product.description_plaintext.startswith("A bright lamp word word")
+    assert len(product.description_excerpt) == DESCRIPTION_EXCERPT_LENGTH
+    assert product.description_excerpt.endswith("…")
+
+    product.description = None
+    product.save()
+    product.refresh_from_db()
+    assert product.description_plaintext == ""
+    assert product.description_excerpt == ""
+
+
+@pytest.mark.django_db
+def test_description_is_sanitized_once(store, monkeypatch):
+    """Test that the sanitizer does not run again when the value is written."""
+    field = Product._meta.get_field("description")
+    calls = []
+    monkeypatch.setattr(field, "_sanitizer_method", lambda value: calls.append(value) or value)
+
+    Product.objects.create(store=store, title="Lamp", description=description("Lamp"))
+
+    assert calls == []
+
+
+@pytest.mark.django_db
+def test_imported_products_store_plaintext(store):
+    """Test that bulk created products get their plain text too."""
+    content = '{"handle": "lamp", "title": "Lamp", "description": "Bright lamp"}\n'
+    list(import_products(store, io.StringIO(content), "jsonl"))
+
+    assert Product.objects.get(store=store).description_plaintext == "Bright lamp"
+
+
+@pytest.mark.django_db
+def test_backfill_description_plaintext(store):
+    """Test that the command fills the plain text of rows saved without it."""
+    products = [
+        Product.objects.create(store=store, title=f"Lamp {index}", description=description(f"Lamp {index}"))
+        for index in range(5)
+    ]
+    empty = Product.objects.create(store=store, title="Empty")
+    Product.objects.update(description_plaintext="", description_excerpt="")
+    out = io.StringIO()
+
+    call_command("backfill_description_plaintext", batch_size=2, stdout=out)
+
+    assert out.getvalue().strip() == "Updated 5 products."
+    for index, product in enumerate(products):
+        product.refresh_from_db()
+        assert product.description_plaintext == f"Lamp {index}"
+        assert product.description_excerpt == f"Lamp {index}"
+    empty.refresh_from_db()
+    assert empty.description_plaintext == ""
+
+
+@pytest.mark.django_db
+def test_backfill_all_clears_stale_plaintext(store):
+    """Test that `--all` rewrites text that no longer matches, even when empty."""
+    product = Product.objects.create(
+        store=store, title="Lamp", description={"blocks": []})
+    Product.objects.update(description_plaintext="Old text", description_excerpt="Old text")
+    out = io.StringIO()
+
+    call_command("backfill_description_plaintext", all=True, stdout=out)
+
+    assert out.getvalue().strip() == "Updated 1 products."
+    product.refresh_from_db()
+    assert (product.description_plaintext, product.description_excerpt) == ("", "")
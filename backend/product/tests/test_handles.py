@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from product import models
+from product.models import Collection, Product
+
+
+def count_handle_lookups(queries):
+    return len([
+        query for query in queries
+        if query["sql"].startswith("SELECT") and "LIKE" in query["sql"]
+    ])
+
+
+@pytest.mark.django_db
+def test_duplicate_titles_get_numbered_handles(store):
+    """Test that duplicate titles get increasing suffixes."""
+    handles = [Product.objects.create(store=store, title="T-Shirt").handle for _ in range(4)]
+
+    assert handles == ["t-shirt", "t-shirt-1", "t-shirt-2", "t-shirt-3"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("existing", [1, 30])
+def test_handle_allocation_uses_one_lookup(store, existing):
+    """Test that the number of queries does not depend on the taken suffixes."""
+    for _ in range(existing):
+        Product.objects.create(store=store, title="T-Shirt")
+
+    with CaptureQueriesContext(connection) as queries:
+        product = Product.objects.create(store=store, title="T-Shirt")
+
+    assert product.handle == f"t-shirt-{existing}"
+    assert count_handle_lookups(queries) == 1
+
+
+@pytest.mark.django_db
+def test_unique_handle_is_saved_without_lookup(store):
+    """Test that a free handle and an unchanged one are saved directly."""
+    with CaptureQueriesContext(connection) as queries:
+        product = Product.objects.create(store=store, title="Mug")
+        product.title = "Big mug"
+        product.save()
+
+    assert product.handle == "mug"
+    assert count_handle_lookups(queries) == 0
+
+
+@pytest.mark.django_db
+def test_concurrent_handle_conflict_is_retried(store, monkeypatch):
+    """Test that a suffix taken between the lookup and the insert is retried."""
+    Product.objects.create(store=store, title="Hat")
+    Product.objects.create(store=store, title="Hat")
+    get_taken_handles = models.get_taken_handles
+    stale_lookups = iter([{"hat"}])
+
+    def get_stale_taken_handles(queryset, base_handles):
+        # The first lookup misses the `hat-1` saved by a concurrent request.
+        return next(stale_lookups, None) or get_taken_handles(queryset, base_handles)
+
+    monkeypatch.setattr(models, "get_taken_handles", get_stale_taken_handles)
+    product = Product.objects.create(store=store, title="Hat")
+
+    assert product.handle == "hat-2"
+
+
+@pytest.mark.django_db
+def test_collection_handles_are_unique(store):
+    """Test that collections allocate handles the same way."""
+    handles = [
+        Collection.objects.create(store=store, title="Summer", handle="Summer Sale").handle
+        for _ in range(3)
+    ]
+
+    assert handles == ["summer-sale", "summer-sale-1", "summer-sale-2"]
+
+
+@pytest.mark.django_db
+def test_allocate_unique_handles_in_bulk(store):
+    """Test that a batch of handles is allocated with one lookup."""
+    Product.objects.create(store=store, title="Lamp")
+
+    with CaptureQueriesContext(connection) as queries:
+        handles = Product.allocate_unique_handles(store, ["lamp", "lamp", "desk"])
+
+    assert handles == ["lamp-1", "lamp-2", "desk"]
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_title_without_slug_gets_default_handle(store):
+    """Test that a title slugify drops entirely does not look up every handle."""
+    Product.objects.create(store=store, title="Mug")
+    Collection.objects.create(store=store, title="Summer")
+
+    with CaptureQueriesContext(connection) as queries:
+        handles = [Collection.objects.create(store=store, title="سلة").handle for _ in range(2)]
+
+    assert handles == ["collection", "collection-1"]
+    assert count_handle_lookups(queries) == 1
+    assert Product.objects.create(store=store, title="商品").handle == "product"
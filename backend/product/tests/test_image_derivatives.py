@@ -0,0 +1,172 @@
+import io
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test.client import Client
+from PIL import Image as PILImage
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.graphql.tests.utils import get_graphql_content
+from product.images import generate_image_derivatives, save_product_image
+from product.models import Image
+
+ALL_MEDIA_IMAGES_QUERY = '''
+query AllMediaImages($defaultDomain: String!) {
+    allMediaImages(defaultDomain: $defaultDomain, first: 1) {
+        edges {
+            node {
+                original: url
+                small: url(size: 100)
+                smallWebp: url(size: 100, format: WEBP)
+                medium: url(size: 200)
+                huge: url(size: 2000)
+            }
+        }
+    }
+}
+'''
+# Larger than the two smallest PRODUCT_IMAGE_SIZES of media_settings.
+SIZE = (600, 300)
+
+
+@pytest.fixture
+def media_settings(settings, media_root):
+    settings.PRODUCT_IMAGE_SIZES = [128, 256, 1024]
+    return settings
+
+
+@pytest.mark.django_db
+def test_generate_image_derivatives(media_settings, image_file_factory, store):
+    """Test that every size below the original is saved in its format and as WebP."""
+    image = Image.objects.create(store=store, image=image_file_factory(size=SIZE))
+
+    derivatives = generate_image_derivatives(image.pk)
+
+    image.refresh_from_db()
+    assert image.derivatives == derivatives
+    assert set(derivatives) == {"128", "256"}
+    storage = image.image.storage
+    for size, names in derivatives.items():
+        assert names["original"].endswith(f"_{size}.png")
+        assert names["webp"].endswith(f"_{size}.webp")
+        for image_format, name in (("PNG", names["original"]), ("WEBP", names["webp"])):
+            with storage.open(name) as file, PILImage.open(file) as picture:
+                assert picture.format == image_format
+                assert picture.size == (int(size), int(size) // 2)
+
+
+@pytest.mark.django_db
+def test_generate_image_derivatives_skips_existing_sizes(media_settings, image_file_factory, store):
+    """Test that running the generation again does not write the files again."""
+    image = Image.objects.create(store=store, image=image_file_factory(size=SIZE))
+    first = generate_image_derivatives(image.pk)
+
+    media_settings.PRODUCT_IMAGE_SIZES = [128, 256, 512]
+    second = generate_image_derivatives(image.pk)
+
+    assert set(second) == {"128", "256", "512"}
+    assert {size: second[size] for size in first} == first
+    assert generate_image_derivatives(Image.objects.create(store=store).pk) is None
+
+
+@pytest.mark.django_db
+def test_upload_generates_derivatives_on_commit(
+    media_settings, image_file_factory, user, store, staff_member, django_capture_on_commit_callbacks
+):
+    """Test that uploads generate their derivatives after the response is built."""
+    token = RefreshToken.for_user(user).access_token
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post("/p/upload/", {
+            "file": image_file_factory("photo.jpg", size=SIZE),
+            "domain": store.default_domain,
+        })
+
+    assert response.status_code == 200
+    image = Image.objects.get(pk=response.json()["id"])
+    assert image.derivatives["256"]["original"].endswith("_256.jpg")
+
+
+@pytest.mark.django_db
+def test_image_url_picks_the_closest_size(
+    media_settings, image_file_factory, staff_api_client, staff_member, store
+):
+    """Test that urls use the smallest size covering the request, else the original."""
+    image = Image.objects.create(store=store, image=image_file_factory(size=SIZE))
+    response = staff_api_client.post_graphql(
+        ALL_MEDIA_IMAGES_QUERY, {"defaultDomain": store.default_domain})
+    node = get_graphql_content(response)["data"]["allMediaImages"]["edges"][0]["node"]
+    # Derivatives are not generated yet.
+    assert set(node.values()) == {image.image.url}
+
+    derivatives = generate_image_derivatives(image.pk)
+    response = staff_api_client.post_graphql(
+        ALL_MEDIA_IMAGES_QUERY, {"defaultDomain": store.default_domain})
+    node = get_graphql_content(response)["data"]["allMediaImages"]["edges"][0]["node"]
+
+    storage = image.image.storage
+    assert node == {
+        "original": image.image.url,
+        "small": storage.url(derivatives["128"]["original"]),
+        "smallWebp": storage.url(derivatives["128"]["webp"]),
+        "medium": storage.url(derivatives["256"]["original"]),
+        # Larger than the original: no 1024 copy exists.
+        "huge": image.image.url,
+    }
+
+
+@pytest.mark.django_db
+def test_generate_image_derivatives_command(media_settings, image_file_factory, store):
+    """Test that the command catches up on images without derivatives."""
+    pending = Image.objects.create(store=store, image=image_file_factory(size=SIZE))
+    Image.objects.create(store=store)
+
+    call_command("generate_image_derivatives", stdout=io.StringIO())
+
+    pending.refresh_from_db()
+    assert set(pending.derivatives) == {"128", "256"}
+
+
+@pytest.mark.django_db
+def test_processed_images_are_not_opened_again(
+    media_settings, image_file_factory, store, django_capture_on_commit_callbacks, monkeypatch
+):
+    """Test that small and unreadable images are marked, so they are not retried."""
+    with django_capture_on_commit_callbacks(execute=True):
+        small = save_product_image(store, image_file_factory(size=(100, 50)))
+        broken = save_product_image(store, SimpleUploadedFile("broken.png", b"not an image"))
+    small.refresh_from_db()
+    broken.refresh_from_db()
+    assert (small.derivatives, small.derivatives_status) == ({}, "DONE")
+    assert broken.derivatives_status == "FAILED"
+
+    calls = []
+    monkeypatch.setattr(
+        "product.images.generate_image_derivatives", lambda image_id: calls.append(image_id))
+    with django_capture_on_commit_callbacks(execute=True):
+        duplicate = save_product_image(store, image_file_factory("again.png", size=(100, 50)))
+    assert duplicate.derivatives_status == "DONE"
+    assert calls == []
+    monkeypatch.undo()
+
+    out = io.StringIO()
+    call_command("generate_image_derivatives", stdout=out, stderr=io.StringIO())
+    assert "Generated derivatives of 0 images." in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_unreadable_upload_without_workers(
+    media_settings, user, store, staff_member, django_capture_on_commit_callbacks
+):
+    """Test that failing to generate derivatives inline does not fail the upload."""
+    token = RefreshToken.for_user(user).access_token
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post("/p/upload/", {
+            "file": SimpleUploadedFile("broken.png", b"not an image"),
+            "domain": store.default_domain,
+        })
+
+    assert response.status_code == 200
+    assert Image.objects.get(pk=response.json()["id"]).derivatives_status == "FAILED"
@@ -0,0 +1,138 @@
+import io
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image as PILImage
+from core.graphql.tests.utils import get_graphql_content
+from product.images import get_image_metadata, save_product_image
+from product.models import Image
+
+ALL_MEDIA_IMAGES_QUERY = '''
+query AllMediaImages($defaultDomain: String!) {
+    allMediaImages(defaultDomain: $defaultDomain, first: 1) {
+        edges {
+            node { width height byteSize mimeType dominantColor blurhash }
+        }
+    }
+}
+'''
+
+
+def test_get_image_metadata(image_file_factory):
+    """Test the dimensions, size, type and colors read from a file."""
+    picture = PILImage.new("RGB", (60, 30), (0, 0, 255))
+    # A red band over a third of the picture.
+    picture.paste((255, 0, 0), (0, 0, 60, 10))
+    file = image_file_factory(picture=picture)
+
+    metadata = get_image_metadata(file)
+
+    assert metadata["width"] == 60
+    assert metadata["height"] == 30
+    assert metadata["byte_size"] == file.size
+    assert metadata["mime_type"] == "image/png"
+    assert metadata["dominant_color"] == "#0000ff"
+    assert len(metadata["blurhash"]) == 28
+    assert file.tell() == 0
+
+
+def test_get_image_metadata_follows_exif_orientation(image_file_factory):
+    """Test that quarter turned photos report their displayed dimensions."""
+    exif = PILImage.Exif()
+    exif[0x0112] = 6
+
+    metadata = get_image_metadata(image_file_factory("picture.jpeg", exif=exif))
+
+    assert (metadata["width"], metadata["height"]) == (30, 60)
+    assert metadata["mime_type"] == "image/jpeg"
+
+
+@pytest.mark.django_db
+def test_upload_records_metadata(
+    media_root, image_file_factory, staff_api_client, staff_member, store
+):
+    """Test that uploads record the metadata and expose it on ImageNode."""
+    image = save_product_image(store, image_file_factory())
+    duplicate = save_product_image(store, image_file_factory())
+
+    response = staff_api_client.post_graphql(
+        ALL_MEDIA_IMAGES_QUERY, {"defaultDomain": store.default_domain})
+    node = get_graphql_content(response)["data"]["allMediaImages"]["edges"][0]["node"]
+
+    assert node == {
+        "width": 60,
+        "height": 30,
+        "byteSize": image.byte_size,
+        "mimeType": "image/png",
+        "dominantColor": "#0000ff",
+        "blurhash": image.blurhash,
+    }
+    assert duplicate.blurhash == image.blurhash
+
+
+@pytest.mark.django_db
+def test_unreadable_upload_has_no_metadata(media_root, store):
+    image = save_product_image(store, SimpleUploadedFile("notes.png", b"not an image"))
+
+    image.refresh_from_db()
+    assert image.width is None
+    assert image.blurhash == ""
+
+
+@pytest.mark.django_db
+def test_truncated_or_oversized_upload_has_no_metadata(
+    media_root, image_file_factory, store, monkeypatch
+):
+    """Test that files Pillow fails to decode are still saved, without metadata."""
+    content = image_file_factory("picture.jpeg").read()
+    truncated = save_product_image(store, SimpleUploadedFile("cut.jpeg", content[:-100]))
+    monkeypatch.setattr(PILImage, "MAX_IMAGE_PIXELS", 100)
+    large = image_file_factory()
+    bomb = save_product_image(store, large)
+
+    for image in (truncated, bomb):
+        image.refresh_from_db()
+        assert image.width is None
+        assert image.blurhash == ""
+    assert truncated.image.read() == content[:-100]
+    assert bomb.image.size == large.size
+
+
+@pytest.mark.django_db
+def test_backfill_image_metadata(media_root, image_file_factory, store):
+    """Test that the command fills images saved without metadata, in batches."""
+    images = [
+        Image.objects.create(store=store, image=image_file_factory(size=size))
+        for size in ((20, 10), (30, 40), (50, 50))
+    ]
+    broken = Image.objects.create(store=store, image=SimpleUploadedFile("a.png", b"broken"))
+    Image.objects.create(store=store)
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    call_command("backfill_image_metadata", batch_size=2, stdout=stdout, stderr=stderr)
+
+    for image, size in zip(images, ((20, 10), (30, 40), (50, 50))):
+        image.refresh_from_db()
+        assert (image.width, image.height) == size
+        assert image.dominant_color == "#0000ff"
+        assert image.byte_size == image.image.size
+    assert "Updated 3 images." in stdout.getvalue()
+    assert f"Image {broken.pk}" in stderr.getvalue()
+
+
+@pytest.mark.django_db
+def test_backfill_image_metadata_skips_oversized_images(
+    media_root, image_file_factory, store, monkeypatch
+):
+    """Test that an image over MAX_IMAGE_PIXELS does not stop the command."""
+    bomb = Image.objects.create(store=store, image=image_file_factory(size=(100, 100)))
+    image = Image.objects.create(store=store, image=image_file_factory(size=(20, 10)))
+    monkeypatch.setattr(PILImage, "MAX_IMAGE_PIXELS", 1000)
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    call_command("backfill_image_metadata", stdout=stdout, stderr=stderr)
+
+    image.refresh_from_db()
+    assert (image.width, image.height) == (20, 10)
+    assert "Updated 1 images." in stdout.getvalue()
+    assert f"Image {bomb.pk}" in stderr.getvalue()
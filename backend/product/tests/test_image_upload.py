@@ -0,0 +1,90 @@
+import hashlib
+import pytest
+from django.test.client import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from product.images import generate_image_derivatives, save_product_image
+from product.models import Image
+
+
+@pytest.mark.django_db
+def test_upload_stores_images_by_content(
+    media_root, image_file_factory, user, store, staff_member
+):
+    """Test that uploads are saved under their digest, once per store."""
+    client = Client(
+        HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}",
+        SERVER_NAME="api.nour.com",
+    )
+    upload = image_file_factory()
+    content_hash = hashlib.sha256(upload.read()).hexdigest()
+    upload.seek(0)
+
+    responses = [
+        client.post("/p/upload/", {"file": upload_file, "domain": store.default_domain})
+        for upload_file in (upload, image_file_factory("copy.png"))
+    ]
+
+    assert [response.status_code for response in responses] == [200, 200]
+    images = Image.objects.filter(pk__in=[response.json()["id"] for response in responses])
+    assert len(images) == 2
+    assert {image.content_hash for image in images} == {content_hash}
+    assert {image.image.name for image in images} == {
+        f"product_images/{store.pk}/{content_hash[:2]}/{content_hash}.png"}
+    assert len(list(media_root.rglob("*.png"))) == 1
+
+
+@pytest.mark.django_db
+def test_duplicate_upload_reuses_derivatives(
+    settings, media_root, image_file_factory, store, django_capture_on_commit_callbacks
+):
+    """Test that a duplicate reuses the derivatives instead of generating them."""
+    settings.PRODUCT_IMAGE_SIZES = [16]
+    with django_capture_on_commit_callbacks(execute=True):
+        first = save_product_image(store, image_file_factory())
+    first.refresh_from_db()
+    assert first.derivatives
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second = save_product_image(store, image_file_factory("again.png"))
+
+    assert second.pk != first.pk
+    assert second.image.name == first.image.name
+    assert second.derivatives == first.derivatives
+    assert len(list(media_root.rglob("*.png"))) == 2
+
+
+@pytest.mark.django_db
+def test_duplicate_of_pending_image_generates_derivatives_once(
+    settings, media_root, image_file_factory, store, django_capture_on_commit_callbacks
+):
+    """Test that a duplicate schedules missing derivatives, shared by both images."""
+    settings.PRODUCT_IMAGE_SIZES = [16]
+    with django_capture_on_commit_callbacks(execute=False):
+        # The derivatives of the first upload are still pending.
+        first = save_product_image(store, image_file_factory())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second = save_product_image(store, image_file_factory("again.png"))
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.derivatives
+    assert second.derivatives == first.derivatives
+    assert generate_image_derivatives(first.pk) == first.derivatives
+    assert len(list(media_root.rglob("*.png"))) == 2
+    assert len(list(media_root.rglob("*.webp"))) == 1
+
+
+@pytest.mark.django_db
+def test_images_are_not_shared_between_stores(
+    media_root, image_file_factory, store, another_store
+):
+    """Test that another store uploading the same file gets its own copy."""
+    image = save_product_image(store, image_file_factory())
+    other = save_product_image(another_store, image_file_factory())
+    different = save_product_image(store, image_file_factory(color=(0, 0, 0)))
+
+    assert other.content_hash == image.content_hash
+    assert other.image.name != image.image.name
+    assert different.image.name != image.image.name
+    assert len(list(media_root.rglob("*.png"))) == 3
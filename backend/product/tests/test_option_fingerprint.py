@@ -0,0 +1,156 @@
+import io
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.graphql.tests.utils import get_graphql_content
+from product.importer import import_products
+from product.models import OptionValue, Product, ProductOption, ProductVariant
+from product.utils import (
+    add_values_to_variant, get_variant_by_option_values, update_product_options_and_values)
+
+VARIANT_BY_OPTIONS_QUERY = '''
+query VariantByOptions($id: ID!, $optionValueIds: [ID!]!) {
+    product(id: $id) {
+        variantByOptions(optionValueIds: $optionValueIds) { variantId }
+    }
+}
+'''
+
+
+@pytest.fixture
+def sized_product(product):
+    color = ProductOption.objects.create(product=product, name="Color")
+    size = ProductOption.objects.create(product=product, name="Size")
+    values = {
+        name: OptionValue.objects.create(option=option, name=name)
+        for option, names in ((color, ["Red", "Blue"]), (size, ["M", "XL"]))
+        for name in names
+    }
+    return product, values
+
+
+@pytest.mark.django_db
+def test_fingerprint_follows_selected_options(sized_product):
+    """Test that the fingerprint is kept in sync with the selected values."""
+    product, values = sized_product
+    variant = ProductVariant.objects.create(product=product)
+
+    add_values_to_variant(variant, [values["XL"].pk, values["Red"].pk])
+    variant.refresh_from_db()
+    assert variant.option_fingerprint == "-".join(
+        str(pk) for pk in sorted([values["XL"].pk, values["Red"].pk]))
+
+    variant.selected_options.remove(values["XL"])
+    assert variant.option_fingerprint == str(values["Red"].pk)
+    values["Blue"].variants.add(variant)
+    variant.refresh_from_db()
+    assert variant.option_fingerprint == "-".join(
+        str(pk) for pk in sorted([values["Red"].pk, values["Blue"].pk]))
+
+    add_values_to_variant(variant, [])
+    variant.refresh_from_db()
+    assert variant.option_fingerprint is None
+
+
+@pytest.mark.django_db
+def test_duplicate_combination_check_is_one_query(sized_product):
+    """Test that the duplicate check does not load the other variants."""
+    product, values = sized_product
+    existing = ProductVariant.objects.create(product=product)
+    add_values_to_variant(existing, [values["Red"].pk, values["XL"].pk])
+    for name in ("M", "XL"):
+        other = ProductVariant.objects.create(product=product)
+        add_values_to_variant(other, [values["Blue"].pk, values[name].pk])
+    variant = ProductVariant.objects.create(product=product)
+
+    with CaptureQueriesContext(connection) as queries:
+        with pytest.raises(ValidationError, match=f"Variant ID: {existing.pk}"):
+            add_values_to_variant(variant, [values["XL"].pk, values["Red"].pk])
+
+    assert len(queries) == 2
+
+
+@pytest.mark.django_db
+def test_get_variant_by_option_values(staff_api_client, staff_member, sized_product):
+    """Test the "which variant is Red/XL" lookup, also through GraphQL."""
+    product, values = sized_product
+    variant = ProductVariant.objects.create(product=product)
+    add_values_to_variant(variant, [values["Red"].pk, values["XL"].pk])
+
+    assert get_variant_by_option_values(product, [values["XL"].pk, values["Red"].pk]) == variant
+    assert get_variant_by_option_values(product, [values["Red"].pk]) is None
+
+    response = staff_api_client.post_graphql(VARIANT_BY_OPTIONS_QUERY, {
+        "id": str(product.pk),
+        "optionValueIds": [str(values["XL"].pk), str(values["Red"].pk)],
+    })
+    content = get_graphql_content(response)
+    assert content["data"]["product"]["variantByOptions"] == {"variantId": variant.pk}
+
+
+@pytest.mark.django_db
+def test_deleted_values_refresh_fingerprints(sized_product):
+    """Test that removing an option re-fingerprints variants and drops duplicates."""
+    product, values = sized_product
+    red_xl = ProductVariant.objects.create(product=product)
+    add_values_to_variant(red_xl, [values["Red"].pk, values["XL"].pk])
+    blue_xl = ProductVariant.objects.create(product=product)
+    add_values_to_variant(blue_xl, [values["Blue"].pk, values["XL"].pk])
+    size = values["XL"].option
+
+    update_product_options_and_values(product, [
+        {"id": size.pk, "name": size.name, "values": [
+            {"id": value.pk, "name": value.name} for value in size.values.all()
+        ]},
+    ])
+
+    red_xl.refresh_from_db()
+    blue_xl.refresh_from_db()
+    assert red_xl.option_fingerprint == str(values["XL"].pk)
+    assert blue_xl.option_fingerprint is None
+
+
+@pytest.mark.django_db
+def test_deleting_a_value_refreshes_fingerprints(sized_product):
+    """Test that a value deleted outside the options update re-fingerprints its variants."""
+    product, values = sized_product
+    variant = ProductVariant.objects.create(product=product)
+    add_values_to_variant(variant, [values["Red"].pk, values["XL"].pk])
+
+    values["XL"].delete()
+
+    variant.refresh_from_db()
+    assert variant.option_fingerprint == str(values["Red"].pk)
+
+
+@pytest.mark.django_db
+def test_deleting_an_option_drops_duplicate_fingerprints(sized_product):
+    """Test that variants left with the same values keep one fingerprint."""
+    product, values = sized_product
+    red_xl = ProductVariant.objects.create(product=product)
+    add_values_to_variant(red_xl, [values["Red"].pk, values["XL"].pk])
+    red_m = ProductVariant.objects.create(product=product)
+    add_values_to_variant(red_m, [values["Red"].pk, values["M"].pk])
+
+    values["XL"].option.delete()
+
+    red_xl.refresh_from_db()
+    red_m.refresh_from_db()
+    assert red_xl.option_fingerprint == str(values["Red"].pk)
+    assert red_m.option_fingerprint is None
+
+
+@pytest.mark.django_db
+def test_imported_variants_are_fingerprinted(store):
+    """Test that bulk imported variants get their fingerprint."""
+    content = (
+        "handle,title,sku,option1_name,option1_value\n"
+        "cap,Cap,CAP-S,Size,S\n"
+        "cap,,CAP-M,Size,M\n"
+    )
+    list(import_products(store, io.StringIO(content), "csv"))
+
+    product = Product.objects.get(store=store, title="Cap")
+    for variant in product.variants.all():
+        assert variant.option_fingerprint == str(variant.selected_options.get().pk)
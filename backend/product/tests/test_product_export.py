@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from product.exporter import export_products
+from product.importer import import_products
+from product.models import OptionValue, Product, ProductVariant
+
+
+def read_csv(lines):
+    return list(csv.DictReader(io.StringIO("".join(lines))))
+
+
+@pytest.fixture
+def exported_product(product, collection, product_image, red_option_value):
+    product.collections.add(collection)
+    product_image.image.name = "product_images/shirt.png"
+    product_image.save()
+    variant = product.first_variant
+    variant.selected_options.add(red_option_value)
+    variant.images.add(product_image)
+    second_variant = ProductVariant.objects.create(
+        product=product, sku="456", price_amount=Decimal(12), compare_at_price=Decimal(15))
+    second_variant.selected_options.add(
+        OptionValue.objects.create(option=red_option_value.option, name="Blue"))
+    return product
+
+
+@pytest.mark.django_db
+def test_export_csv_rows(store, exported_product, collection):
+    """Test that every variant is exported with its product, options and images."""
+    rows = read_csv(export_products(store, "csv"))
+
+    assert [row["sku"] for row in rows] == ["123", "456"]
+    first = rows[0]
+    assert first["handle"] == exported_product.handle
+    assert first["title"] == exported_product.title
+    assert first["price"] == "10.000"
+    assert (first["option1_name"], first["option1_value"]) == ("Color", "Red")
+    assert first["collections"] == collection.handle
+    assert first["image_urls"] == "/media/product_images/shirt.png"
+    assert rows[1]["compare_at_price"] == "15.000"
+    assert rows[1]["option1_value"] == "Blue"
+
+
+@pytest.mark.django_db
+def test_export_csv_description_without_plaintext(store, exported_product):
+    """Test that products saved before the plain text column still export their text."""
+    Product.objects.filter(pk=exported_product.pk).update(
+        description={"blocks": [{"type": "paragraph", "data": {"text": "Soft <b>cotton</b>"}}]},
+        description_plaintext="")
+
+    rows = read_csv(export_products(store, "csv"))
+
+    assert rows[0]["description"] == "Soft cotton"
+
+
+@pytest.mark.django_db
+def test_export_jsonl_rows(store, exported_product):
+    """Test that JSON Lines rows keep the description and option names."""
+    rows = [json.loads(line) for line in export_products(store, "jsonl")]
+
+    assert rows[0]["product_id"] == exported_product.pk
+    assert rows[0]["options"] == {"Color": "Red"}
+    assert rows[1]["options"] == {"Color": "Blue"}
+
+
+@pytest.mark.django_db
+def test_export_prefetches_once_per_chunk(store):
+    """Test that related rows are queried once per chunk, not per variant."""
+    for index in range(5):
+        product = Product.objects.create(store=store, title=f"Product {index}")
+        product.first_variant = ProductVariant.objects.create(product=product)
+        product.save()
+
+    with CaptureQueriesContext(connection) as queries:
+        rows = read_csv(export_products(store, "csv", chunk_size=2))
+
+    assert len(rows) == 5
+    # One variant query plus three prefetches for each of the three chunks.
+    assert len(queries) == 1 + 3 * 3
+
+
+@pytest.mark.django_db
+def test_exported_csv_can_be_imported(store, another_store, exported_product):
+    """Test that an export round-trips through the importer."""
+    ProductVariant.objects.filter(product=exported_product).update(sku=None)
+    exported_product.collections.clear()
+
+    reports = list(import_products(
+        another_store, io.StringIO("".join(export_products(store, "csv"))), "csv"))
+
+    assert reports[-1].errors == []
+    product = Product.objects.get(store=another_store)
+    assert product.handle == exported_product.handle
+    assert product.variants.count() == 2
+    assert [option.name for option in product.options.all()] == ["Color"]
+    assert product.options.get().values.count() == 2
+
+
+@pytest.mark.django_db
+def test_export_endpoint_streams_file(user, store, staff_member, exported_product):
+    """Test that the endpoint streams the export as an attachment."""
+    token = RefreshToken.for_user(user).access_token
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+
+    response = client.get("/p/export/", {"domain": store.default_domain, "format": "jsonl"})
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert "attachment" in response["Content-Disposition"]
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line)["sku"] for line in lines] == ["123", "456"]
+
+
+@pytest.mark.django_db
+def test_export_endpoint_requires_permission(user, store, staff_member_with_no_permissions):
+    """Test that staff without the view permission cannot export."""
+    token = RefreshToken.for_user(user).access_token
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+
+    response = client.get("/p/export/", {"domain": store.default_domain})
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_export_command(store, exported_product):
+    """Test that the command writes the export to standard output."""
+    out = io.StringIO()
+
+    call_command("export_products", domain=store.default_domain, stdout=out)
+
+    assert [row["sku"] for row in read_csv(out.getvalue())] == ["123", "456"]
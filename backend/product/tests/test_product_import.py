@@ -0,0 +1,186 @@
+import io
+import json
+import pytest
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from product.importer import import_products
+from product.models import Product
+
+CSV_HEADER = (
+    "handle,title,status,sku,price,compare_at_price,stock,"
+    "option1_name,option1_value,option2_name,option2_value,collections\n"
+)
+
+
+def run_import(store, content, file_format="csv", chunk_size=None):
+    reports = list(import_products(
+        store, io.StringIO(content), file_format, chunk_size=chunk_size))
+    return reports[-1]
+
+
+def make_csv(count, prefix="p"):
+    return CSV_HEADER + "".join(
+        f",Product {prefix}{index},ACTIVE,{prefix}-{index},10,,1,,,,,\n"
+        for index in range(count)
+    )
+
+
+@pytest.mark.django_db
+def test_import_csv_creates_products_with_variants(store, collection):
+    """Test that grouped rows create one product with its variants and options."""
+    collection.handle = "summer"
+    collection.save()
+    Product.objects.create(store=store, title="T-Shirt")
+    content = CSV_HEADER + (
+        f"t-shirt,T-Shirt,ACTIVE,TS-S-R,10.5,12,5,Size,S,Color,Red,{collection.handle}\n"
+        "t-shirt,,,TS-M-R,11,,3,Size,M,Color,Red,\n"
+        "t-shirt,,,TS-M-B,11,,0,Size,M,Color,Blue,\n"
+        ",Mug,,MUG,4,,1,,,,,\n"
+    )
+
+    report = run_import(store, content)
+
+    assert report.errors == []
+    assert (report.rows, report.products, report.variants) == (4, 2, 4)
+    product = Product.objects.get(store=store, title="T-Shirt", status="ACTIVE")
+    assert product.handle == "t-shirt-1"
+    assert product.seo.title == "T-Shirt"
+    assert list(product.collections.all()) == [collection]
+    variants = list(product.variants.order_by("sort_order"))
+    assert [variant.sku for variant in variants] == ["TS-S-R", "TS-M-R", "TS-M-B"]
+    assert [variant.sort_order for variant in variants] == [0, 1024, 2048]
+    assert product.first_variant == variants[0]
+    assert variants[0].price_amount == Decimal("10.5")
+    assert variants[0].compare_at_price == Decimal("12")
+    assert {
+        option.name: [value.name for value in option.values.order_by("pk")]
+        for option in product.options.all()
+    } == {"Size": ["S", "M"], "Color": ["Red", "Blue"]}
+    assert sorted(value.name for value in variants[2].selected_options.all()) == ["Blue", "M"]
+    mug = Product.objects.get(store=store, title="Mug")
+    assert (mug.handle, mug.status, mug.first_variant.sku) == ("mug", "DRAFT", "MUG")
+
+
+@pytest.mark.django_db
+def test_import_reports_row_errors(store, product):
+    """Test that a product with an invalid row is skipped and its rows reported."""
+    product.first_variant.sku = "TAKEN"
+    product.first_variant.save()
+    content = CSV_HEADER + (
+        "shirt,Shirt,,S-1,10,5,1,,,,,\n"
+        ",Lamp,,L-1,abc,,1,,,,,\n"
+        ",Chair,,TAKEN,1,,1,,,,,\n"
+        ",Table,,,1,,1,,,,,missing\n"
+        ",,,,1,,1,,,,,\n"
+        ",Desk,,D-1,20,,2,,,,,\n"
+    )
+
+    report = run_import(store, content)
+
+    assert report.products == 1
+    assert Product.objects.filter(store=store, title="Desk").exists()
+    assert report.errors == [
+        {"row": 2, "message": "Compare at price must be greater than or equal to price."},
+        {"row": 3, "message": "Price must be a number."},
+        {"row": 6, "message": "Product title cannot be empty."},
+        {"row": 4, "message": "SKU TAKEN already exists."},
+        {"row": 5, "message": "Collection not found: missing."},
+    ]
+
+
+@pytest.mark.django_db
+def test_import_jsonl(store):
+    """Test JSON Lines rows with an options object, and a malformed line."""
+    lines = [
+        {"handle": "hat", "title": "Hat", "options": {"Size": "S"}, "price": 5},
+        {"handle": "hat", "options": {"Size": "S"}, "price": 5},
+        "{not json",
+        {"title": "Scarf", "description": {"blocks": [
+            {"type": "paragraph", "data": {"text": "Warm"}}]}},
+        {"title": "Coat", "options": {"A": "1", "B": "2", "C": "3", "D": "4"}},
+    ]
+    content = "\n".join(
+        line if isinstance(line, str) else json.dumps(line) for line in lines)
+
+    report = run_import(store, content, "jsonl")
+
+    assert report.errors == [
+        {"row": 2, "message": "A variant with these exact option values already exists"},
+        {"row": 3, "message": "Invalid JSON."},
+        {"row": 5, "message": "Cannot add more than 3 options"},
+    ]
+    scarf = Product.objects.get(store=store, title="Scarf")
+    assert scarf.description["blocks"][0]["data"]["text"] == "Warm"
+
+
+@pytest.mark.django_db
+def test_import_queries_do_not_grow_with_rows(store):
+    """Test that a chunk is saved with a constant number of queries."""
+    with CaptureQueriesContext(connection) as small:
+        run_import(store, make_csv(5, "a"))
+    with CaptureQueriesContext(connection) as large:
+        run_import(store, make_csv(50, "b"))
+
+    assert Product.objects.filter(store=store).count() == 55
+    assert len(large) == len(small)
+
+
+@pytest.mark.django_db
+def test_import_saves_one_chunk_at_a_time(store):
+    """Test that progress is reported after every chunk."""
+    reports = [
+        report.as_dict() for report in
+        import_products(store, io.StringIO(make_csv(5)), "csv", chunk_size=2)
+    ]
+
+    assert [report["rows"] for report in reports] == [2, 4, 5]
+    assert reports[-1]["products"] == 5
+    assert reports[-1]["rows_per_second"] > 0
+
+
+@pytest.mark.django_db
+def test_import_endpoint_streams_progress(user, store, staff_member):
+    """Test that the endpoint streams chunk progress and a final summary."""
+    token = RefreshToken.for_user(user).access_token
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+    upload = SimpleUploadedFile("products.csv", make_csv(3).encode(), "text/csv")
+
+    response = client.post("/p/import/", {"file": upload, "domain": store.default_domain})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert lines[0]["products"] == 3
+    assert lines[0]["errors"] == []
+    assert lines[-1]["done"] is True
+    assert Product.objects.filter(store=store).count() == 3
+
+
+@pytest.mark.django_db
+def test_import_endpoint_requires_permission(user, store, staff_member_with_no_permissions):
+    """Test that staff without the create permission cannot import."""
+    token = RefreshToken.for_user(user).access_token
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}", SERVER_NAME="api.nour.com")
+    upload = SimpleUploadedFile("products.csv", make_csv(1).encode(), "text/csv")
+
+    response = client.post("/p/import/", {"file": upload, "domain": store.default_domain})
+
+    assert response.status_code == 403
+    assert not Product.objects.filter(store=store).exists()
+
+
+@pytest.mark.django_db
+def test_import_command(store, tmp_path):
+    """Test that the command reports its throughput."""
+    path = tmp_path / "products.csv"
+    path.write_text(make_csv(3))
+    out = io.StringIO()
+
+    call_command("import_products", str(path), domain=store.default_domain, stdout=out)
+
+    assert "imported 3 products and 3 variants from 3 rows" in out.getvalue()
+    assert "rows/s" in out.getvalue()
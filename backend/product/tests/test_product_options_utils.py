@@ -1,7 +1,8 @@
 import pytest
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from product.models import Product, ProductOption, OptionValue
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from product.models import Product, ProductOption, OptionValue, ProductVariant
 from product.utils import update_product_options_and_values, MAX_OPTION_NAME_LENGTH, MAX_OPTION_VALUES_COUNT
 
 @pytest.mark.django_db
@@ -148,3 +149,83 @@ def test_update_product_options_long_value_name(product):
     
     with pytest.raises(ValidationError, match=f"Option value name must be less than {MAX_OPTION_NAME_LENGTH} characters"):
         update_product_options_and_values(product, options)
+
+
+def make_options(option_count, value_count):
+    return [
+        {"name": f"Option {i}", "values": [{"name": f"Value {j}"} for j in range(value_count)]}
+        for i in range(option_count)
+    ]
+
+
+def count_queries(product, options):
+    with CaptureQueriesContext(connection) as queries:
+        update_product_options_and_values(product, options)
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_update_product_options_query_count_is_constant(product):
+    """Test that creating, renaming and deleting use a constant number of queries."""
+    small = Product.objects.create(store=product.store, title="Small")
+    ProductVariant.objects.create(product=small)
+    small_create = count_queries(small, make_options(3, 2))
+    large_create = count_queries(product, make_options(3, MAX_OPTION_VALUES_COUNT))
+    assert large_create == small_create
+
+    def rename_and_drop(product):
+        options = list(product.options.prefetch_related("values").order_by("id"))
+        return [
+            {
+                "id": option.id,
+                "name": f"{option.name} renamed",
+                "values": [
+                    {"id": value.id, "name": f"{value.name} renamed"}
+                    for value in list(option.values.order_by("id"))[1:]
+                ] + [{"name": "New value"}],
+            }
+            for option in options[1:]
+        ]
+
+    small_update = count_queries(small, rename_and_drop(small))
+    large_update = count_queries(product, rename_and_drop(product))
+    assert large_update == small_update
+
+
+@pytest.mark.django_db
+def test_update_product_options_applies_diff(product):
+    """Test that kept rows are renamed in place and missing rows deleted."""
+    update_product_options_and_values(product, make_options(2, 3))
+    color, size = product.options.order_by("id")
+    red, green, blue = color.values.order_by("id")
+
+    update_product_options_and_values(product, [
+        {"id": str(color.id), "name": "Colour", "values": [
+            {"id": str(red.id), "name": "Crimson"},
+            {"id": str(blue.id), "name": blue.name},
+            {"name": "Black"},
+        ]},
+        {"name": "Material", "values": [{"name": "Cotton"}]},
+    ])
+
+    assert {
+        option.name: sorted(value.name for value in option.values.all())
+        for option in product.options.all()
+    } == {"Colour": sorted(["Crimson", blue.name, "Black"]), "Material": ["Cotton"]}
+    assert not ProductOption.objects.filter(id=size.id).exists()
+    assert not OptionValue.objects.filter(id=green.id).exists()
+    assert OptionValue.objects.get(id=red.id).name == "Crimson"
+
+
+@pytest.mark.django_db
+def test_update_product_options_invalid_value_id(product):
+    """Test that a value id of another option is rejected without changes."""
+    update_product_options_and_values(product, make_options(2, 1))
+    first, second = product.options.order_by("id")
+    other_value = second.values.get()
+
+    with pytest.raises(ValidationError, match=f"Invalid option value ID: {other_value.id}"):
+        update_product_options_and_values(product, [
+            {"id": first.id, "name": "Renamed", "values": [{"id": other_value.id, "name": "X"}]},
+        ])
+    assert ProductOption.objects.filter(product=product).count() == 2
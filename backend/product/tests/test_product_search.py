@@ -0,0 +1,207 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.graphql.tests.utils import get_graphql_content
+from product.importer import import_products
+from product.models import OptionValue, Product, ProductOption, ProductVariant
+from product.search import SEARCH_TABLE, get_search_terms, search_product_ids
+
+SEARCH_PRODUCTS_QUERY = '''
+query SearchProducts($domain: String!, $query: String!) {
+    searchProducts(defaultDomain: $domain, query: $query) {
+        productId
+        title
+    }
+}
+'''
+
+
+def description(text):
+    return {"blocks": [{"type": "paragraph", "data": {"text": text}}]}
+
+
+@pytest.fixture
+def catalog(store, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        shirt = Product.objects.create(store=store, title="Cotton shirt")
+        scarf = Product.objects.create(
+            store=store, title="Scarf", description=description("Soft <b>cotton</b> blend"))
+        mug = Product.objects.create(store=store, title="Mug")
+        ProductVariant.objects.create(product=mug, sku="MUG-CERAMIC-01")
+        size = ProductOption.objects.create(product=scarf, name="Length")
+        OptionValue.objects.create(option=size, name="Extralong")
+    return {"shirt": shirt, "scarf": scarf, "mug": mug}
+
+
+def count_documents():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def test_get_search_terms():
+    """Test that queries are reduced to lowercase words."""
+    assert get_search_terms('Cotton "shirt" OR -x*') == ["cotton", "shirt", "or", "x"]
+    assert get_search_terms("  ") == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_before_description(store, catalog):
+    """Test that title matches rank above description matches."""
+    assert search_product_ids(store, "cotton") == [catalog["shirt"].pk, catalog["scarf"].pk]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query, product", [
+    ("ceramic", "mug"),
+    ("mug-ceramic", "mug"),
+    ("extralong", "scarf"),
+    ("shi", "shirt"),
+    ("cotton-shirt", "shirt"),
+])
+def test_search_fields(store, catalog, query, product):
+    """Test that SKUs, option values, handles and prefixes are searched."""
+    assert search_product_ids(store, query) == [catalog[product].pk]
+
+
+@pytest.mark.django_db
+def test_search_is_scoped_to_store(store, another_store, catalog, django_capture_on_commit_callbacks):
+    """Test that products of other stores are not returned."""
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.create(store=another_store, title="Cotton socks")
+
+    assert search_product_ids(store, "cotton socks") == []
+    assert len(search_product_ids(another_store, "cotton")) == 1
+
+
+@pytest.mark.django_db
+def test_index_follows_changes(store, catalog, django_capture_on_commit_callbacks):
+    """Test that saves and deletes update the index once per transaction."""
+    shirt, scarf, mug = catalog["shirt"], catalog["scarf"], catalog["mug"]
+    with CaptureQueriesContext(connection) as queries:
+        with django_capture_on_commit_callbacks(execute=True):
+            shirt.title = "Linen shirt"
+            shirt.save()
+            shirt.save()
+            scarf.description = description("Wool")
+            scarf.save()
+            ProductVariant.objects.filter(product=mug).get().delete()
+    # The three products are indexed by a single pass.
+    assert len([query for query in queries if f"DELETE FROM {SEARCH_TABLE}" in query["sql"]]) == 1
+
+    assert search_product_ids(store, "linen") == [shirt.pk]
+    assert search_product_ids(store, "wool") == [scarf.pk]
+    assert search_product_ids(store, "blend") == []
+    assert search_product_ids(store, "ceramic") == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        shirt.delete()
+    assert search_product_ids(store, "linen") == []
+    assert count_documents() == 2
+
+
+@pytest.mark.django_db
+def test_imported_products_are_indexed(store, django_capture_on_commit_callbacks):
+    """Test that bulk imported products are indexed."""
+    content = "handle,title,sku\nlamp,Desk lamp,LAMP-1\n"
+    with django_capture_on_commit_callbacks(execute=True):
+        list(import_products(store, io.StringIO(content), "csv"))
+
+    product = Product.objects.get(store=store, handle="lamp")
+    assert search_product_ids(store, "lamp-1") == [product.pk]
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(store, catalog):
+    """Test that the command indexes products the signals missed."""
+    Product.objects.filter(pk=catalog["mug"].pk).update(title="Teapot")
+    Product.objects.filter(pk=catalog["shirt"].pk).delete()
+    out = io.StringIO()
+
+    with CaptureQueriesContext(connection) as queries:
+        call_command("rebuild_search_index", stdout=out)
+
+    assert search_product_ids(store, "teapot") == [catalog["mug"].pk]
+    assert search_product_ids(store, "cotton") == [catalog["scarf"].pk]
+    assert count_documents() == 2
+    assert "Indexed 2 products, removed 1." in out.getvalue()
+    # The live index is updated in place, never dropped.
+    assert not any("DROP" in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_description_without_plaintext_is_indexed(
+    store, catalog, django_capture_on_commit_callbacks
+):
+    """Test that descriptions saved before their plain text was stored stay searchable."""
+    scarf = catalog["scarf"]
+    Product.objects.filter(pk=scarf.pk).update(description_plaintext="", description_excerpt="")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ProductVariant.objects.create(product=scarf, sku="SCARF-1")
+    assert search_product_ids(store, "blend") == [scarf.pk]
+
+    call_command("rebuild_search_index", stdout=io.StringIO())
+    assert search_product_ids(store, "blend") == [scarf.pk]
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        call_command("backfill_description_plaintext", stdout=io.StringIO())
+    assert callbacks
+    assert search_product_ids(store, "blend") == [scarf.pk]
+
+
+@pytest.mark.django_db
+def test_search_products_query(staff_api_client, staff_member, store, catalog):
+    """Test that the GraphQL field returns ranked products."""
+    response = staff_api_client.post_graphql(SEARCH_PRODUCTS_QUERY, {
+        "domain": store.default_domain, "query": "cotton",
+    })
+    content = get_graphql_content(response)
+
+    assert content["data"]["searchProducts"] == [
+        {"productId": catalog["shirt"].pk, "title": "Cotton shirt"},
+        {"productId": catalog["scarf"].pk, "title": "Scarf"},
+    ]
+
+
+@pytest.mark.django_db
+def test_search_products_query_without_permission(
+    staff_api_client, staff_member_with_no_permissions, store, catalog
+):
+    """Test that staff without the view permission cannot search products."""
+    response = staff_api_client.post_graphql(SEARCH_PRODUCTS_QUERY, {
+        "domain": store.default_domain, "query": "cotton",
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["message"] == "You do not have permission to view products."
+
+
+@pytest.mark.django_db
+def test_search_limit_is_capped(store, catalog, monkeypatch):
+    """Test that a negative limit does not lift the result cap."""
+    monkeypatch.setattr("product.search.MAX_SEARCH_RESULTS", 1)
+
+    assert search_product_ids(store, "cotton", limit=-1) == [catalog["shirt"].pk]
+    assert search_product_ids(store, "cotton", limit=5) == [catalog["shirt"].pk]
+
+
+@pytest.mark.django_db
+def test_search_products_query_rejects_invalid_limit(
+    staff_api_client, staff_member, store, catalog
+):
+    query = '''
+    query SearchProducts($domain: String!, $query: String!, $limit: Int) {
+        searchProducts(defaultDomain: $domain, query: $query, limit: $limit) {
+            productId
+        }
+    }
+    '''
+    response = staff_api_client.post_graphql(query, {
+        "domain": store.default_domain, "query": "cotton", "limit": -1,
+    })
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["extensions"]["code"] == "INVALID_INPUT"
@@ -0,0 +1,78 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.graphql.tests.utils import get_graphql_content
+from discount.models import Voucher
+from product.models import ProductVariant
+from stores.models import Store
+
+VARIANTS_PRICING_QUERY = '''
+query ProductDetailsVariants($productId: ID!) {
+    productDetailsVariants(productId: $productId) {
+        edges {
+            node {
+                pricing {
+                    amount
+                    currency
+                }
+            }
+        }
+    }
+}
+'''
+
+
+@pytest.mark.django_db
+def test_variant_copies_store_currency(store, product):
+    """Test that a new variant stores the currency of its store."""
+    variant = ProductVariant.objects.create(product=product, price_amount=Decimal(5))
+
+    assert variant.currency == store.currency_code
+    assert variant.price.currency == store.currency_code
+
+
+@pytest.mark.django_db
+def test_store_currency_change_is_synced(store, another_store, product):
+    """Test that changing the store currency updates the copies in bulk."""
+    voucher = Voucher.objects.create(store=store, discount_value=Decimal(5))
+    other_voucher = Voucher.objects.create(store=another_store, discount_value=Decimal(5))
+    store = Store.objects.get(pk=store.pk)
+    store.currency_code = "EUR"
+
+    with CaptureQueriesContext(connection) as queries:
+        store.save()
+
+    product.first_variant.refresh_from_db()
+    voucher.refresh_from_db()
+    other_voucher.refresh_from_db()
+    assert product.first_variant.currency == "EUR"
+    assert voucher.discount.currency == "EUR"
+    assert other_voucher.currency == another_store.currency_code
+    # One UPDATE for the store, the variants and each discount model.
+    assert len([query for query in queries if query["sql"].startswith("UPDATE")]) == 5
+
+    with CaptureQueriesContext(connection) as queries:
+        store.save()
+    assert len([query for query in queries if query["sql"].startswith("UPDATE")]) == 1
+
+
+@pytest.mark.django_db
+def test_pricing_does_not_join_store(staff_api_client, staff_member, product):
+    """Test that variant pricing is resolved without loading products or stores."""
+    for _ in range(3):
+        ProductVariant.objects.create(product=product, price_amount=Decimal(7))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = staff_api_client.post_graphql(
+            VARIANTS_PRICING_QUERY, {"productId": str(product.pk)})
+    content = get_graphql_content(response)
+
+    edges = content["data"]["productDetailsVariants"]["edges"]
+    assert [edge["node"]["pricing"]["currency"] for edge in edges] == [
+        product.store.currency_code] * 3
+    variant_queries = [
+        query["sql"] for query in queries if 'FROM "product_productvariant"' in query["sql"]
+    ]
+    assert variant_queries
+    assert not [sql for sql in variant_queries if "stores_store" in sql]
@@ -0,0 +1,224 @@
+"""
+Resumable image uploads received in chunks, in the style of tus (https://tus.io).
+
+A client creates a `ChunkedUpload` with the total length of its file, then
+sends the bytes with PATCH requests, each stating the offset it starts at.
+After a dropped connection it asks for the offset the server has reached
+and carries on from there. Clients send one chunk at a time.
+
+Chunks are streamed from the request straight into a temporary file in
+`PRODUCT_UPLOAD_TEMP_DIR`, and the SHA-256 of the file is updated as they
+arrive. A chunk may come with an `Upload-Checksum` of its own, and is
+discarded if it does not match. The complete file is moved into storage
+with `save_product_image`, reusing the digest for deduplication.
+
+The temporary file is locked while a chunk is written, so a second request
+for the same upload is refused rather than writing over it. Uploads expire
+`PRODUCT_UPLOAD_EXPIRY` seconds after they are created; the
+`delete_expired_uploads` command removes them and their files.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import locks
+from django.http import UnreadablePostError
+from django.utils import timezone
+from core.files import LocalFile
+from .images import save_product_image
+from .models import ChunkedUpload
+
+TUS_VERSION = "1.0.0"
+UPLOAD_CONTENT_TYPE = "application/offset+octet-stream"
+CHECKSUM_ALGORITHMS = ("md5", "sha1", "sha256")
+# Content hashers of the uploads in progress, so that a chunk does not
+# rehash the file; another process rebuilds them from the file.
+MAX_CACHED_HASHERS = 100
+READ_SIZE = 64 * 1024
+
+_content_hashers = OrderedDict()
+_content_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """A request the upload cannot accept, with the HTTP status to answer."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_upload_metadata(value):
+    """Parse an `Upload-Metadata` header: comma separated keys and base64 values."""
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in (value or "").split(","))):
+        key, _, encoded = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(encoded, validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f"Invalid Upload-Metadata value for {key}.")
+    return metadata
+
+
+def parse_upload_checksum(value):
+    """Return the `(algorithm, digest)` of an `Upload-Checksum` header, or None."""
+    if not value:
+        return None
+    algorithm, _, encoded = value.strip().partition(" ")
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Unsupported checksum algorithm {algorithm}.")
+    try:
+        return algorithm, base64.b64decode(encoded, validate=True)
+    except binascii.Error:
+        raise UploadError("Invalid Upload-Checksum value.")
+
+
+def get_upload_path(upload):
+    return os.path.join(settings.PRODUCT_UPLOAD_TEMP_DIR, f"{upload.pk}.part")
+
+
+def get_upload_expiry(upload):
+    return upload.created_at + timedelta(seconds=settings.PRODUCT_UPLOAD_EXPIRY)
+
+
+def is_upload_expired(upload):
+    return get_upload_expiry(upload) <= timezone.now()
+
+
+def get_expired_uploads():
+    return ChunkedUpload.objects.filter(
+        created_at__lte=timezone.now() - timedelta(seconds=settings.PRODUCT_UPLOAD_EXPIRY))
+
+
+def create_upload(store, user, file_name, length):
+    if length > settings.PRODUCT_UPLOAD_MAX_SIZE:
+        raise UploadError("The file is too large.", status=413)
+    upload = ChunkedUpload.objects.create(
+        store=store, user=user, file_name=os.path.basename(file_name), length=length)
+    os.makedirs(settings.PRODUCT_UPLOAD_TEMP_DIR, exist_ok=True)
+    open(get_upload_path(upload), "wb").close()
+    return upload
+
+
+def _get_content_hasher(upload, path):
+    with _content_hashers_lock:
+        cached = _content_hashers.get(upload.pk)
+    if cached is not None and cached[0] == upload.offset:
+        return cached[1].copy()
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        remaining = upload.offset
+        while remaining:
+            data = file.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def _remember_content_hasher(upload, hasher):
+    with _content_hashers_lock:
+        _content_hashers[upload.pk] = (upload.offset, hasher)
+        _content_hashers.move_to_end(upload.pk)
+        while len(_content_hashers) > MAX_CACHED_HASHERS:
+            _content_hashers.popitem(last=False)
+
+
+def _forget_content_hasher(upload):
+    with _content_hashers_lock:
+        _content_hashers.pop(upload.pk, None)
+
+
+def append_chunk(upload, stream, offset, checksum=None):
+    """
+    Write the chunk read from `stream` at `offset` and advance the upload.
+
+    When the connection drops, the bytes received so far are kept (unless
+    the chunk has a checksum, which cannot be verified) and `UploadError`
+    is raised once the offset is saved.
+    """
+    if offset != upload.offset:
+        raise UploadError(
+            f"Upload offset is {upload.offset}, not {offset}.", status=409)
+    path = get_upload_path(upload)
+    if is_upload_expired(upload) or not os.path.exists(path):
+        raise UploadError("The upload has expired.", status=410)
+
+    chunk_hasher = hashlib.new(checksum[0]) if checksum else None
+    written = 0
+    interrupted = False
+    try:
+        file = open(path, "r+b")
+    except FileNotFoundError:
+        # Removed since, by delete_expired_uploads or a cancellation.
+        raise UploadError("The upload has expired.", status=410)
+    with file:
+        if not locks.lock(file, locks.LOCK_EX | locks.LOCK_NB):
+            raise UploadError("Another chunk of the upload is being written.", status=423)
+        # The request holding the lock before may have moved the offset.
+        current = ChunkedUpload.objects.filter(pk=upload.pk).values_list(
+            "offset", flat=True).first()
+        if current is None:
+            raise UploadError("The upload has expired.", status=410)
+        if current != offset:
+            raise UploadError(
+                f"Upload offset is {current}, not {offset}.", status=409)
+        hasher = _get_content_hasher(upload, path)
+        # Drops what an interrupted or rejected chunk left after the offset.
+        file.seek(offset)
+        file.truncate()
+        while True:
+            try:
+                data = stream.read(READ_SIZE)
+            except (UnreadablePostError, OSError):
+                interrupted = True
+                break
+            if not data:
+                break
+            if offset + written + len(data) > upload.length:
+                raise UploadError("The chunk exceeds the upload length.", status=413)
+            file.write(data)
+            hasher.update(data)
+            if chunk_hasher:
+                chunk_hasher.update(data)
+            written += len(data)
+
+        if chunk_hasher and (interrupted or chunk_hasher.digest() != checksum[1]):
+            # Status defined by the tus checksum extension.
+            raise UploadError("The chunk does not match its checksum.", status=460)
+
+        # Saved before the lock is released, so the next chunk sees it.
+        ChunkedUpload.objects.filter(pk=upload.pk).update(offset=offset + written)
+    upload.offset = offset + written
+    _remember_content_hasher(upload, hasher)
+    if interrupted:
+        raise UploadError("The chunk was not received completely.")
+    return hasher
+
+
+def complete_upload(upload, hasher):
+    """Move the assembled file into storage as an image of the upload's store."""
+    path = get_upload_path(upload)
+    with LocalFile(open(path, "rb"), name=upload.file_name) as file:
+        file.content_hash = hasher.hexdigest()
+        image = save_product_image(upload.store, file)
+    # Left behind when the store already had the file or the storage copied it.
+    if os.path.exists(path):
+        os.remove(path)
+    _forget_content_hasher(upload)
+    upload.image = image
+    upload.save(update_fields=["image"])
+    return image
+
+
+def delete_upload(upload):
+    path = get_upload_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    _forget_content_hasher(upload)
+    upload.delete()
@@ -1,6 +1,11 @@
 from django.urls import path
-from .views import image_upload
+from .views import (
+    chunked_upload, chunked_upload_create, image_upload, product_export, product_import)
 
 urlpatterns = [
     path('upload/', image_upload, name='image_upload'),
-]
\ No newline at end of file
+    path('uploads/', chunked_upload_create, name='chunked_upload_create'),
+    path('uploads/<uuid:upload_id>/', chunked_upload, name='chunked_upload'),
+    path('import/', product_import, name='product_import'),
+    path('export/', product_export, name='product_export'),
+]
@@ -1,112 +1,150 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import product as product_combinations
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from .models import ProductOption, OptionValue, ProductVariant
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    DecimalField, ExpressionWrapper, F, IntegerField, Value)
+from django.db.models.functions import Cast, Coalesce, Round
+from .cache import batch_catalog_invalidation, invalidate_catalog
+from .models import (
+    Product, ProductOption, OptionValue, ProductVariant, get_option_fingerprint)
+from .search import schedule_search_update
 
 MAX_OPTION_NAME_LENGTH = 50
 MAX_OPTION_VALUES_COUNT = 10
+MAX_VARIANT_OPTIONS = 3
+
+
+def clean_option_name(name, label):
+    name = name.strip()
+    if not name:
+        raise ValidationError(f"{label} name cannot be empty")
+    if len(name) > MAX_OPTION_NAME_LENGTH:
+        raise ValidationError(f"{label} name must be less than {MAX_OPTION_NAME_LENGTH} characters")
+    return name
+
 
 @transaction.atomic
 def update_product_options_and_values(product, updated_options):
+    """
+    Replace the options of `product` and their values with `updated_options`.
+
+    Options and values with an `id` are renamed, the others are created, and
+    the existing ones missing from the update are deleted. The current
+    options and values are loaded once and the differences are applied with
+    `bulk_create`, `bulk_update` and one `delete()` per model, so the number
+    of queries does not depend on the number of options or values.
+    """
     if not updated_options:
         return
     
     # Validate total number of options
     if len(updated_options) > MAX_OPTION_VALUES_COUNT:
         raise ValidationError(f"Maximum {MAX_OPTION_VALUES_COUNT} options are allowed")
-    
-    # Collect option names to check for duplicates
-    option_names = []
-    
-    existing_options = ProductOption.objects.filter(product=product)
-    existing_option_ids = {option.id for option in existing_options}
 
-    options_to_keep = set()
+    existing_options = {
+        str(option.id): option
+        for option in ProductOption.objects.filter(product=product).prefetch_related("values")
+    }
 
+    option_names = []
+    # (option, [(value or None, name)]) in the order of the update
+    planned_options = []
     for option_data in updated_options:
-        # Validate option name
-        option_name = option_data['name'].strip()
-        if not option_name:
-            raise ValidationError("Option name cannot be empty")
-        
-        if len(option_name) > MAX_OPTION_NAME_LENGTH:
-            raise ValidationError(f"Option name must be less than {MAX_OPTION_NAME_LENGTH} characters")
-        
+        option_name = clean_option_name(option_data['name'], "Option")
+
         # Check for duplicate option names
         if option_name in option_names:
             raise ValidationError(f"Duplicate option name: {option_name}")
         option_names.append(option_name)
 
-        try:
-            if 'id' in option_data:
-                # Update existing option
-                option = ProductOption.objects.get(
-                    id=option_data['id'], product=product)
-                option.name = option_name
-                option.save()
-                options_to_keep.add(option.id)
-            else:
-                # Create new option
-                option = ProductOption.objects.create(
-                    product=product, name=option_name)
-                options_to_keep.add(option.id)
-
-            # Validate and process option values
-            existing_values = OptionValue.objects.filter(option=option)
-            existing_value_ids = {value.id for value in existing_values}
-            values_to_keep = set()
-            
-            # Validate total number of values
-            if len(option_data['values']) > MAX_OPTION_VALUES_COUNT:
-                raise ValidationError(f"Maximum {MAX_OPTION_VALUES_COUNT} values are allowed per option")
-            
-            # Collect value names to check for duplicates
-            value_names = []
-
-            for value_data in option_data['values']:
-                # Validate value name
-                value_name = value_data['name'].strip()
-                if not value_name:
-                    raise ValidationError("Option value name cannot be empty")
-                
-                if len(value_name) > MAX_OPTION_NAME_LENGTH:
-                    raise ValidationError(f"Option value name must be less than {MAX_OPTION_NAME_LENGTH} characters")
-                
-                # Check for duplicate value names within the same option
-                if value_name in value_names:
-                    raise ValidationError(f"Duplicate value name: {value_name}")
-                value_names.append(value_name)
-
-                try:
-                    if 'id' in value_data:
-                        # Update existing value
-                        value = OptionValue.objects.get(
-                            id=value_data['id'], option=option)
-                        value.name = value_name
-                        value.save()
-                        values_to_keep.add(value.id)
-                    else:
-                        # Create new value
-                        value = OptionValue.objects.create(
-                            option=option, name=value_name)
-                        values_to_keep.add(value.id)
-                except OptionValue.DoesNotExist:
+        if 'id' in option_data:
+            option = existing_options.get(str(option_data['id']))
+            if option is None:
+                raise ValidationError(f"Invalid option ID: {option_data.get('id')}")
+            existing_values = {str(value.id): value for value in option.values.all()}
+        else:
+            option = None
+            existing_values = {}
+
+        values_data = option_data.get('values') or []
+        if len(values_data) > MAX_OPTION_VALUES_COUNT:
+            raise ValidationError(f"Maximum {MAX_OPTION_VALUES_COUNT} values are allowed per option")
+
+        value_names = []
+        planned_values = []
+        for value_data in values_data:
+            value_name = clean_option_name(value_data['name'], "Option value")
+
+            # Check for duplicate value names within the same option
+            if value_name in value_names:
+                raise ValidationError(f"Duplicate value name: {value_name}")
+            value_names.append(value_name)
+
+            if 'id' in value_data:
+                value = existing_values.get(str(value_data['id']))
+                if value is None:
                     raise ValidationError(f"Invalid option value ID: {value_data.get('id')}")
+            else:
+                value = None
+            planned_values.append((value, value_name))
+        planned_options.append((option, option_name, planned_values))
 
-            # Remove values not in the update
-            for value in existing_values:
-                if value.id not in values_to_keep:
-                    value.delete()
+    kept_option_ids = {option.id for option, _, _ in planned_options if option}
+    kept_value_ids = {
+        value.id
+        for _, _, planned_values in planned_options
+        for value, _ in planned_values if value
+    }
+    renamed_options = [
+        option for option, name, _ in planned_options
+        if option and option.name != name
+    ]
+    for option, name, _ in planned_options:
+        if option:
+            option.name = name
+
+    with batch_catalog_invalidation(product.store_id):
+        # Deleting an option deletes its values, so only the values removed
+        # from kept options are deleted on their own.
+        deleted_values, _ = OptionValue.objects.filter(
+            option_id__in=kept_option_ids).exclude(id__in=kept_value_ids).delete()
+        deleted_options, _ = ProductOption.objects.filter(
+            product=product).exclude(id__in=kept_option_ids).delete()
+        if deleted_values or deleted_options:
+            # Variants lose the deleted values, so their combinations change.
+            refresh_option_fingerprints(
+                ProductVariant.objects.filter(product=product).values_list("pk", flat=True),
+                drop_duplicates=True)
 
-        except ProductOption.DoesNotExist:
-            raise ValidationError(f"Invalid option ID: {option_data.get('id')}")
+        if renamed_options:
+            ProductOption.objects.bulk_update(renamed_options, ["name"])
+        new_options = [
+            ProductOption(product=product, name=name)
+            for option, name, _ in planned_options if option is None
+        ]
+        ProductOption.objects.bulk_create(new_options)
+        new_options = iter(new_options)
 
-    # Remove options not in the update
-    for option in existing_options:
-        if option.id not in options_to_keep:
-            option.delete()
+        renamed_values = []
+        new_values = []
+        for option, _, planned_values in planned_options:
+            option = option or next(new_options)
+            for value, name in planned_values:
+                if value is None:
+                    new_values.append(OptionValue(option=option, name=name))
+                elif value.name != name:
+                    value.name = name
+                    renamed_values.append(value)
+        if renamed_values:
+            OptionValue.objects.bulk_update(renamed_values, ["name"])
+        OptionValue.objects.bulk_create(new_values)
+        schedule_search_update([product.pk])
 
 
-def add_values_to_variant(variant, option_value_ids, max_options=3):
+def add_values_to_variant(variant, option_value_ids, max_options=MAX_VARIANT_OPTIONS):
     """
     Add option values to a product variant with enhanced validation.
     
@@ -134,17 +172,17 @@ def add_values_to_variant(variant, option_value_ids, max_options=3):
         raise ValidationError(f"Cannot add more than {max_options} option values")
 
     # Fetch option values and validate their existence
-    option_values = OptionValue.objects.filter(id__in=option_value_ids)
+    option_values = list(OptionValue.objects.filter(id__in=option_value_ids).select_related("option"))
     
     # Check if all requested option values exist
     if len(option_values) != len(option_value_ids):
-        missing_ids = set(option_value_ids) - set(option_values.values_list('id', flat=True))
+        missing_ids = {int(pk) for pk in option_value_ids} - {value.id for value in option_values}
         raise ValidationError(f"Option values not found: {missing_ids}")
 
     # Validate all option values belong to the same product
     invalid_values = [
         value for value in option_values 
-        if value.option.product != variant.product
+        if value.option.product_id != variant.product_id
     ]
     
     if invalid_values:
@@ -158,20 +196,139 @@ def add_values_to_variant(variant, option_value_ids, max_options=3):
         options_used.add(value.option)
 
     # Check for existing variant with same option configuration
-    get_variant_has_same_values = ProductVariant.objects.filter(
-        product=variant.product, 
-        selected_options__in=option_values
-    ).exclude(pk=variant.pk).distinct()
+    fingerprint = get_option_fingerprint(value.id for value in option_values)
+    existing_variant_id = ProductVariant.objects.filter(
+        product_id=variant.product_id, option_fingerprint=fingerprint
+    ).exclude(pk=variant.pk).values_list("pk", flat=True).first()
+
+    if existing_variant_id is not None:
+        raise ValidationError(f"A variant with these exact option values already exists (Variant ID: {existing_variant_id})")
+
+    # Clear existing options and add new ones; the fingerprint is refreshed
+    # by the m2m_changed receiver (see product.signals).
+    try:
+        with transaction.atomic():
+            variant.selected_options.clear()
+            variant.selected_options.add(*option_values)
+            variant.save()
+    except IntegrityError:
+        # A concurrent request gave another variant the same values.
+        raise ValidationError("A variant with these exact option values already exists")
+
 
-    for existing_variant in get_variant_has_same_values:
-        existing_option_values = set(existing_variant.selected_options.all())
-        if existing_option_values == set(option_values):
-            raise ValidationError(f"A variant with these exact option values already exists (Variant ID: {existing_variant.pk})")
+@transaction.atomic
+def generate_variants(product, price_amount=None, compare_at_price=None, stock=0):
+    """
+    Create a variant for every combination of option values `product` lacks.
+
+    Combinations are the Cartesian product of the values of the options that
+    have any. Existing combinations are found by their fingerprints, and the
+    missing variants are created with preassigned sort orders, one
+    `bulk_create` for the variants and one for their selected values.
+    `bulk_create` skips `ProductVariant.clean`, so the shared prices are
+    checked with it once beforehand. A product without variants gets the
+    first created one as `first_variant`. Returns the created variants.
+    """
+    ProductVariant(price_amount=price_amount, compare_at_price=compare_at_price).clean()
+    options = [
+        option for option in product.options.prefetch_related("values").order_by("id")
+        if option.values.all()
+    ]
+    if not options:
+        return []
+    if len(options) > MAX_VARIANT_OPTIONS:
+        raise ValidationError(f"Cannot add more than {MAX_VARIANT_OPTIONS} options")
+
+    existing_fingerprints = set(
+        ProductVariant.objects.filter(product=product, option_fingerprint__isnull=False)
+        .values_list("option_fingerprint", flat=True))
+    combinations = [
+        values for values in product_combinations(*[option.values.all() for option in options])
+        if get_option_fingerprint(value.pk for value in values) not in existing_fingerprints
+    ]
+    if not combinations:
+        return []
 
-    # Clear existing options and add new ones
-    variant.selected_options.clear()
-    variant.selected_options.add(*option_values)
-    variant.save()
+    first_sort_order = ProductVariant.get_next_sort_order(product.variants.all())
+    variants = ProductVariant.objects.bulk_create([
+        ProductVariant(
+            product=product,
+            sort_order=first_sort_order + index * ProductVariant.SORT_ORDER_GAP,
+            price_amount=price_amount,
+            compare_at_price=compare_at_price,
+            stock=stock,
+            option_fingerprint=get_option_fingerprint(value.pk for value in values),
+            currency=product.store.currency_code,
+        )
+        for index, values in enumerate(combinations)
+    ])
+    SelectedOption = ProductVariant.selected_options.through
+    SelectedOption.objects.bulk_create([
+        SelectedOption(productvariant=variant, optionvalue=value)
+        for variant, values in zip(variants, combinations)
+        for value in values
+    ])
+    if product.first_variant_id is None:
+        product.first_variant = variants[0]
+        Product.objects.filter(pk=product.pk).update(first_variant=variants[0])
+    invalidate_catalog(product.store_id)
+    return variants
+
+
+def get_variant_by_option_values(product, option_value_ids):
+    """
+    Return the variant of `product` with exactly `option_value_ids`, or `None`.
+
+    The lookup is a single query on the `(product, option_fingerprint)` index.
+    """
+    fingerprint = get_option_fingerprint(option_value_ids)
+    if fingerprint is None:
+        return None
+    return ProductVariant.objects.filter(
+        product=product, option_fingerprint=fingerprint).first()
+
+
+def refresh_option_fingerprints(variant_ids, drop_duplicates=False):
+    """
+    Recompute the option fingerprint of the given variants from their values.
+
+    Fingerprints are cleared before they are written again, so variants may
+    swap combinations. With `drop_duplicates`, a variant repeating the
+    combination of an older variant of its product keeps no fingerprint
+    instead of violating the unique constraint. Returns the fingerprints
+    by variant id.
+    """
+    variant_ids = list(variant_ids)
+    if not variant_ids:
+        return {}
+    SelectedOption = ProductVariant.selected_options.through
+    value_ids = defaultdict(list)
+    for variant_id, value_id in SelectedOption.objects.filter(
+            productvariant_id__in=variant_ids).values_list("productvariant_id", "optionvalue_id"):
+        value_ids[variant_id].append(value_id)
+
+    variants = list(
+        ProductVariant.objects.filter(pk__in=variant_ids)
+        .only("pk", "product_id", "option_fingerprint").order_by("pk"))
+    taken = set()
+    changed = []
+    fingerprints = {}
+    for variant in variants:
+        fingerprint = get_option_fingerprint(value_ids[variant.pk])
+        if drop_duplicates and fingerprint is not None:
+            if (variant.product_id, fingerprint) in taken:
+                fingerprint = None
+            taken.add((variant.product_id, fingerprint))
+        fingerprints[variant.pk] = fingerprint
+        if fingerprint != variant.option_fingerprint:
+            variant.option_fingerprint = fingerprint
+            changed.append(variant)
+    if len(changed) > 1:
+        ProductVariant.objects.filter(
+            pk__in=[variant.pk for variant in changed]).update(option_fingerprint=None)
+    if changed:
+        ProductVariant.objects.bulk_update(changed, ["option_fingerprint"])
+    return fingerprints
 
 
 def update_product_collections(product, collection_ids):
@@ -201,3 +358,37 @@ def update_product_collections(product, collection_ids):
         product.collections.remove(*removed_collections)
 
     return {"added": list(added_collections), "removed": list(removed_collections)}
+
+
+def get_adjusted_value(field_name, mode, value, decimal_places=None):
+    """
+    Return an SQL expression adjusting a numeric field by `value`.
+
+    `mode` is one of `SET`, `ADD`, `SUBTRACT` or `PERCENTAGE` (a signed
+    percentage of the current value). The result is rounded to
+    `decimal_places`, or to a whole number when it is `None`, so it can be
+    written with a single set-based `UPDATE`.
+    """
+    if decimal_places is None:
+        output_field = IntegerField()
+    else:
+        output_field = DecimalField(
+            max_digits=settings.DEFAULT_MAX_DIGITS, decimal_places=decimal_places)
+    current = Coalesce(F(field_name), Value(0), output_field=output_field)
+    amount = Value(value, output_field=output_field)
+
+    if mode == "SET":
+        return amount
+    if mode == "ADD":
+        adjusted = ExpressionWrapper(current + amount, output_field=output_field)
+    elif mode == "SUBTRACT":
+        adjusted = ExpressionWrapper(current - amount, output_field=output_field)
+    elif mode == "PERCENTAGE":
+        factor = Value(1 + Decimal(value) / 100, output_field=DecimalField())
+        adjusted = ExpressionWrapper(current * factor, output_field=output_field)
+    else:
+        raise ValueError(f"Unknown adjustment mode: {mode}")
+
+    if decimal_places is None:
+        return Cast(Round(adjusted), output_field)
+    return Round(adjusted, decimal_places, output_field=output_field)
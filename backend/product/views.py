@@ -1,6 +1,18 @@
-from .models import Image
-from django.http import JsonResponse, HttpResponse
+import codecs
+import json
+from .images import save_product_image
+from .models import ChunkedUpload
+from .uploads import (
+    TUS_VERSION, UPLOAD_CONTENT_TYPE, UploadError, append_chunk, complete_upload,
+    create_upload, delete_upload, get_upload_expiry, is_upload_expired,
+    parse_upload_checksum, parse_upload_metadata)
+from .exporter import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, export_products
+from .importer import get_import_format, import_products
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
+from core.utils.constants import StorePermissionErrors
+from stores.enums import StorePermissions
 from stores.models import Store,StaffMember
 from project.decorators import jwt_authentication_required
 # Create your views here.
@@ -14,8 +26,7 @@ def image_upload(request):
         domain = request.POST.get('domain')
         store = Store.objects.get(default_domain=domain)
         if StaffMember.objects.filter(user=user, store=store).exists():
-            image_obj = Image(image=image, store=store)
-            image_obj.save()
+            image_obj = save_product_image(store, image)
             data = {
                 'id': str(image_obj.id),
                 'image':image_obj.image.url,
@@ -23,4 +34,187 @@ def image_upload(request):
             return JsonResponse(data, status=200)
         else:
             return HttpResponse('You are not authorized to access this store.', status=403)
-    return HttpResponse('Invalid request method', status=400)
\ No newline at end of file
+    return HttpResponse('Invalid request method', status=400)
+
+
+def stream_import_progress(store, lines, file_format):
+    """Run an import, writing one JSON line per chunk and a final summary."""
+    report = None
+    reported = 0
+    for report in import_products(store, lines, file_format):
+        yield json.dumps({**report.as_dict(), 'errors': report.errors[reported:]}) + '\n'
+        reported = len(report.errors)
+    summary = report.as_dict() if report else {'rows': 0, 'products': 0, 'variants': 0}
+    yield json.dumps({**summary, 'done': True}) + '\n'
+
+
+@csrf_exempt
+@jwt_authentication_required
+def product_import(request):
+    """
+    Import the products of an uploaded CSV or JSON Lines file.
+
+    The response streams newline-delimited JSON: the progress and row errors
+    of every chunk as it is saved, then a summary with `done` set.
+    """
+    if request.method != 'POST':
+        return HttpResponse('Invalid request method', status=400)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return HttpResponse('No file was uploaded.', status=400)
+    store = Store.objects.filter(default_domain=request.POST.get('domain')).first()
+    if store is None:
+        return HttpResponse('Store not found.', status=404)
+    staff_member = StaffMember.objects.filter(user=request.user, store=store).first()
+    if staff_member is None:
+        return HttpResponse('You are not authorized to access this store.', status=403)
+    if not staff_member.has_permission(StorePermissions.PRODUCTS_CREATE):
+        error = StorePermissionErrors.PERMISSION_DENIED
+        return HttpResponse(error['message'], status=error['status'])
+    try:
+        file_format = get_import_format(upload.name, request.POST.get('format'))
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
+
+    lines = codecs.iterdecode(upload, 'utf-8-sig')
+    return StreamingHttpResponse(
+        stream_import_progress(store, lines, file_format),
+        content_type='application/x-ndjson',
+    )
+
+
+@jwt_authentication_required
+def product_export(request):
+    """
+    Stream the catalog of a store as CSV or JSON Lines, one row per variant.
+
+    Variants are read in chunks while the response is written, so memory
+    use does not depend on the size of the catalog.
+    """
+    if request.method != 'GET':
+        return HttpResponse('Invalid request method', status=400)
+    file_format = request.GET.get('format', 'csv').lower()
+    if file_format not in EXPORT_FORMATS:
+        return HttpResponse(
+            f"Unsupported export format: {file_format}. Use one of {', '.join(EXPORT_FORMATS)}.",
+            status=400)
+    store = Store.objects.filter(default_domain=request.GET.get('domain')).first()
+    if store is None:
+        return HttpResponse('Store not found.', status=404)
+    staff_member = StaffMember.objects.filter(user=request.user, store=store).first()
+    if staff_member is None:
+        return HttpResponse('You are not authorized to access this store.', status=403)
+    if not staff_member.has_permission(StorePermissions.PRODUCTS_VIEW):
+        error = StorePermissionErrors.PERMISSION_DENIED
+        return HttpResponse(error['message'], status=error['status'])
+
+    response = StreamingHttpResponse(
+        export_products(store, file_format),
+        content_type=EXPORT_CONTENT_TYPES[file_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{store.default_domain}-products.{file_format}"')
+    return response
+
+
+def tus_response(response, upload=None):
+    response['Tus-Resumable'] = TUS_VERSION
+    if upload is not None:
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.length)
+        response['Cache-Control'] = 'no-store'
+        if not upload.is_complete:
+            response['Upload-Expires'] = http_date(get_upload_expiry(upload).timestamp())
+    return response
+
+
+def image_response(image):
+    return JsonResponse({'id': str(image.id), 'image': image.image.url}, status=200)
+
+
+@csrf_exempt
+@jwt_authentication_required
+def chunked_upload_create(request):
+    """
+    Start a resumable image upload.
+
+    Expects the file size in `Upload-Length` and its `filename` and the store
+    `domain` in `Upload-Metadata`. Answers with the upload URL in `Location`,
+    to which the chunks are sent, see product.uploads.
+    """
+    if request.method != 'POST':
+        return HttpResponse('Invalid request method', status=400)
+    try:
+        length = int(request.headers.get('Upload-Length', ''))
+        if length < 0:
+            raise ValueError
+    except ValueError:
+        return tus_response(HttpResponse('Invalid Upload-Length.', status=400))
+    try:
+        metadata = parse_upload_metadata(request.headers.get('Upload-Metadata'))
+        if not metadata.get('filename'):
+            raise UploadError('Upload-Metadata must contain a filename.')
+    except UploadError as e:
+        return tus_response(HttpResponse(str(e), status=e.status))
+    store = Store.objects.filter(default_domain=metadata.get('domain')).first()
+    if store is None:
+        return tus_response(HttpResponse('Store not found.', status=404))
+    if not StaffMember.objects.filter(user=request.user, store=store).exists():
+        return tus_response(
+            HttpResponse('You are not authorized to access this store.', status=403))
+
+    try:
+        upload = create_upload(store, request.user, metadata['filename'], length)
+    except UploadError as e:
+        return tus_response(HttpResponse(str(e), status=e.status))
+    response = tus_response(HttpResponse(status=201), upload)
+    response['Location'] = request.build_absolute_uri(f'{upload.pk}/')
+    return response
+
+
+@csrf_exempt
+@jwt_authentication_required
+def chunked_upload(request, upload_id):
+    """
+    Report (HEAD), continue (PATCH) or cancel (DELETE) a resumable upload.
+
+    PATCH requests send the bytes starting at `Upload-Offset` as
+    `application/offset+octet-stream`, optionally with an `Upload-Checksum`.
+    The one completing the file answers like `image_upload`.
+    """
+    upload = ChunkedUpload.objects.select_related('store', 'image').filter(
+        pk=upload_id, user=request.user).first()
+    if upload is None:
+        return tus_response(HttpResponse('Upload not found.', status=404))
+    if not StaffMember.objects.filter(user=request.user, store=upload.store).exists():
+        return tus_response(
+            HttpResponse('You are not authorized to access this store.', status=403))
+
+    if request.method == 'DELETE':
+        delete_upload(upload)
+        return tus_response(HttpResponse(status=204))
+    if not upload.is_complete and is_upload_expired(upload):
+        return tus_response(HttpResponse('The upload has expired.', status=410))
+    if request.method == 'HEAD':
+        return tus_response(HttpResponse(status=200), upload)
+    if request.method != 'PATCH':
+        return tus_response(HttpResponse('Invalid request method', status=400))
+
+    if request.content_type != UPLOAD_CONTENT_TYPE:
+        return tus_response(HttpResponse(
+            f'Content-Type must be {UPLOAD_CONTENT_TYPE}.', status=415))
+    if upload.image is not None:
+        return tus_response(image_response(upload.image), upload)
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return tus_response(HttpResponse('Invalid Upload-Offset.', status=400), upload)
+    try:
+        checksum = parse_upload_checksum(request.headers.get('Upload-Checksum'))
+        hasher = append_chunk(upload, request, offset, checksum)
+    except UploadError as e:
+        return tus_response(HttpResponse(str(e), status=e.status), upload)
+
+    if not upload.is_complete:
+        return tus_response(HttpResponse(status=204), upload)
+    return tus_response(image_response(complete_upload(upload, hasher)), upload)
@@ -1,11 +1,11 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from core.views import custom_upload_file
+from core.views import custom_upload_file, serve_media
 urlpatterns = [
     path("ckeditor5/", include('django_ckeditor_5.urls')),
     path('upload/', custom_upload_file, name='custom_upload_file'),
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
     path('', admin.site.urls),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
@@ -1,16 +1,36 @@
 from django.http import HttpResponse
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-def jwt_authentication_required(view_func):
-    def _wrapped_view(request, *args, **kwargs):
+
+def authenticate_jwt_request(request):
+    """
+    Authenticate the JWT sent with `request` once and memoize the outcome.
+
+    Decoding the token and loading the user costs a database query, so the
+    result (the user, or the error message) is cached on the request and
+    every later call during the same request reads it from there.
+    Returns a `(user, error)` tuple where exactly one item is set.
+    """
+    if not hasattr(request, "_jwt_auth_result"):
         try:
             user, token = JWTAuthentication().authenticate(request)
             if not user or not user.is_authenticated:
-                return HttpResponse("Authentication credentials were not provided or are invalid.", status=401)
+                result = (None, "Authentication credentials were not provided or are invalid.")
+            else:
+                result = (user, None)
         except Exception as e:
-            return HttpResponse(f"Authentication failed: {str(e)}", status=401)
-        
+            result = (None, f"Authentication failed: {str(e)}")
+        request._jwt_auth_result = result
+    return request._jwt_auth_result
+
+
+def jwt_authentication_required(view_func):
+    def _wrapped_view(request, *args, **kwargs):
+        user, error = authenticate_jwt_request(request)
+        if error:
+            return HttpResponse(error, status=401)
+
         request.user = user
         return view_func(request, *args, **kwargs)
-    
-    return _wrapped_view
\ No newline at end of file
+
+    return _wrapped_view
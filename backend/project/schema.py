@@ -1,6 +1,6 @@
 import graphene
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.core.exceptions import PermissionDenied
+from project.decorators import authenticate_jwt_request
 from product.schema.queries import Query as productQueries
 from product.schema.mutation import Mutation as productMutations
 from customer.schema.queries import Query as customerQueries
@@ -10,17 +10,21 @@ from stores.schema.mutations import Mutation as storesMutations
 
 
 class AuthenticationMiddleware:
+    """
+    Graphene middleware that rejects unauthenticated requests.
+
+    It runs for every resolved field, so it only reads the user memoized on
+    the request by `authenticate_jwt_request`; the token is decoded and the
+    user loaded once per HTTP request.
+    """
+
     def resolve(self, next, root, info, **kwargs):
         request = info.context
-        try:
-            user, token = JWTAuthentication().authenticate(request)
-            if not user or not user.is_authenticated:
-                raise PermissionDenied(
-                    "Authentication credentials were not provided or are invalid.")
-        except Exception as e:
-            raise PermissionDenied(f"Authentication failed: {str(e)}")
-
-        info.context.user = user
+        user, error = authenticate_jwt_request(request)
+        if error:
+            raise PermissionDenied(error)
+
+        request.user = user
         return next(root, info, **kwargs)
 
 
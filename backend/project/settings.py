@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from datetime import timedelta
 import os
+import tempfile
 from pathlib import Path
 from decouple import config
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -340,3 +341,147 @@ EMAIL_HOST_PASSWORD = 'PASS'
 DEFAULT_DECIMAL_PLACES = 3
 DEFAULT_MAX_DIGITS = 12
 DEFAULT_CURRENCY_CODE_LENGTH = 3
+
+# Size of the per-process LRU of staff member permission sets, and seconds an
+# entry is trusted; the version tokens invalidating entries across processes
+# live in this cache alias, which must be shared (see CACHES)
+STORE_PERMISSIONS_CACHE_SIZE = config(
+    'STORE_PERMISSIONS_CACHE_SIZE', default=1024, cast=int)
+STORE_PERMISSIONS_CACHE_TTL = config('STORE_PERMISSIONS_CACHE_TTL', default=30, cast=int)
+STORE_PERMISSIONS_CACHE_ALIAS = 'default'
+
+# Catalog reads are cached in their own cache so it can live in another
+# backend, e.g. django.core.cache.backends.filebased.FileBasedCache with a
+# directory as location, or django.core.cache.backends.redis.RedisCache
+# (or any Redis-compatible server) with a redis:// URL as location.
+# invalidate_catalog bumps a version token stored in that cache, so with
+# several processes it must be shared as well: the per-process default only
+# invalidates the reads cached by the process that changed the catalog.
+# The default cache holds state every process must see (permission versions):
+# in production point it at a shared
+# backend, e.g. django.core.cache.backends.redis.RedisCache with
+# redis://127.0.0.1:6379/1. The per-process default only suits development.
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    },
+    'catalog': {
+        'BACKEND': config(
+            'CATALOG_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CATALOG_CACHE_LOCATION', default='catalog'),
+    },
+    # Query text of Automatic Persisted Queries: a hash registered through one
+    # process must be found by the others, so the default is a directory all
+    # processes of the host share; use Redis when running several hosts.
+    'persisted_queries': {
+        'BACKEND': config(
+            'PERSISTED_QUERIES_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config(
+            'PERSISTED_QUERIES_CACHE_LOCATION',
+            default=os.path.join(tempfile.gettempdir(), 'storesphere-persisted-queries')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Query cost budgets, counted across all processes like the query texts
+    'cost_budgets': {
+        'BACKEND': config(
+            'COST_BUDGETS_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config(
+            'COST_BUDGETS_CACHE_LOCATION',
+            default=os.path.join(tempfile.gettempdir(), 'storesphere-cost-budgets')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+CATALOG_CACHE_ALIAS = 'catalog'
+# Seconds a cached catalog read lives, and how long concurrent requests wait
+# for the one recomputing a missing entry
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=600, cast=int)
+CATALOG_CACHE_LOCK_TIMEOUT = config(
+    'CATALOG_CACHE_LOCK_TIMEOUT', default=5, cast=int)
+
+# Number of parsed and validated GraphQL documents kept per process
+GRAPHQL_DOCUMENT_CACHE_SIZE = config(
+    'GRAPHQL_DOCUMENT_CACHE_SIZE', default=512, cast=int)
+PERSISTED_QUERIES_CACHE_ALIAS = 'persisted_queries'
+# Seconds a persisted query stays registered before clients must send it again
+PERSISTED_QUERIES_TIMEOUT = config(
+    'PERSISTED_QUERIES_TIMEOUT', default=7 * 24 * 60 * 60, cast=int)
+
+# Static cost analysis of GraphQL operations: connections weigh their
+# `first`/`last` argument (or the default size), other lists a fixed weight
+GRAPHQL_MAX_QUERY_DEPTH = config('GRAPHQL_MAX_QUERY_DEPTH', default=12, cast=int)
+GRAPHQL_MAX_QUERY_COST = config('GRAPHQL_MAX_QUERY_COST', default=10000, cast=int)
+GRAPHQL_DEFAULT_CONNECTION_SIZE = 100
+GRAPHQL_LIST_FIELD_WEIGHT = 10
+# Cost each user (or client address, when anonymous) may spend per window
+GRAPHQL_COST_BUDGET = config('GRAPHQL_COST_BUDGET', default=200000, cast=int)
+GRAPHQL_COST_BUDGET_WINDOW = 60
+GRAPHQL_COST_BUDGET_CACHE_ALIAS = 'cost_budgets'
+
+# Addresses of the reverse proxies (nginx) whose X-Real-IP header gives the
+# client address; requests from anywhere else are identified by REMOTE_ADDR
+TRUSTED_PROXY_IPS = config(
+    'TRUSTED_PROXY_IPS', default='127.0.0.1,::1',
+    cast=lambda value: [ip.strip() for ip in value.split(',') if ip.strip()])
+
+# Share of GraphQL requests traced per resolver (0 to 1); requests sending
+# the `X-GraphQL-Trace: 1` header are always traced when sent by staff users
+GRAPHQL_TRACING_SAMPLE_RATE = config(
+    'GRAPHQL_TRACING_SAMPLE_RATE', default=0.0, cast=float)
+# Bearer token of the scrapers reading /graphql/metrics (staff users may read
+# it with their JWT), and the number of operation names given their own series
+GRAPHQL_METRICS_TOKEN = config('GRAPHQL_METRICS_TOKEN', default='')
+GRAPHQL_METRICS_MAX_OPERATIONS = config(
+    'GRAPHQL_METRICS_MAX_OPERATIONS', default=100, cast=int)
+
+# Number of rows saved per transaction by the bulk product import
+PRODUCT_IMPORT_CHUNK_SIZE = config('PRODUCT_IMPORT_CHUNK_SIZE', default=500, cast=int)
+
+# Number of variants read per query (with their prefetches) by the catalog export
+PRODUCT_EXPORT_CHUNK_SIZE = config('PRODUCT_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Dotted path of the product search backend (a product.search.SearchBackend);
+# empty to use the one of the database vendor (FTS5 or PostgreSQL tsvector)
+PRODUCT_SEARCH_BACKEND = config('PRODUCT_SEARCH_BACKEND', default='')
+
+# Longest edges (px) of the resized copies generated for product images, each
+# saved in the original format and as WebP
+PRODUCT_IMAGE_SIZES = config(
+    'PRODUCT_IMAGE_SIZES', default='128,256,512,1024',
+    cast=lambda value: [int(size) for size in value.split(',') if size.strip()])
+# Threads generating them off the request (0 generates them inline) and the
+# number of images that may wait for a thread
+PRODUCT_IMAGE_WORKERS = config('PRODUCT_IMAGE_WORKERS', default=2, cast=int)
+PRODUCT_IMAGE_QUEUE_SIZE = config('PRODUCT_IMAGE_QUEUE_SIZE', default=100, cast=int)
+
+# Upload handlers hashing files as they are received, for content-addressed
+# storage (see core.files)
+FILE_UPLOAD_HANDLERS = [
+    'core.files.HashingMemoryFileUploadHandler',
+    'core.files.HashingTemporaryFileUploadHandler',
+]
+
+# Resumable chunked image uploads (see product.uploads): where the chunks are
+# assembled, which must be shared by the workers, the largest file accepted,
+# and how many seconds an upload may take before delete_expired_uploads
+# removes it
+PRODUCT_UPLOAD_TEMP_DIR = config(
+    'PRODUCT_UPLOAD_TEMP_DIR', default=os.path.join(tempfile.gettempdir(), 'product-uploads'))
+PRODUCT_UPLOAD_MAX_SIZE = config('PRODUCT_UPLOAD_MAX_SIZE', default=50 * 1024 * 1024, cast=int)
+PRODUCT_UPLOAD_EXPIRY = config('PRODUCT_UPLOAD_EXPIRY', default=24 * 60 * 60, cast=int)
+
+# Media serving (see core.views.serve_media): the top-level directories and
+# files of MEDIA_ROOT that are served, those of the models' upload_to and
+# defaults, how long clients may cache files, and the
+# internal nginx location files are handed to with X-Accel-Redirect, the
+# /protected-media/ of nginx.conf (empty serves them from Django, the
+# default with DEBUG since runserver has no nginx in front)
+MEDIA_PUBLIC_DIRECTORIES = ['product_images', 'blog', 'uploads', 'ckeditor5', 'logo', 'assets']
+MEDIA_PUBLIC_FILES = ['logo.png']
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=86400, cast=int)
+MEDIA_ACCEL_REDIRECT_PREFIX = config(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', default='' if DEBUG else '/protected-media/')
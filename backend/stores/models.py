@@ -4,6 +4,7 @@ from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumberField
 from .utils import generate_unique_subdomain
 from .enums import StorePermissions
+from .permissions import get_permission_codenames
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy as _
 # Create your models here.
@@ -113,9 +114,7 @@ class StaffMember(models.Model):
             return True
         
         # Check permissions
-        return self.permissions.filter(
-            codename=permission.codename
-        ).exists()
+        return permission.codename in get_permission_codenames(self)
     def __str__(self):
         return str(self.user)
 
@@ -132,6 +131,20 @@ class Store(models.Model):
     currency_code = models.CharField(max_length=5, default='USD')
     enabled_presentment_currencies = models.JSONField(null=True, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so receivers can sync the copies of the currency code.
+        instance._loaded_currency_code = instance.__dict__.get("currency_code")
+        return instance
+
+    @property
+    def currency_code_changed(self):
+        """Whether `currency_code` differs from the value loaded from the database."""
+        if not hasattr(self, "_loaded_currency_code"):
+            return False
+        return self._loaded_currency_code != self.currency_code
+
     def save(self, *args, **kwargs):
         if not self.primary_domain_id:
             default_domain_obj, _ = Domain.objects.get_or_create(
@@ -139,6 +152,7 @@ class Store(models.Model):
             )
             self.primary_domain = default_domain_obj
         super().save(*args, **kwargs)
+        self._loaded_currency_code = self.currency_code
 
     def __str__(self):
         return self.name
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import caches
+
+GLOBAL_VERSION_KEY = "store-permissions:version"
+STAFF_MEMBER_VERSION_KEY = "store-permissions:staff-member:{}"
+
+
+class PermissionCache:
+    """
+    Process-level LRU of staff member permission codename sets.
+
+    Entries are keyed by the staff member id together with version tokens
+    kept in Django's cache, so bumping a version makes every process miss
+    its stale entry without having to reach into it. Entries also expire
+    after `ttl` seconds, which bounds how long a revoked permission is still
+    granted when the version tokens are not shared between processes.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            value, expires_at = self._entries[key]
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+permission_cache = PermissionCache(
+    getattr(settings, "STORE_PERMISSIONS_CACHE_SIZE", 1024),
+    getattr(settings, "STORE_PERMISSIONS_CACHE_TTL", 30))
+
+
+def get_version_cache():
+    return caches[getattr(settings, "STORE_PERMISSIONS_CACHE_ALIAS", "default")]
+
+
+def _new_version():
+    return uuid4().hex
+
+
+def get_permissions_version(staff_member_id):
+    """
+    Return the version tokens of a staff member's permission set.
+
+    A missing token is replaced by a fresh one rather than a default, so an
+    evicted version can never match an entry cached before a bump.
+    """
+    cache = get_version_cache()
+    member_key = STAFF_MEMBER_VERSION_KEY.format(staff_member_id)
+    versions = cache.get_many([GLOBAL_VERSION_KEY, member_key])
+    for key in (GLOBAL_VERSION_KEY, member_key):
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return versions[GLOBAL_VERSION_KEY], versions[member_key]
+
+
+def bump_permissions_version(staff_member_id=None):
+    """
+    Invalidate cached permission sets.
+
+    Bumps the version of a single staff member, or of every staff member
+    when no id is given (e.g. when a permission codename changes).
+    """
+    cache = get_version_cache()
+    if staff_member_id is None:
+        cache.set(GLOBAL_VERSION_KEY, _new_version(), None)
+    else:
+        cache.set(STAFF_MEMBER_VERSION_KEY.format(staff_member_id), _new_version(), None)
+
+
+def get_permission_codenames(staff_member):
+    """
+    Return the set of permission codenames granted to `staff_member`.
+
+    The set is loaded with a single query, then kept on the instance for the
+    rest of the request and in the process-level LRU for later requests.
+    """
+    codenames = getattr(staff_member, "_permission_codenames", None)
+    if codenames is not None:
+        return codenames
+
+    key = (staff_member.pk, *get_permissions_version(staff_member.pk))
+    codenames = permission_cache.get(key)
+    if codenames is None:
+        codenames = frozenset(
+            staff_member.permissions.values_list("codename", flat=True))
+        permission_cache.set(key, codenames)
+
+    staff_member._permission_codenames = codenames
+    return codenames
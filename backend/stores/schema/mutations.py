@@ -1,4 +1,5 @@
 import graphene
+from django.conf import settings
 from .inputs import StoreInput, StoreAddressInput
 from .types import StoreType, StoreAddressType
 from ..models import Store, StaffMember
@@ -12,9 +13,31 @@ class UpdateStoreProfile(graphene.Mutation):
 
     store = graphene.Field(StoreType)
 
+    @classmethod
+    def clean_currency_code(cls, currency_code):
+        """
+        Return the code upper-cased, or raise unless it is three letters.
+
+        Variants, discounts and orders copy the code into columns of
+        `DEFAULT_CURRENCY_CODE_LENGTH` characters.
+        """
+        currency_code = currency_code.strip().upper()
+        if len(currency_code) != settings.DEFAULT_CURRENCY_CODE_LENGTH or not (
+                currency_code.isascii() and currency_code.isalpha()):
+            raise GraphQLError(
+                "Currency code must be a three-letter ISO 4217 code.",
+                extensions={
+                    "code": "INVALID_INPUT",
+                    "status": 400
+                }
+            )
+        return currency_code
+
     @classmethod
     def mutate(cls, root, info, input, default_domain):
         user = info.context.user
+        if input.currency_code:
+            input.currency_code = cls.clean_currency_code(input.currency_code)
         try:
             store = Store.objects.get(default_domain=default_domain)
 
@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save,post_migrate
+from django.db.models.signals import post_save,post_migrate,post_delete,m2m_changed
 from django.dispatch import receiver
 from .models import Store, StoreAddress, StaffMember, StorePermission
+from .permissions import bump_permissions_version
 
 
 @receiver(post_save, sender=Store)
@@ -26,4 +27,33 @@ def create_permissions(sender, **kwargs):
     
     # Ensure migration is for stores app
     if sender.name == 'stores':
-        StorePermission.sync_permissions()
\ No newline at end of file
+        StorePermission.sync_permissions()
+
+
+@receiver(post_save, sender=StaffMember)
+@receiver(post_delete, sender=StaffMember)
+def invalidate_staff_member_permissions(sender, instance, **kwargs):
+    instance.__dict__.pop("_permission_codenames", None)
+    bump_permissions_version(instance.pk)
+
+
+@receiver(m2m_changed, sender=StaffMember.permissions.through)
+def invalidate_changed_staff_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        instance.__dict__.pop("_permission_codenames", None)
+        bump_permissions_version(instance.pk)
+    elif pk_set:
+        for staff_member_id in pk_set:
+            bump_permissions_version(staff_member_id)
+    else:
+        # Clearing a permission from every staff member does not report
+        # which members were affected.
+        bump_permissions_version()
+
+
+@receiver(post_save, sender=StorePermission)
+@receiver(post_delete, sender=StorePermission)
+def invalidate_all_staff_permissions(sender, **kwargs):
+    bump_permissions_version()
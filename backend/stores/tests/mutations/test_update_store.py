@@ -1,3 +1,4 @@
+import pytest
 
 from core.graphql.tests.utils import get_graphql_content
 UPDATE_STORE_PROFILE = """
@@ -42,6 +43,36 @@ def test_update_store_profile(staff_api_client, store, staff_member, store_addre
     assert data["store"]['currencyCode'] == updated_currency_code
 
 
+@pytest.mark.parametrize("currency_code", ["EURO", "US", "12$"])
+def test_update_store_profile_rejects_invalid_currency_code(
+    staff_api_client, store, staff_member, currency_code
+):
+    """Test that codes the copied currency columns cannot hold are rejected."""
+    variables = {
+        "input": {"currencyCode": currency_code},
+        "defaultDomain": store.default_domain
+    }
+    response = staff_api_client.post_graphql(
+        query=UPDATE_STORE_PROFILE, variables=variables)
+    content = get_graphql_content(response, ignore_errors=True)
+
+    assert content["errors"][0]["extensions"]["code"] == "INVALID_INPUT"
+    store.refresh_from_db()
+    assert store.currency_code == "USD"
+
+
+def test_update_store_profile_normalizes_currency_code(staff_api_client, store, staff_member):
+    variables = {
+        "input": {"currencyCode": "eur"},
+        "defaultDomain": store.default_domain
+    }
+    response = staff_api_client.post_graphql(
+        query=UPDATE_STORE_PROFILE, variables=variables)
+    content = get_graphql_content(response)
+
+    assert content["data"]["updateStoreProfile"]["store"]["currencyCode"] == "EUR"
+
+
 UPDATE_STORE_ADDRESS = """
       mutation UpdateStoreAddress($input: StoreAddressInput!, $defaultDomain: String!) {
         updateStoreAddress(input: $input, defaultDomain: $defaultDomain) {
@@ -0,0 +1,72 @@
+from stores.enums import StorePermissions
+from stores.models import StaffMember, StorePermission
+from stores.permissions import PermissionCache, get_permission_codenames
+
+
+def get_store_permission(permission):
+    return StorePermission.objects.get(codename=permission.codename)
+
+
+def test_has_permission_uses_cached_codenames(
+        staff_member_with_no_permissions, django_assert_num_queries):
+    staff_member = staff_member_with_no_permissions
+    staff_member.permissions.add(
+        get_store_permission(StorePermissions.PRODUCTS_VIEW))
+
+    with django_assert_num_queries(1):
+        assert staff_member.has_permission(StorePermissions.PRODUCTS_VIEW)
+        assert not staff_member.has_permission(StorePermissions.PRODUCTS_UPDATE)
+
+
+def test_permission_codenames_are_shared_across_requests(
+        staff_member_with_no_permissions, django_assert_num_queries):
+    staff_member_with_no_permissions.permissions.add(
+        get_store_permission(StorePermissions.PRODUCTS_VIEW))
+    get_permission_codenames(staff_member_with_no_permissions)
+
+    staff_member = StaffMember.objects.get(pk=staff_member_with_no_permissions.pk)
+    with django_assert_num_queries(0):
+        assert staff_member.has_permission(StorePermissions.PRODUCTS_VIEW)
+
+
+def test_adding_permission_invalidates_cache(staff_member_with_no_permissions):
+    staff_member = staff_member_with_no_permissions
+    assert not staff_member.has_permission(StorePermissions.PRODUCTS_UPDATE)
+
+    staff_member.permissions.add(
+        get_store_permission(StorePermissions.PRODUCTS_UPDATE))
+
+    assert staff_member.has_permission(StorePermissions.PRODUCTS_UPDATE)
+    other_instance = StaffMember.objects.get(pk=staff_member.pk)
+    assert other_instance.has_permission(StorePermissions.PRODUCTS_UPDATE)
+
+
+def test_removing_permission_from_reverse_side_invalidates_cache(
+        staff_member_with_no_permissions):
+    permission = get_store_permission(StorePermissions.PRODUCTS_VIEW)
+    staff_member_with_no_permissions.permissions.add(permission)
+    assert StaffMember.objects.get(
+        pk=staff_member_with_no_permissions.pk).has_permission(StorePermissions.PRODUCTS_VIEW)
+
+    permission.staff_members.clear()
+
+    staff_member = StaffMember.objects.get(pk=staff_member_with_no_permissions.pk)
+    assert not staff_member.has_permission(StorePermissions.PRODUCTS_VIEW)
+
+
+def test_store_owner_has_all_permissions(staff_member, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        assert staff_member.has_permission(StorePermissions.STORE_SETTINGS)
+
+
+def test_permission_cache_entries_expire(monkeypatch):
+    """Test that entries are dropped after their TTL, even without a version bump."""
+    now = [100.0]
+    monkeypatch.setattr("stores.permissions.time.monotonic", lambda: now[0])
+    permission_cache = PermissionCache(max_size=10, ttl=30)
+    permission_cache.set("key", frozenset({"view"}))
+
+    now[0] += 29
+    assert permission_cache.get("key") == frozenset({"view"})
+    now[0] += 1
+    assert permission_cache.get("key") is None